@@ -9,7 +9,7 @@ Creates Flask app and initializes extensions:
 
 from flask import Flask, request, after_this_request, make_response
 from flask_cors import CORS
-from app.extensions import db, jwt, migrate, limiter, jwt_config
+from app.extensions import db, jwt, migrate, jwt_config
 from app.config import DevelopmentConfig, ProductionConfig, TestingConfig
 from app.schemas import ma
 
@@ -59,9 +59,10 @@ def create_app(config_name="development"):
         },
     )
     jwt.init_app(app)
-    # Initialize Flask-Limiter if available
-    if limiter:
-        limiter.init_app(app)
+    # Per-route and per-role rate limits, counted in storage shared by workers
+    from app.utils.rate_limit import limiter
+
+    limiter.init_app(app)
 
     # Fallback CORS handler for all responses
     @app.after_request
@@ -95,6 +96,72 @@ def create_app(config_name="development"):
         # Create database tables
         db.create_all()
 
+        # In-process listing read models (built lazily on first query)
+        from app.services.search_index import livestock_search
+        from app.services.facets import facet_snapshot
+        from app.services.listing_columns import listing_columns
+
+        livestock_search.init_app(app)
+        facet_snapshot.init_app(app)
+        listing_columns.init_app(app)
+
+        # Per-user order/listing totals, maintained on flush
+        from app.services.user_stats import user_stats
+
+        user_stats.init_app(app)
+
+        # Password hashing on a bounded process pool, off the request threads
+        from app.services.password_hasher import password_hasher
+
+        password_hasher.init_app(app)
+
+        # Deactivated users and revoked token versions, cached per worker
+        from app.services.access_control import access_control
+
+        access_control.init_app(app)
+
+        # Admin audit entries, written in bulk by the committing transaction
+        from app.services.audit import audit_trail
+
+        audit_trail.init_app(app)
+
+        # DailyMetrics rollup (run via `flask rollup-metrics` or the admin API)
+        from app.services.metrics_rollup import metrics_rollup
+
+        metrics_rollup.init_app(app)
+
+        # Write-behind analytics events and listing view counts
+        from app.services.analytics import analytics_pipeline
+        from app.services.view_counter import view_counter
+
+        analytics_pipeline.init_app(app)
+        view_counter.init_app(app)
+
+        # Commission rules compiled into a per-worker interval index
+        from app.services.commission import commission_engine
+
+        commission_engine.init_app(app)
+
+        # In-process order numbers (time + host + pid + sequence)
+        from app.utils.order_numbers import order_numbers
+
+        order_numbers.init_app(app)
+
+        # Buyer carts in the database, with an optional per-worker cache
+        from app.services.cart_store import cart_store
+
+        cart_store.init_app(app)
+
+        # Read-through cache for public listing responses
+        from app.utils.cache import response_cache
+
+        response_cache.init_app(app)
+
+        # Per-request SQL statement count (debug mode only)
+        from app.utils.query_counter import init_query_counter
+
+        init_query_counter(app, db.engine)
+
         # Import and register RESTful API resources (for future use)
         try:
             from app.routes import (
@@ -50,6 +50,74 @@ class Config:
     CLOUDINARY_API_KEY = os.environ.get('CLOUDINARY_API_KEY')
     CLOUDINARY_API_SECRET = os.environ.get('CLOUDINARY_API_SECRET')
 
+    # Listing read models (search index, facets): how often a worker pulls
+    # rows changed by other workers
+    READ_MODEL_SYNC_SECONDS = 5
+
+    # Answer range-filtered buyer searches from the NumPy listing snapshot
+    LISTING_COLUMNS_ENABLED = os.environ.get("LISTING_COLUMNS_ENABLED", "false").lower() == "true"
+
+    # Listing view counts are buffered per worker and written in batches
+    VIEW_COUNTER_FLUSH_SECONDS = 10
+    VIEW_COUNTER_EVENTS = os.environ.get("VIEW_COUNTER_EVENTS", "false").lower() == "true"
+
+    # Rate limits: storage shared by workers (sqlite:///file, redis://...;
+    # default instance/ratelimit.db), sliding-window or token-bucket, and a
+    # per-user allowance for each role across all /api requests
+    RATELIMIT_STORAGE_URI = os.environ.get("RATELIMIT_STORAGE_URI")
+    RATELIMIT_STRATEGY = os.environ.get("RATELIMIT_STRATEGY", "sliding-window")
+    RATELIMIT_ROLE_LIMITS = {
+        "buyer": "300 per minute",
+        "farmer": "300 per minute",
+        "admin": "1200 per minute",
+    }
+
+    # Password hashing: werkzeug method string, process pool size and how
+    # many hashes may be admitted at once before sign-ins get a 429
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", "8"))
+
+    # Role checks use JWT claims; deactivations made on another worker
+    # reach this one within this many seconds
+    ACCESS_CONTROL_SYNC_SECONDS = 30
+
+    # Commission when no CommissionRule matches; rule edits made on another
+    # worker apply here within COMMISSION_RULES_SYNC_SECONDS
+    DEFAULT_COMMISSION_RATE = 0.02
+    COMMISSION_RULES_SYNC_SECONDS = 60
+
+    # Order numbers: set a distinct id (0-1023) per host when running
+    # several; unset derives one from the hostname
+    ORDER_NUMBER_HOST_ID = (
+        int(os.environ["ORDER_NUMBER_HOST_ID"]) if os.environ.get("ORDER_NUMBER_HOST_ID") else None
+    )
+
+    # Buyer carts: abandoned after CART_TTL_DAYS untouched, swept hourly;
+    # CART_CACHE_SECONDS > 0 adds a bounded per-worker cache of contents
+    CART_TTL_DAYS = 30
+    CART_MAX_ITEMS = 50
+    CART_CACHE_SECONDS = int(os.environ.get("CART_CACHE_SECONDS", "0"))
+    CART_EVICT_SECONDS = 3600
+
+    # Admin dashboard: cached this long, then served stale while refreshing
+    ADMIN_DASHBOARD_TTL = 15
+    ADMIN_DASHBOARD_STALE_SECONDS = 60
+
+    # Analytics events: bounded queue drained in batched INSERTs.
+    # On overflow either drop events or spill them to a local file.
+    ANALYTICS_QUEUE_SIZE = 10000
+    ANALYTICS_BATCH_SIZE = 500
+    ANALYTICS_FLUSH_SECONDS = 2
+    ANALYTICS_OVERFLOW = os.environ.get("ANALYTICS_OVERFLOW", "drop")
+    # Spilled events that fail this many inserts move to a dead-letter file
+    ANALYTICS_SPILL_MAX_ATTEMPTS = 5
+
+    # Response cache for public listing endpoints (memory:// or redis://...)
+    CACHE_URL = os.environ.get("CACHE_URL", "memory://")
+    CACHE_DEFAULT_TTL = 30
+    CACHE_MAX_ENTRIES = 1024
+
     # Frontend URL for CORS
     FRONTEND_URL = os.environ.get("FRONTEND_URL", "http://localhost:5173")
 
@@ -86,6 +154,14 @@ class TestingConfig(Config):
         "DATABASE_URL", "sqlite:///farmart_test.db"
     )
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
+    # No background flushers in tests; they call flush() themselves
+    VIEW_COUNTER_FLUSH_SECONDS = 0
+    ANALYTICS_FLUSH_SECONDS = 0
+    CART_EVICT_SECONDS = 0
+    RATELIMIT_STORAGE_URI = "memory://"
+    # Cheap hashes, computed inline
+    PASSWORD_HASH_METHOD = "pbkdf2:sha256:1000"
+    PASSWORD_HASH_WORKERS = 0
 
 
 config = {
@@ -11,18 +11,8 @@ db = SQLAlchemy()
 jwt = JWTManager()
 migrate = Migrate()
 
-# Optional: Flask-Limiter for rate limiting (install with: pip install flask-limiter)
-try:
-    from flask_limiter import Limiter
-    from flask_limiter.util import get_remote_address
-
-    limiter = Limiter(
-        get_remote_address,
-        storage_uri="memory://",
-        strategy="fixed-window",
-    )
-except ImportError:
-    limiter = None
+# Rate limiting lives in app/utils/rate_limit.py (`limiter`), with storage
+# shared across workers
 
 # JWT Configuration for cookie-based authentication (Secure Handshake)
 # Use both cookies AND headers for redundancy during file uploads
@@ -4,8 +4,8 @@ Based on the DBML schema definition
 """
 
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import create_access_token, create_refresh_token
+from sqlalchemy.orm import validates
 from app.extensions import db
 
 
@@ -55,6 +55,11 @@ class User(db.Model):
     """Base user model with authentication and profile."""
 
     __tablename__ = "users"
+    __table_args__ = (
+        # DailyMetrics rollup: new users per day and changed-row scans
+        db.Index("ix_users_created_at", "created_at"),
+        db.Index("ix_users_updated_at", "updated_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(255), unique=True, nullable=False, index=True)
@@ -65,6 +70,11 @@ class User(db.Model):
     role = db.Column(db.String(20), nullable=False, default=UserRole.BUYER)
     is_active = db.Column(db.Boolean, default=True)
     is_verified = db.Column(db.Boolean, default=False)
+    # Bumped to revoke every token issued before (see services.access_control)
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # When token_version last changed; the access-control snapshot only
+    # loads versions bumped within a token lifetime
+    token_version_changed_at = db.Column(db.DateTime, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
@@ -86,21 +96,47 @@ class User(db.Model):
     )
     payments = db.relationship("Payment", back_populates="user")
     addresses = db.relationship("UserAddress", back_populates="user")
+    stats = db.relationship("UserStats", back_populates="user", uselist=False)
+
+    @validates("role")
+    def _validate_role(self, key, role):
+        # Tokens carry the role claim, so a role change revokes them
+        if self.role is not None and role != self.role:
+            self.revoke_tokens()
+        return role
+
+    def revoke_tokens(self):
+        """Invalidate every token issued so far (the caller commits)."""
+        self.token_version = (self.token_version or 0) + 1
+        self.token_version_changed_at = datetime.utcnow()
 
     def set_password(self, password):
-        """Hash and set user password."""
-        self.password_hash = generate_password_hash(password)
+        """Hash and set user password (may raise HasherBusy)."""
+        from app.services.password_hasher import password_hasher
+
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        """Verify user password."""
-        return check_password_hash(self.password_hash, password)
+        """
+        Verify user password (may raise HasherBusy).
+
+        A hash made with outdated parameters is replaced in place; the
+        caller commits it.
+        """
+        from app.services.password_hasher import password_hasher
+
+        matches, new_hash = password_hasher.verify(self.password_hash, password)
+        if new_hash:
+            self.password_hash = new_hash
+        return matches
 
     def get_tokens(self):
         """Generate JWT access and refresh tokens."""
-        access_token = create_access_token(
-            identity=self.id, additional_claims={"role": self.role}
-        )
-        refresh_token = create_refresh_token(identity=self.id)
+        from app.services.access_control import token_claims
+
+        claims = token_claims(self)
+        access_token = create_access_token(identity=self.id, additional_claims=claims)
+        refresh_token = create_refresh_token(identity=self.id, additional_claims=claims)
         return {
             "access_token": access_token,
             "refresh_token": refresh_token,
@@ -175,6 +211,74 @@ class UserAddress(db.Model):
     user = db.relationship("User", back_populates="addresses")
 
 
+class UserStats(db.Model):
+    """
+    Per-user order/listing totals, kept current by app.services.user_stats
+    in the same transaction as the order or listing change.
+    """
+
+    __tablename__ = "user_stats"
+
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    # As a farmer
+    listings_count = db.Column(db.Integer, nullable=False, default=0)
+    sales_count = db.Column(db.Integer, nullable=False, default=0)  # delivered
+    revenue_total = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    # As a buyer
+    orders_count = db.Column(db.Integer, nullable=False, default=0)
+    purchases_count = db.Column(db.Integer, nullable=False, default=0)  # delivered
+    spent_total = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    user = db.relationship("User", back_populates="stats")
+
+    def to_dict(self, role=None):
+        farmer = {
+            "total_listings": self.listings_count,
+            "total_sales": self.sales_count,
+            "total_revenue": float(self.revenue_total or 0),
+        }
+        buyer = {
+            "total_orders": self.orders_count,
+            "total_purchases": self.purchases_count,
+            "total_spent": float(self.spent_total or 0),
+        }
+        if role == UserRole.FARMER:
+            return farmer
+        if role is not None:
+            return buyer
+        return {**farmer, **buyer}
+
+
+class CartItem(db.Model):
+    """
+    One listing in a buyer's cart (managed by app.services.cart_store).
+    Every write to a cart touches all of its rows, so updated_at dates the
+    whole cart and abandoned carts can be evicted by it.
+    """
+
+    __tablename__ = "cart_items"
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "livestock_id", name="uq_cart_items_user_livestock"),
+        db.Index("ix_cart_items_updated_at", "updated_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    livestock_id = db.Column(
+        db.Integer, db.ForeignKey("livestock.id", ondelete="CASCADE"), nullable=False
+    )
+    quantity = db.Column(db.Integer, nullable=False, default=1)
+    added_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
 # ==================== Livestock Models ====================
 
 
@@ -213,6 +317,19 @@ class Vaccination(db.Model):
 
 class Livestock(db.Model):
     __tablename__ = "livestock"
+    __table_args__ = (
+        # Public feed: WHERE is_available ORDER BY (created_at|price), id
+        db.Index("ix_livestock_available_created", "is_available", "created_at", "id"),
+        db.Index("ix_livestock_available_price", "is_available", "price", "id"),
+        # Species counts: WHERE is_available GROUP BY animal_type
+        db.Index("ix_livestock_available_animal_type", "is_available", "animal_type"),
+        # Farmer dashboards and admin joins
+        db.Index("ix_livestock_farmer_created", "farmer_id", "created_at"),
+        # Search index catch-up: WHERE updated_at >= watermark
+        db.Index("ix_livestock_updated_at", "updated_at"),
+        # Proximity search: geohash prefix range scans
+        db.Index("ix_livestock_available_geohash", "is_available", "geohash"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     farmer_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
@@ -226,12 +343,18 @@ class Livestock(db.Model):
     price_per_kg = db.Column(db.Float)  # Optional: price per kg
     original_price = db.Column(db.Float)  # Original price for showing discounts
     location = db.Column(db.String(100), nullable=False)
+    # Copied from the farmer's profile for proximity search (app.services.geo_search)
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    geohash = db.Column(db.String(12))
     image_url = db.Column(db.String(500))  # Primary image URL
     images = db.Column(db.Text)  # JSON array of additional image URLs
 
     description = db.Column(db.Text)  # Selling pitch / reason for sale
     reason_for_sale = db.Column(db.String(100))  # Breeding, Slaughter, Dairy, etc.
     health_certified = db.Column(db.Boolean, default=False)
+    # Written in batches by app.services.view_counter
+    view_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     is_available = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -245,6 +368,8 @@ class Livestock(db.Model):
     # Relationship for orders targeting this specific animal
     orders = db.relationship("Order", back_populates="livestock")
 
+    vaccinations = db.relationship("Vaccination", back_populates="livestock")
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -273,6 +398,17 @@ class Order(db.Model):
     """Customer orders for livestock."""
 
     __tablename__ = "orders"
+    __table_args__ = (
+        db.Index("ix_orders_livestock_id", "livestock_id"),
+        # Buyer order history ordered by placed_at / created_at
+        db.Index("ix_orders_buyer_placed", "buyer_id", "placed_at"),
+        db.Index("ix_orders_buyer_created", "buyer_id", "created_at"),
+        # Admin order list and dashboard filters
+        db.Index("ix_orders_status_placed", "status", "placed_at"),
+        # DailyMetrics rollup: orders per day and changed-row scans
+        db.Index("ix_orders_placed_at", "placed_at"),
+        db.Index("ix_orders_updated_at", "updated_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     order_number = db.Column(db.String(50), unique=True, nullable=False, index=True)
@@ -286,7 +422,11 @@ class Order(db.Model):
     commission_rate = db.Column(db.Float, default=0.02)  # 2% commission
     commission_amount = db.Column(db.Numeric(10, 2), nullable=False)
     total_amount = db.Column(db.Numeric(10, 2), nullable=False)
-    status = db.Column(db.String(30), default=OrderStatus.PENDING)
+    # active_history: the previous status is loaded on assignment, so the
+    # user stats flush hook always sees the transition
+    status = db.column_property(
+        db.Column(db.String(30), default=OrderStatus.PENDING), active_history=True
+    )
     shipping_address = db.Column(db.Text, nullable=False)
     buyer_notes = db.Column(db.Text)
     placed_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -334,6 +474,10 @@ class Payment(db.Model):
     """Payment records for orders."""
 
     __tablename__ = "payments"
+    __table_args__ = (
+        # M-Pesa callbacks look payments up by CheckoutRequestID
+        db.Index("ix_payments_checkout_request_id", "checkout_request_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(
@@ -362,6 +506,10 @@ class EscrowAccount(db.Model):
     """Escrow account for holding funds during transactions."""
 
     __tablename__ = "escrow_accounts"
+    __table_args__ = (
+        # check_and_release_expired: WHERE status = 'held' AND held_at <= ?
+        db.Index("ix_escrow_accounts_status_held_at", "status", "held_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(
@@ -383,6 +531,10 @@ class Dispute(db.Model):
     """Dispute records for orders."""
 
     __tablename__ = "disputes"
+    __table_args__ = (
+        db.Index("ix_disputes_status_created", "status", "created_at"),
+        db.Index("ix_disputes_type_created", "dispute_type", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(
@@ -437,14 +589,20 @@ class AuditLog(db.Model):
     """Audit log for admin actions."""
 
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        db.Index("ix_audit_logs_admin_action_created", "admin_id", "action", "created_at"),
+        db.Index("ix_audit_logs_created_at", "created_at"),
+        db.Index("ix_audit_logs_entity_created", "entity_type", "entity_id", "created_at"),
+        db.Index("ix_audit_logs_admin_created", "admin_id", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     admin_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     action = db.Column(db.String(100), nullable=False)
     entity_type = db.Column(db.String(50))  # user, order, livestock, payment
     entity_id = db.Column(db.Integer)
-    old_values = db.Column(db.Text)  # JSON
-    new_values = db.Column(db.Text)  # JSON
+    old_values = db.Column(db.Text)  # compact JSON of changed keys (services.audit)
+    new_values = db.Column(db.Text)  # compact JSON of changed keys (services.audit)
     ip_address = db.Column(db.String(50))
     user_agent = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -474,6 +632,10 @@ class AnalyticsEvent(db.Model):
     """Analytics events for tracking platform activity."""
 
     __tablename__ = "analytics_events"
+    __table_args__ = (
+        # DailyMetrics rollup: events per day
+        db.Index("ix_analytics_events_created_at", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     event_type = db.Column(
@@ -497,7 +659,8 @@ class DailyMetrics(db.Model):
     __tablename__ = "daily_metrics"
 
     id = db.Column(db.Integer, primary_key=True)
-    date = db.Column(db.Date, nullable=False, index=True)
+    # One row per day, maintained by app.services.metrics_rollup
+    date = db.Column(db.Date, nullable=False, unique=True)
     total_listings = db.Column(db.Integer, default=0)
     total_orders = db.Column(db.Integer, default=0)
     total_revenue = db.Column(db.Numeric(12, 2), default=0)
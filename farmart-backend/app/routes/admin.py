@@ -1,7 +1,8 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import get_jwt_identity
+from datetime import datetime, timedelta
 from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 from app.models import (
     User,
     Livestock,
@@ -11,7 +12,6 @@ from app.models import (
     AuditLog,
     SystemSettings,
     UserRole,
-    LivestockStatus,
     OrderStatus,
     DisputeStatus,
     EscrowAccount, 
@@ -20,12 +20,22 @@ from app.models import (
 from app import db
 from app.utils.decorators import admin_required
 from app.services.moderation_service import moderation_service
+from app.services.listing_events import listing_changed
+from app.utils.cache import CACHE_HEADER, response_cache
+from app.utils.pagination import clamp_limit, keyset_page, InvalidCursor
+from app.services.analytics import analytics_pipeline
+from app.services.metrics_rollup import metrics_rollup
+from app.services.user_stats import user_stats
+from app.services.audit import audit_trail, from_json
+from app.services.commission import commission_engine
+from app.services.order_lists import order_list_query, order_page
+from app.services.access_control import access_control
+from app.services.dashboard import RANGES as DASHBOARD_RANGES, dashboard_metrics, range_start
 
 admin_bp = Blueprint("admin", __name__)
 
 
 @admin_bp.route("/users", methods=["GET"])
-@jwt_required()
 @admin_required
 def get_users():
     """Get all users with pagination and filtering."""
@@ -35,7 +45,7 @@ def get_users():
     is_active = request.args.get("is_active")
     search = request.args.get("search")
 
-    query = User.query
+    query = User.query.options(joinedload(User.stats))
 
     if role:
         query = query.filter_by(role=role)
@@ -54,7 +64,13 @@ def get_users():
     )
 
     return jsonify({
-        "users": [user.to_dict() for user in pagination.items],
+        "users": [
+            {
+                **user.to_dict(),
+                "stats": user.stats.to_dict(user.role) if user.stats else None,
+            }
+            for user in pagination.items
+        ],
         "total": pagination.total,
         "page": pagination.page,
         "per_page": pagination.per_page,
@@ -63,7 +79,6 @@ def get_users():
 
 
 @admin_bp.route("/users/<int:user_id>", methods=["GET"])
-@jwt_required()
 @admin_required
 def get_user_detail(user_id):
     """
@@ -77,56 +92,8 @@ def get_user_detail(user_id):
         return jsonify({"error": "User not found"}), 404
 
     # ---------- ROLE-SPECIFIC STATS ----------
-    if user.role == UserRole.FARMER:
-        total_listings = Livestock.query.filter_by(farmer_id=user_id).count()
-
-        delivered_orders = (
-            Order.query
-            .join(Livestock)
-            .filter(
-                Livestock.farmer_id == user_id,
-                Order.status == OrderStatus.DELIVERED
-            )
-        )
-
-        total_sales = delivered_orders.count()
-
-        total_revenue = (
-            db.session
-            .query(func.sum(Order.total_amount))
-            .join(Livestock)
-            .filter(
-                Livestock.farmer_id == user_id,
-                Order.status == OrderStatus.DELIVERED
-            )
-            .scalar()
-            or 0
-        )
-
-        stats = {
-            "total_listings": total_listings,
-            "total_sales": total_sales,
-            "total_revenue": float(total_revenue),
-        }
-
-    else:  # BUYER or ADMIN
-        total_orders = Order.query.filter_by(buyer_id=user_id).count()
-
-        total_spent = (
-            db.session
-            .query(func.sum(Order.total_amount))
-            .filter(
-                Order.buyer_id == user_id,
-                Order.status == OrderStatus.DELIVERED
-            )
-            .scalar()
-            or 0
-        )
-
-        stats = {
-            "total_orders": total_orders,
-            "total_spent": float(total_spent),
-        }
+    # Maintained rollup (app.services.user_stats): one row, no aggregation
+    stats = user_stats.for_user(user).to_dict(user.role)
 
     # ---------- PROFILE ----------
     profile_data = None
@@ -149,8 +116,14 @@ def get_user_detail(user_id):
         "stats": stats,
     }), 200
 
+@admin_bp.route("/users/stats/reconcile", methods=["POST"])
+@admin_required
+def reconcile_user_stats():
+    """Rebuild the per-user statistics rollup from orders and listings."""
+    return jsonify({"users": user_stats.reconcile()}), 200
+
+
 @admin_bp.route("/users/<int:user_id>/activate", methods=["POST"])
-@jwt_required()
 @admin_required
 def activate_user(user_id):
     """Activate a user account."""
@@ -159,24 +132,23 @@ def activate_user(user_id):
     if not user:
         return jsonify({"error": "User not found"}), 404
 
+    was_active = user.is_active
     user.is_active = True
+    # Tokens issued before this change stop working
+    user.revoke_tokens()
 
-    admin_id = get_jwt_identity()
-    audit = AuditLog(
-        admin_id=admin_id,
-        action="user_activated",
-        entity_type="user",
-        entity_id=user_id,
+    audit_trail.record(
+        "user_activated", "user", user_id,
+        old_values={"is_active": was_active},
         new_values={"is_active": True},
     )
-    db.session.add(audit)
     db.session.commit()
+    access_control.invalidate()
 
     return jsonify({"message": "User activated successfully"}), 200
 
 
 @admin_bp.route("/users/<int:user_id>/deactivate", methods=["POST"])
-@jwt_required()
 @admin_required
 def deactivate_user(user_id):
     """Deactivate a user account."""
@@ -185,25 +157,23 @@ def deactivate_user(user_id):
     if not user:
         return jsonify({"error": "User not found"}), 404
 
+    was_active = user.is_active
     user.is_active = False
+    # Revokes every token the user already holds
+    user.revoke_tokens()
 
-    admin_id = get_jwt_identity()
-    audit = AuditLog(
-        admin_id=admin_id,
-        action="user_deactivated",
-        entity_type="user",
-        entity_id=user_id,
-        old_values={"is_active": True},
+    audit_trail.record(
+        "user_deactivated", "user", user_id,
+        old_values={"is_active": was_active},
         new_values={"is_active": False},
     )
-    db.session.add(audit)
     db.session.commit()
+    access_control.invalidate()
 
     return jsonify({"message": "User deactivated successfully"}), 200
 
 
 @admin_bp.route("/users/<int:user_id>/verify", methods=["POST"])
-@jwt_required()
 @admin_required
 def verify_user(user_id):
     """Verify a user's identity."""
@@ -213,6 +183,10 @@ def verify_user(user_id):
         return jsonify({"error": "User not found"}), 404
 
     if user.profile:
+        old_values = {
+            "id_number": user.profile.id_number,
+            "is_verified": user.profile.is_verified,
+        }
         user.profile.id_number = request.get_json().get(
             "id_number", user.profile.id_number
         )
@@ -220,18 +194,17 @@ def verify_user(user_id):
     else:
         return jsonify({"error": "User profile not found"}), 404
 
-    admin_id = get_jwt_identity()
-    audit = AuditLog(
-        admin_id=admin_id, action="user_verified", entity_type="user", entity_id=user_id
+    audit_trail.record(
+        "user_verified", "user", user_id,
+        old_values=old_values,
+        new_values={"id_number": user.profile.id_number, "is_verified": True},
     )
-    db.session.add(audit)
     db.session.commit()
 
     return jsonify({"message": "User verified successfully"}), 200
 
 
 @admin_bp.route("/listings", methods=["GET"])
-@jwt_required()
 @admin_required
 def get_all_listings():
     """Get all livestock listings across platform."""
@@ -261,62 +234,63 @@ def get_all_listings():
 
 
 @admin_bp.route("/listings/<int:listing_id>/approve", methods=["POST"])
-@jwt_required()
 @admin_required
 def approve_listing(listing_id):
-    """Approve a livestock listing."""
+    """Approve (relist) a livestock listing that is off sale."""
     livestock = Livestock.query.get(listing_id)
 
     if not livestock:
         return jsonify({"error": "Listing not found"}), 404
 
-    if livestock.status != LivestockStatus.PENDING_APPROVAL:
-        return jsonify({"error": "Listing is not pending approval"}), 400
+    if livestock.is_available:
+        return jsonify({"error": "Listing is already live"}), 400
 
-    livestock.status = LivestockStatus.AVAILABLE
+    # An animal held by an open order is sold, not awaiting approval
+    open_order = Order.query.filter(
+        Order.livestock_id == listing_id,
+        Order.status != OrderStatus.CANCELLED,
+    ).first()
+    if open_order:
+        return jsonify({"error": "Listing has an open order"}), 400
 
-    admin_id = get_jwt_identity()
-    audit = AuditLog(
-        admin_id=admin_id,
-        action="listing_approved",
-        entity_type="livestock",
-        entity_id=listing_id,
+    livestock.is_available = True
+
+    audit_trail.record(
+        "listing_approved", "livestock", listing_id,
+        old_values={"is_available": False},
+        new_values={"is_available": True},
     )
-    db.session.add(audit)
     db.session.commit()
+    listing_changed(listing_id)
 
     return jsonify({"message": "Listing approved successfully"}), 200
 
 
 @admin_bp.route("/listings/<int:listing_id>/reject", methods=["POST"])
-@jwt_required()
 @admin_required
 def reject_listing(listing_id):
-    """Reject a livestock listing."""
+    """Reject (take down) a livestock listing."""
     livestock = Livestock.query.get(listing_id)
 
     if not livestock:
         return jsonify({"error": "Listing not found"}), 404
 
     reason = request.get_json().get("reason", "Does not meet platform standards")
-    livestock.status = LivestockStatus.RESERVED
+    old_available = livestock.is_available
+    livestock.is_available = False
 
-    admin_id = get_jwt_identity()
-    audit = AuditLog(
-        admin_id=admin_id,
-        action="listing_rejected",
-        entity_type="livestock",
-        entity_id=listing_id,
-        new_values={"reason": reason},
+    audit_trail.record(
+        "listing_rejected", "livestock", listing_id,
+        old_values={"is_available": old_available},
+        new_values={"is_available": False, "reason": reason},
     )
-    db.session.add(audit)
     db.session.commit()
+    listing_changed(listing_id)
 
     return jsonify({"message": "Listing rejected", "reason": reason}), 200
 
 
 @admin_bp.route("/commission-rules", methods=["GET"])
-@jwt_required()
 @admin_required
 def get_commission_rules():
     """Get all commission rules."""
@@ -350,7 +324,6 @@ def get_commission_rules():
 
 
 @admin_bp.route("/commission-rules", methods=["POST"])
-@jwt_required()
 @admin_required
 def create_commission_rule():
     """Create a new commission rule."""
@@ -374,6 +347,7 @@ def create_commission_rule():
 
     db.session.add(rule)
     db.session.commit()
+    commission_engine.invalidate()
 
     return jsonify({
         "message": "Commission rule created successfully",
@@ -382,7 +356,6 @@ def create_commission_rule():
 
 
 @admin_bp.route("/commission-rules/<int:rule_id>", methods=["PUT"])
-@jwt_required()
 @admin_required
 def update_commission_rule(rule_id):
     """Update a commission rule."""
@@ -407,45 +380,110 @@ def update_commission_rule(rule_id):
         if field in data:
             setattr(rule, field, data[field])
 
+    for field in ("effective_from", "effective_to"):
+        if field in data:
+            setattr(
+                rule, field,
+                datetime.strptime(data[field], "%Y-%m-%d").date() if data[field] else None,
+            )
+
     db.session.commit()
+    commission_engine.invalidate()
 
     return jsonify({"message": "Commission rule updated successfully"}), 200
 
 
+@admin_bp.route("/commission-rules/reprice", methods=["GET"])
+@admin_required
+def reprice_orders():
+    """Compare commission charged with what the current rules would charge."""
+    try:
+        start = _parse_day(request.args.get("from"))
+        end = _parse_day(request.args.get("to"))
+    except ValueError:
+        return jsonify({"error": "from and to must be YYYY-MM-DD"}), 400
+
+    report = commission_engine.reprice_orders(
+        start.date() if start else None, end.date() if end else None
+    )
+    return jsonify({"report": report}), 200
+
+
+DISPUTE_SORT_COLUMNS = {
+    "created_at": Dispute.created_at,
+    "order_value": Order.total_amount,
+}
+
+
 @admin_bp.route("/disputes", methods=["GET"])
-@jwt_required()
 @admin_required
 def get_disputes():
-    """Get all disputes (enriched for admin dashboard)."""
+    """
+    Get all disputes (enriched for admin dashboard).
+
+    One joined projection (dispute + order + escrow + payment, each 1:1 on
+    order_id) plus the page count: two queries whatever the page size.
+
+    Filters: status, dispute_type, from/to (created_at, YYYY-MM-DD).
+    Sort: sort=created_at|order_value, order=asc|desc.
+    """
     page = request.args.get("page", 1, type=int)
-    per_page = request.args.get("per_page", 20, type=int)
+    per_page = min(request.args.get("per_page", 20, type=int), 100)
     status = request.args.get("status")
+    dispute_type = request.args.get("dispute_type")
+    sort = request.args.get("sort", "created_at")
+    order_dir = request.args.get("order", "desc")
 
-    query = Dispute.query
+    try:
+        date_from = _parse_day(request.args.get("from"))
+        date_to = _parse_day(request.args.get("to"))
+    except ValueError:
+        return jsonify({"error": "from and to must be YYYY-MM-DD"}), 400
+    if sort not in DISPUTE_SORT_COLUMNS:
+        return jsonify({"error": f"sort must be one of {', '.join(DISPUTE_SORT_COLUMNS)}"}), 400
+
+    query = (
+        db.session.query(
+            Dispute,
+            Order.order_number,
+            Order.total_amount,
+            EscrowAccount.status.label("escrow_status"),
+            Payment.status.label("payment_status"),
+        )
+        .outerjoin(Order, Order.id == Dispute.order_id)
+        .outerjoin(EscrowAccount, EscrowAccount.order_id == Dispute.order_id)
+        .outerjoin(Payment, Payment.order_id == Dispute.order_id)
+    )
     if status:
-        query = query.filter_by(status=status)
+        query = query.filter(Dispute.status == status)
+    if dispute_type:
+        query = query.filter(Dispute.dispute_type == dispute_type)
+    if date_from:
+        query = query.filter(Dispute.created_at >= date_from)
+    if date_to:
+        query = query.filter(Dispute.created_at < date_to + timedelta(days=1))
+
+    sort_column = DISPUTE_SORT_COLUMNS[sort]
+    if order_dir == "asc":
+        query = query.order_by(sort_column.asc(), Dispute.id.asc())
+    else:
+        query = query.order_by(sort_column.desc(), Dispute.id.desc())
 
-    pagination = query.order_by(Dispute.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
 
     disputes_out = []
-    for d in pagination.items:
-        order = Order.query.get(d.order_id)
-        escrow = EscrowAccount.query.filter_by(order_id=d.order_id).first()
-        payment = Payment.query.filter_by(order_id=d.order_id).first()
-
+    for d, order_number, order_total, escrow_status, payment_status in pagination.items:
         disputes_out.append({
             "id": d.id,
             "order_id": d.order_id,
-            "order_number": order.order_number if order else None,
-            "order_total": float(order.total_amount) if order and order.total_amount else None,
+            "order_number": order_number,
+            "order_total": float(order_total) if order_total else None,
             "user_id": d.user_id,
             "dispute_type": d.dispute_type,
             "description": d.description,
             "status": d.status,
-            "escrow_status": escrow.status if escrow else None,
-            "payment_status": payment.status if payment else None,
+            "escrow_status": escrow_status,
+            "payment_status": payment_status,
             "created_at": d.created_at.isoformat() if d.created_at else None,
         })
 
@@ -458,8 +496,12 @@ def get_disputes():
     }), 200
 
 
+def _parse_day(value):
+    """YYYY-MM-DD -> datetime at midnight, or None."""
+    return datetime.strptime(value, "%Y-%m-%d") if value else None
+
+
 @admin_bp.route("/disputes/<int:dispute_id>", methods=["GET"])
-@jwt_required()
 @admin_required
 def get_dispute_detail(dispute_id):
     """Get dispute details with order + escrow + payment info."""
@@ -504,7 +546,6 @@ def get_dispute_detail(dispute_id):
     }), 200
 
 @admin_bp.route("/disputes/<int:dispute_id>/under-review", methods=["POST"])
-@jwt_required()
 @admin_required
 def mark_dispute_under_review(dispute_id):
     """
@@ -523,21 +564,15 @@ def mark_dispute_under_review(dispute_id):
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
-    admin_id = get_jwt_identity()
-    audit = AuditLog(
-        admin_id=admin_id,
-        action="dispute_under_review",
-        entity_type="dispute",
-        entity_id=dispute_id,
+    audit_trail.record(
+        "dispute_under_review", "dispute", dispute_id,
         new_values={"status": DisputeStatus.UNDER_REVIEW},
     )
-    db.session.add(audit)
     db.session.commit()
 
     return jsonify({"message": "Dispute marked as under review"}), 200
 
 @admin_bp.route("/disputes/<int:dispute_id>/resolve", methods=["POST"])
-@jwt_required()
 @admin_required
 def resolve_dispute(dispute_id):
     """
@@ -578,10 +613,6 @@ def resolve_dispute(dispute_id):
             moderation_service.refund_order(order_id=order.id, refund_amount=refund_amount)
             order.status = OrderStatus.CANCELLED
 
-            livestock = Livestock.query.get(order.livestock_id)
-            if livestock:
-                livestock.status = LivestockStatus.AVAILABLE
-
         elif action == "release":
             moderation_service.release_escrow(order_id=order.id)
             order.status = OrderStatus.DELIVERED
@@ -600,20 +631,18 @@ def resolve_dispute(dispute_id):
     if action == "refund" and refund_amount is not None:
         dispute.amount_refunded = refund_amount
 
-    audit = AuditLog(
-        admin_id=admin_id,
-        action="dispute_resolved",
-        entity_type="dispute",
-        entity_id=dispute_id,
+    audit_trail.record(
+        "dispute_resolved", "dispute", dispute_id,
         new_values={
             "resolution": resolution,
             "action": action,
             "amount_refunded": refund_amount,
         },
+        admin_id=admin_id,
     )
-
-    db.session.add(audit)
     db.session.commit()
+    if action == "refund":
+        listing_changed(order.livestock_id)
 
     return jsonify({
         "message": "Dispute resolved successfully",
@@ -622,34 +651,17 @@ def resolve_dispute(dispute_id):
     }), 200
 
 @admin_bp.route("/orders", methods=["GET"])
-@jwt_required()
 @admin_required
 def get_all_orders():
-    """Get all orders on platform."""
+    """Get all orders on platform (paginated, slim list rows)."""
     page = request.args.get("page", 1, type=int)
     per_page = request.args.get("per_page", 20, type=int)
     status = request.args.get("status")
 
-    query = Order.query
-
-    if status:
-        query = query.filter_by(status=status)
-
-    pagination = query.order_by(Order.placed_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
-
-    return jsonify({
-        "orders": [order.to_dict() for order in pagination.items],
-        "total": pagination.total,
-        "page": pagination.page,
-        "per_page": pagination.per_page,
-        "pages": pagination.pages,
-    }), 200
+    return jsonify(order_page(order_list_query(status=status), page, per_page)), 200
 
 
 @admin_bp.route("/orders/<int:order_id>", methods=["GET"])
-@jwt_required()
 @admin_required
 def get_order_detail(order_id):
     """Get order details with payment and dispute info."""
@@ -679,74 +691,53 @@ def get_order_detail(order_id):
 
 
 @admin_bp.route("/dashboard", methods=["GET"])
-@jwt_required()
 @admin_required
 def get_dashboard():
-    """Get admin dashboard metrics."""
-    today = datetime.utcnow().date()
-
-    total_users = User.query.count()
-    farmers = User.query.filter_by(role=UserRole.FARMER).count()
-    buyers = User.query.filter_by(role=UserRole.BUYER).count()
-    new_users_today = User.query.filter(func.date(User.created_at) == today).count()
-
-    total_orders = Order.query.count()
-    pending_orders = Order.query.filter_by(status=OrderStatus.PENDING).count()
-    completed_orders = Order.query.filter_by(status=OrderStatus.DELIVERED).count()
-
-    total_revenue = (
-        db.session
-        .query(func.sum(Order.total_amount))
-        .filter(Order.status == OrderStatus.DELIVERED)
-        .scalar()
-        or 0
-    )
+    """
+    Get admin dashboard metrics.
 
-    today_revenue = (
-        db.session
-        .query(func.sum(Order.total_amount))
-        .filter(
-            Order.status == OrderStatus.DELIVERED, func.date(Order.placed_at) == today
-        )
-        .scalar()
-        or 0
+    `range` (today, 7d, 30d, 90d) sets the window for the *_in_range
+    figures. Results are computed in one query (app.services.dashboard)
+    and cached briefly, served stale while a refresh runs.
+    """
+    range_name = request.args.get("range", "today")
+    if range_name not in DASHBOARD_RANGES:
+        return jsonify({"error": f"range must be one of {', '.join(DASHBOARD_RANGES)}"}), 400
+
+    config = current_app.config
+    metrics, state = response_cache.stale_while_revalidate(
+        f"admin-dashboard:{range_name}",
+        lambda: dashboard_metrics(range_start(range_name)),
+        ttl=config["ADMIN_DASHBOARD_TTL"],
+        stale_ttl=config["ADMIN_DASHBOARD_STALE_SECONDS"],
     )
 
-    total_listings = Livestock.query.count()
-    available_listings = Livestock.query.filter_by(
-        status=LivestockStatus.AVAILABLE
-    ).count()
-
-    open_disputes = Dispute.query.filter_by(status=DisputeStatus.OPEN).count()
-    under_review = Dispute.query.filter_by(status=DisputeStatus.UNDER_REVIEW).count()
-
-    return jsonify({
-        "users": {
-            "total": total_users,
-            "farmers": farmers,
-            "buyers": buyers,
-            "new_today": new_users_today,
-        },
-        "orders": {
-            "total": total_orders,
-            "pending": pending_orders,
-            "completed": completed_orders,
-        },
-        "revenue": {"total": float(total_revenue), "today": float(today_revenue)},
-        "listings": {"total": total_listings, "available": available_listings},
-        "disputes": {"open": open_disputes, "under_review": under_review},
-    }), 200
+    response = jsonify({**metrics, "range": range_name})
+    response.headers[CACHE_HEADER] = state.upper()
+    return response, 200
 
 
 @admin_bp.route("/audit-logs", methods=["GET"])
-@jwt_required()
 @admin_required
 def get_audit_logs():
-    """Get admin audit logs."""
-    page = request.args.get("page", 1, type=int)
-    per_page = request.args.get("per_page", 50, type=int)
+    """
+    Get admin audit logs, newest first, with cursor pagination.
+
+    Filters: admin_id, action, entity_type, entity_id, from/to (YYYY-MM-DD).
+    Paging: limit (max 100) and the next_cursor of the previous page.
+    """
+    limit = clamp_limit(request.args.get("limit", 50, type=int), default=50)
+    cursor = request.args.get("cursor")
     admin_id = request.args.get("admin_id", type=int)
     action = request.args.get("action")
+    entity_type = request.args.get("entity_type")
+    entity_id = request.args.get("entity_id", type=int)
+
+    try:
+        date_from = _parse_day(request.args.get("from"))
+        date_to = _parse_day(request.args.get("to"))
+    except ValueError:
+        return jsonify({"error": "from and to must be YYYY-MM-DD"}), 400
 
     query = AuditLog.query
 
@@ -754,10 +745,26 @@ def get_audit_logs():
         query = query.filter_by(admin_id=admin_id)
     if action:
         query = query.filter_by(action=action)
+    if entity_type:
+        query = query.filter_by(entity_type=entity_type)
+    if entity_id is not None:
+        query = query.filter_by(entity_id=entity_id)
+    if date_from:
+        query = query.filter(AuditLog.created_at >= date_from)
+    if date_to:
+        query = query.filter(AuditLog.created_at < date_to + timedelta(days=1))
 
-    pagination = query.order_by(AuditLog.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    try:
+        logs, next_cursor = keyset_page(
+            query,
+            [AuditLog.created_at, AuditLog.id],
+            [datetime, int],
+            cursor,
+            limit,
+            descending=True,
+        )
+    except InvalidCursor:
+        return jsonify({"error": "Invalid cursor"}), 400
 
     return jsonify({
         "logs": [
@@ -767,19 +774,80 @@ def get_audit_logs():
                 "action": log.action,
                 "entity_type": log.entity_type,
                 "entity_id": log.entity_id,
+                "old_values": from_json(log.old_values),
+                "new_values": from_json(log.new_values),
+                "ip_address": log.ip_address,
                 "created_at": log.created_at.isoformat(),
             }
-            for log in pagination.items
+            for log in logs
         ],
-        "total": pagination.total,
-        "page": pagination.page,
-        "per_page": pagination.per_page,
-        "pages": pagination.pages,
+        "next_cursor": next_cursor,
+        "limit": limit,
+    }), 200
+
+
+@admin_bp.route("/cache/stats", methods=["GET"])
+@admin_required
+def get_cache_stats():
+    """Get response cache hit/miss counters for this worker."""
+    return jsonify({"cache": response_cache.stats()}), 200
+
+
+@admin_bp.route("/analytics/ingestion", methods=["GET"])
+@admin_required
+def get_analytics_ingestion_stats():
+    """Get analytics queue and write counters for this worker."""
+    return jsonify({"ingestion": analytics_pipeline.stats()}), 200
+
+
+@admin_bp.route("/metrics", methods=["GET"])
+@admin_required
+def get_metrics():
+    """Get rolled-up platform metrics per day, week or month."""
+    period = request.args.get("period", "day")
+    try:
+        end = datetime.strptime(
+            request.args.get("end", datetime.utcnow().date().isoformat()), "%Y-%m-%d"
+        ).date()
+        start = datetime.strptime(
+            request.args.get("start", (end - timedelta(days=29)).isoformat()), "%Y-%m-%d"
+        ).date()
+    except ValueError:
+        return jsonify({"error": "start and end must be YYYY-MM-DD"}), 400
+
+    try:
+        series = metrics_rollup.series(period, start, end)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({
+        "period": period,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "metrics": series,
     }), 200
 
 
+@admin_bp.route("/metrics/rollup", methods=["POST"])
+@admin_required
+def run_metrics_rollup():
+    """Bring DailyMetrics up to date, optionally backfilling a date range first."""
+    data = request.get_json(silent=True) or {}
+    backfilled = 0
+    if data.get("backfill_from"):
+        try:
+            start = datetime.strptime(data["backfill_from"], "%Y-%m-%d").date()
+            end = datetime.strptime(
+                data.get("backfill_to") or datetime.utcnow().date().isoformat(), "%Y-%m-%d"
+            ).date()
+        except ValueError:
+            return jsonify({"error": "backfill dates must be YYYY-MM-DD"}), 400
+        backfilled = metrics_rollup.backfill(start, end)
+
+    return jsonify({"backfilled_days": backfilled, "recomputed_days": metrics_rollup.run()}), 200
+
+
 @admin_bp.route("/settings", methods=["GET"])
-@jwt_required()
 @admin_required
 def get_settings():
     """Get system settings."""
@@ -791,7 +859,6 @@ def get_settings():
 
 
 @admin_bp.route("/settings", methods=["POST"])
-@jwt_required()
 @admin_required
 def update_settings():
     """Update system settings."""
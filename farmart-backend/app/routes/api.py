@@ -3,52 +3,147 @@ Public API Routes
 Provides public endpoints for livestock listings and orders
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload, selectinload
 from app.models import Livestock, Order, User, Vaccination
 from app import db
+from app.services.search_index import livestock_search
+from app.services.listing_events import listing_changed, listing_tag, LISTINGS_TAG
+from app.utils.cache import response_cache
+from app.utils.conditional import conditional, aggregate_validator, make_etag, request_args_part
+from app.utils.dataloader import loader_for
+from app.utils.pagination import (
+    clamp_limit,
+    keyset_page,
+    encode_cursor,
+    decode_cursor,
+    InvalidCursor,
+)
+from app.services.geo_search import nearby, locate_listings
+from app.services.analytics import analytics_pipeline, build_event, InvalidEvent
+from app.services.order_lists import order_list_query, order_row
 from datetime import datetime
 
 # Create a new blueprint with /api prefix
 api_bp = Blueprint("api", __name__, url_prefix="/api")
 
 
+def _farmer_summary(farmer):
+    if not farmer:
+        return None
+    return {
+        "id": farmer.id,
+        "first_name": farmer.first_name,
+        "last_name": farmer.last_name,
+        "farm_name": getattr(farmer, "farm_name", None),
+    }
+
+
+def _nearby_page(query, lat, lng, radius_km, cursor, limit):
+    """
+    One page of listings ordered by distance, keyset-paginated on
+    (distance, id). Returns (items, next_cursor, {id: distance_km}).
+    """
+    ids, distances = nearby(query, lat, lng, radius_km)
+
+    if cursor:
+        after_distance, after_id = decode_cursor(cursor, [float, int])
+        keep = (distances > after_distance) | (
+            (distances == after_distance) & (ids > after_id)
+        )
+        ids, distances = ids[keep], distances[keep]
+
+    next_cursor = None
+    if len(ids) > limit:
+        next_cursor = encode_cursor([float(distances[limit - 1]), int(ids[limit - 1])])
+    ids, distances = ids[:limit].tolist(), distances[:limit].tolist()
+
+    rows = {item.id: item for item in Livestock.query.filter(Livestock.id.in_(ids))} if ids else {}
+    items = [rows[i] for i in ids if i in rows]
+    return items, next_cursor, dict(zip(ids, distances))
+
+
 @api_bp.route("/livestock", methods=["GET"])
+@response_cache.cached(tags=lambda: [LISTINGS_TAG])
 def get_livestock():
     """
-    Get all available livestock for sale.
+    Get available livestock for sale, one page at a time.
     Public endpoint for the marketplace.
+
+    Uses keyset pagination: pass the returned `next_cursor` back as
+    `cursor` to fetch the following page. `limit` is capped at
+    MAX_PAGE_SIZE.
+
+    With `lat` and `lng` the feed switches to proximity mode: only
+    listings within `radiusKm` (default 25) are returned, nearest first,
+    each with a `distance_km`.
     """
     # Get query parameters for filtering
+    q = request.args.get("q")
     species = request.args.get("species")
     min_price = request.args.get("minPrice", type=float)
     max_price = request.args.get("maxPrice", type=float)
     location = request.args.get("location")
     sort_by = request.args.get("sortBy", "newest")
+    cursor = request.args.get("cursor")
+    limit = clamp_limit(request.args.get("limit", type=int))
+    lat = request.args.get("lat", type=float)
+    lng = request.args.get("lng", type=float)
+    radius_km = request.args.get("radiusKm", 25, type=float)
 
     # Filter by is_available = True
     query = Livestock.query.filter_by(is_available=True)
 
+    # Text filters are answered by the search index, not ILIKE scans
+    text_filters = []
+    if q:
+        text_filters.append({livestock_id for livestock_id, _ in livestock_search.search(q)})
     if species:
-        query = query.filter(Livestock.animal_type.ilike(f"%{species}%"))
+        text_filters.append(livestock_search.match_field("animal_type", species))
+    if location:
+        text_filters.append(livestock_search.match_field("location", location))
+    if text_filters:
+        ids = set.intersection(*text_filters)
+        if not ids:
+            return jsonify({"livestock": [], "next_cursor": None, "limit": limit}), 200
+        query = query.filter(Livestock.id.in_(list(ids)))
+
     if min_price:
         query = query.filter(Livestock.price >= min_price)
     if max_price:
         query = query.filter(Livestock.price <= max_price)
-    if location:
-        query = query.filter(Livestock.location.ilike(f"%{location}%"))
 
-    # Sort options
+    # Sort options, each with a unique (key, id) tuple for the cursor
     if sort_by == "price-low":
-        query = query.order_by(Livestock.price.asc())
+        columns, types, descending = [Livestock.price, Livestock.id], [float, int], False
     elif sort_by == "price-high":
-        query = query.order_by(Livestock.price.desc())
+        columns, types, descending = [Livestock.price, Livestock.id], [float, int], True
     else:
-        query = query.order_by(Livestock.created_at.desc())
+        columns, types, descending = (
+            [Livestock.created_at, Livestock.id],
+            [datetime, int],
+            True,
+        )
+
+    distances = {}
+    try:
+        if lat is not None and lng is not None:
+            livestock, next_cursor, distances = _nearby_page(
+                query, lat, lng, radius_km, cursor, limit
+            )
+        else:
+            livestock, next_cursor = keyset_page(
+                query, columns, types, cursor, limit, descending=descending
+            )
+    except InvalidCursor:
+        return jsonify({"error": "Invalid cursor"}), 400
 
-    livestock = query.all()
+    # One IN query for every farmer on the page instead of one per row
+    farmers = loader_for(User).load_many(item.farmer_id for item in livestock)
 
-    return jsonify([
+    items = [
         {
             "id": item.id,
             "name": item.animal_type,
@@ -60,26 +155,54 @@ def get_livestock():
             "images": [item.image_url] if item.image_url else [],
             "weight": item.weight,
             "age_months": item.age_months,
-            "farmer": {
-                "id": item.farmer.id,
-                "first_name": item.farmer.first_name,
-                "last_name": item.farmer.last_name,
-                "farm_name": getattr(item.farmer, "farm_name", None),
-            }
-            if item.farmer
-            else None,
+            "farmer": _farmer_summary(farmers.get(item.farmer_id)),
         }
         for item in livestock
-    ]), 200
+    ]
+    for entry in items:
+        if entry["id"] in distances:
+            entry["distance_km"] = round(distances[entry["id"]], 2)
+
+    return jsonify({
+        "livestock": items,
+        "next_cursor": next_cursor,
+        "limit": limit,
+    }), 200
+
+
+def _livestock_detail_validator(id):
+    """ETag/Last-Modified for a listing, its seller and its vaccinations."""
+    row = (
+        db.session
+        .query(Livestock.updated_at, User.updated_at, func.count(Vaccination.id))
+        .join(User, Livestock.farmer_id == User.id)
+        .outerjoin(Vaccination, Vaccination.livestock_id == Livestock.id)
+        .filter(Livestock.id == id, Livestock.is_available.is_(True))
+        .group_by(Livestock.id, User.id)
+        .first()
+    )
+    if not row:
+        return None
+    timestamps = [t for t in row[:2] if t is not None]
+    return make_etag(id, *row), max(timestamps) if timestamps else None
 
 
 @api_bp.route("/livestock/<int:id>", methods=["GET"])
+@conditional(
+    response_cache.cached_validator(lambda id: [listing_tag(id)], _livestock_detail_validator)
+)
+@response_cache.cached(tags=lambda id: [listing_tag(id)])
 def get_livestock_by_id(id):
     """
     Get a specific livestock by ID.
     Public endpoint for animal details page.
     """
-    livestock = Livestock.query.filter_by(id=id, is_available=True).first()
+    livestock = (
+        Livestock.query
+        .options(joinedload(Livestock.farmer), selectinload(Livestock.vaccinations))
+        .filter_by(id=id, is_available=True)
+        .first()
+    )
 
     if not livestock:
         return jsonify({"error": "Livestock not found"}), 404
@@ -153,6 +276,7 @@ def create_livestock():
             health_certified=data.get("health_certified", False),
         )
 
+        locate_listings([livestock], current_user_id)
         db.session.add(livestock)
         db.session.flush()  # Get the livestock ID
 
@@ -186,6 +310,7 @@ def create_livestock():
                 db.session.add(vaccination)
 
         db.session.commit()
+        listing_changed(livestock.id)
 
         return jsonify({
             "message": "Livestock created successfully",
@@ -197,35 +322,76 @@ def create_livestock():
         return jsonify({"error": str(e)}), 500
 
 
+def _my_orders_validator():
+    current_user_id = get_jwt_identity()
+    query = (
+        Order.query
+        .outerjoin(Livestock, Order.livestock_id == Livestock.id)
+        .filter(Order.buyer_id == current_user_id)
+    )
+    return aggregate_validator(
+        query, [Order.updated_at, Livestock.updated_at], current_user_id, request_args_part()
+    )
+
+
 @api_bp.route("/orders/my_orders", methods=["GET"])
 @jwt_required()
+@conditional(_my_orders_validator)
 def get_my_orders():
     """
-    Get current user's orders.
+    Get current user's orders, newest first, with cursor pagination.
+
+    Paging: limit (max 100) and the next_cursor of the previous page.
     """
     current_user_id = get_jwt_identity()
+    limit = clamp_limit(request.args.get("limit", type=int))
 
-    orders = (
-        Order.query
-        .filter_by(buyer_id=current_user_id)
-        .order_by(Order.created_at.desc())
-        .all()
-    )
+    try:
+        rows, next_cursor = keyset_page(
+            order_list_query(current_user_id),
+            [Order.created_at, Order.id],
+            [datetime, int],
+            request.args.get("cursor"),
+            limit,
+            descending=True,
+        )
+    except InvalidCursor:
+        return jsonify({"error": "Invalid cursor"}), 400
 
-    return jsonify([
-        {
-            "id": order.id,
-            "order_number": order.order_number,
-            "livestock": {
-                "id": order.livestock.id,
-                "name": order.livestock.animal_type,
-                "species": order.livestock.animal_type,
-            }
-            if order.livestock
-            else None,
-            "total_amount": float(order.total_amount),
-            "status": order.status,
-            "created_at": order.created_at.isoformat() if order.created_at else None,
-        }
-        for order in orders
-    ]), 200
+    return jsonify({
+        "orders": [order_row(row) for row in rows],
+        "next_cursor": next_cursor,
+        "limit": limit,
+    }), 200
+
+
+@api_bp.route("/analytics/events", methods=["POST"])
+@jwt_required(optional=True)
+def ingest_analytics_events():
+    """
+    Beacon endpoint for frontend analytics.
+
+    Accepts {"events": [...]} or a bare list. The body is parsed whatever
+    its content type, since navigator.sendBeacon posts text/plain. Events
+    are queued and written in batches; the response never waits on the
+    database.
+    """
+    payload = request.get_json(force=True, silent=True)
+    events = payload.get("events") if isinstance(payload, dict) else payload
+    if not isinstance(events, list) or not events:
+        return jsonify({"error": "Expected a non-empty list of events"}), 400
+    if len(events) > current_app.config["ANALYTICS_MAX_BEACON_EVENTS"]:
+        return jsonify({"error": "Too many events in one batch"}), 413
+
+    user_id = get_jwt_identity()
+    user_agent = request.user_agent.string
+    try:
+        rows = [
+            build_event(event, user_id=user_id, ip_address=request.remote_addr, user_agent=user_agent)
+            for event in events
+        ]
+    except InvalidEvent as e:
+        return jsonify({"error": str(e)}), 400
+
+    queued, overflowed = analytics_pipeline.enqueue(rows)
+    return jsonify({"queued": queued, "overflowed": overflowed}), 202
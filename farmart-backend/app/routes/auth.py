@@ -7,8 +7,8 @@ from flask import Blueprint, request, make_response
 from flask_restful import Api, Resource
 from flask_jwt_extended import (
     create_access_token,
-    create_refresh_token,
     jwt_required,
+    get_jwt,
     get_jwt_identity,
     set_access_cookies,
     set_refresh_cookies,
@@ -18,7 +18,11 @@ from marshmallow import ValidationError
 from app import db
 from app.models import User
 from app.schemas import user_register_schema, user_login_schema, user_schema
-from app.extensions import limiter
+from app.utils.rate_limit import limiter
+from app.services.geo_search import sync_farmer_listings
+from app.services.listing_events import listing_changed
+from app.services.access_control import TOKEN_VERSION_CLAIM
+from app.services.password_hasher import HasherBusy
 
 import re  # For XSS prevention
 import logging
@@ -44,9 +48,7 @@ def ratelimit_handler(e):
 class AuthRegister(Resource):
     """Resource for user registration."""
 
-    method_decorators = []
-    if limiter:
-        method_decorators = [limiter.limit("5 per minute")]
+    method_decorators = [limiter.limit("5 per minute")]
 
     def strip_html_tags(self, text):
         """Strip HTML/script tags to prevent Stored XSS attacks."""
@@ -100,8 +102,9 @@ class AuthRegister(Resource):
             db.session.add(user)
             db.session.commit()
 
-            access_token = create_access_token(identity=user.id)
-            refresh_token = create_refresh_token(identity=user.id)
+            tokens = user.get_tokens()
+            access_token = tokens["access_token"]
+            refresh_token = tokens["refresh_token"]
 
             # Set JWT tokens as HttpOnly, Secure cookies
             response = make_response(
@@ -115,6 +118,9 @@ class AuthRegister(Resource):
             set_refresh_cookies(response, refresh_token)
 
             return response
+        except HasherBusy as e:
+            db.session.rollback()
+            return {"error": str(e)}, 429, {"Retry-After": "1"}
         except Exception as e:
             db.session.rollback()
             return {"error": "Database error occurred", "details": str(e)}, 500
@@ -123,9 +129,7 @@ class AuthRegister(Resource):
 class AuthLogin(Resource):
     """Resource for user login."""
 
-    method_decorators = []
-    if limiter:
-        method_decorators = [limiter.limit("5 per minute")]
+    method_decorators = [limiter.limit("5 per minute")]
 
     def post(self):
         """Login user and return JWT tokens via secure cookies."""
@@ -139,14 +143,22 @@ class AuthLogin(Resource):
         user = User.query.filter_by(email=data["email"]).first()
 
         # Prevent user enumeration
-        if not user or not user.check_password(data["password"]):
-            return {"error": "Invalid email or password"}, 401
+        try:
+            if not user or not user.check_password(data["password"]):
+                return {"error": "Invalid email or password"}, 401
+        except HasherBusy as e:
+            return {"error": str(e)}, 429, {"Retry-After": "1"}
+
+        if db.session.is_modified(user):
+            # check_password upgraded an outdated hash
+            db.session.commit()
 
         if not user.is_verified:
             return {"error": "Please verify your email first"}, 403
 
-        access_token = create_access_token(identity=user.id)
-        refresh_token = create_refresh_token(identity=user.id)
+        tokens = user.get_tokens()
+        access_token = tokens["access_token"]
+        refresh_token = tokens["refresh_token"]
 
         response = make_response(
             {
@@ -188,7 +200,14 @@ class AuthRefresh(Resource):
     @jwt_required(refresh=True)
     def post(self):
         current_user_id = get_jwt_identity()
-        access_token = create_access_token(identity=current_user_id)
+        # Role and token version ride along from the refresh token
+        claims = get_jwt()
+        access_token = create_access_token(
+            identity=current_user_id,
+            additional_claims={
+                key: claims[key] for key in ("role", TOKEN_VERSION_CLAIM) if key in claims
+            },
+        )
         return {"access_token": access_token}, 200
 
 
@@ -209,9 +228,7 @@ class AuthMe(Resource):
 class AuthProfile(Resource):
     """Resource for updating user profile."""
 
-    method_decorators = []
-    if limiter:
-        method_decorators = [limiter.limit("10 per minute")]
+    method_decorators = [limiter.limit("10 per minute")]
 
     @jwt_required()
     def patch(self):
@@ -287,7 +304,27 @@ class AuthProfile(Resource):
                 if user.profile:
                     setattr(user.profile, field, data[field])
 
+        # Coordinates live on the profile; a farmer's listings carry a copy
+        # for proximity search and are re-stamped in one UPDATE
+        moved_listings = []
+        if user.profile and ("latitude" in data or "longitude" in data):
+            try:
+                for field in ("latitude", "longitude"):
+                    if field in data:
+                        value = data[field]
+                        setattr(
+                            user.profile,
+                            field,
+                            float(value) if value not in (None, "") else None,
+                        )
+            except (TypeError, ValueError):
+                return {"error": "latitude and longitude must be numbers"}, 400
+            if user.role == "farmer":
+                moved_listings = sync_farmer_listings(user.id)
+
         db.session.commit()
+        if moved_listings:
+            listing_changed(*moved_listings)
         logger.info("[SUCCESS] Profile updated successfully")
 
         return {
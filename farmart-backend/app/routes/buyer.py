@@ -3,9 +3,10 @@ Buyer Routes
 Search/Filter, Cart, Order placement
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import func, or_
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload, selectinload
 from datetime import datetime
 from app.models import (
     User,
@@ -13,49 +14,95 @@ from app.models import (
     UserAddress,
     Order,
     Payment,
-    LivestockStatus,
     OrderStatus,
 )
 from app import db
 from app.services.escrow_manager import EscrowManager
+from app.services.search_index import livestock_search
+from app.services.view_counter import view_counter
+from app.services.cart_store import cart_store, CartFull
+from app.services.commission import commission_engine
+from app.services.reservations import claim_listing, claim_listings, release_listings
+from app.services.facets import FACETS, facet_counts, facet_snapshot
+from app.services.listing_columns import listing_columns
+from app.services.listing_events import listing_changed, LISTINGS_TAG
+from app.services.order_lists import order_list_query, order_page
+from app.utils.cache import response_cache
+from app.utils.order_numbers import order_numbers
+from app.utils.conditional import conditional, aggregate_validator, request_args_part
 
 buyer_bp = Blueprint("buyer", __name__)
 
 
-@buyer_bp.route("/search", methods=["GET"])
-def search_livestock():
-    """Search and filter livestock listings."""
-    q = request.args.get("q", "")
-    species = request.args.get("species")
-    breed = request.args.get("breed")
-    gender = request.args.get("gender")
-    min_price = request.args.get("min_price", type=float)
-    max_price = request.args.get("max_price", type=float)
-    min_weight = request.args.get("min_weight", type=float)
-    max_weight = request.args.get("max_weight", type=float)
-    health_status = request.args.get("health_status")
-    sort = request.args.get("sort", "created_at")
-    order_dir = request.args.get("order", "desc")
-    page = request.args.get("page", 1, type=int)
-    per_page = request.args.get("per_page", 12, type=int)
+SEARCH_SORT_COLUMNS = {
+    "created_at": Livestock.created_at,
+    "price": Livestock.price,
+    "weight": Livestock.weight,
+    "age_months": Livestock.age_months,
+}
+
+# Cap on ranked candidates fed back into SQL as an id filter
+SEARCH_MAX_CANDIDATES = 1000
 
-    query = Livestock.query.filter_by(status=LivestockStatus.AVAILABLE)
 
+SEARCH_FILTER_ARGS = (
+    "q", "species", "breed", "gender", "min_price", "max_price",
+    "min_weight", "max_weight", "min_age", "max_age", "health_certified",
+)
+
+# Filters the columnar snapshot cannot answer; any of them forces SQL
+COLUMNAR_UNSUPPORTED_ARGS = ("q", "breed", "gender", "health_certified")
+
+
+def _empty_search_page(page, per_page, with_facets=False):
+    body = {
+        "livestock": [],
+        "total": 0,
+        "page": page,
+        "per_page": per_page,
+        "pages": 0,
+    }
+    if with_facets:
+        body["facets"] = {facet: [] for facet in FACETS}
+    return jsonify(body), 200
+
+
+def _search_query(args):
+    """
+    Build the filtered search query from request args.
+
+    Returns:
+        (query, rank) where rank maps id -> relevance position when `q` is
+        given, or (None, None) when the index already proves no match
+    """
+    q = args.get("q", "")
+    prefix = args.get("prefix", "true").lower() != "false"
+    gender = args.get("gender")
+    min_price = args.get("min_price", type=float)
+    max_price = args.get("max_price", type=float)
+    min_weight = args.get("min_weight", type=float)
+    max_weight = args.get("max_weight", type=float)
+    min_age = args.get("min_age", type=int)
+    max_age = args.get("max_age", type=int)
+    health_certified = args.get("health_certified")
+
+    query = Livestock.query.filter_by(is_available=True)
+
+    rank = None
     if q:
-        search_term = f"%{q}%"
-        query = query.filter(
-            or_(
-                Livestock.name.ilike(search_term),
-                Livestock.species.ilike(search_term),
-                Livestock.breed.ilike(search_term),
-                Livestock.description.ilike(search_term),
-            )
-        )
+        ranked = livestock_search.search(q, prefix=prefix, limit=SEARCH_MAX_CANDIDATES)
+        if not ranked:
+            return None, None
+        rank = {livestock_id: i for i, (livestock_id, _) in enumerate(ranked)}
+        query = query.filter(Livestock.id.in_(list(rank)))
+
+    for field, value in (("animal_type", args.get("species")), ("breed", args.get("breed"))):
+        if value:
+            ids = livestock_search.match_field(field, value, prefix=field == "breed")
+            if not ids:
+                return None, None
+            query = query.filter(Livestock.id.in_(list(ids)))
 
-    if species:
-        query = query.filter(Livestock.species == species)
-    if breed:
-        query = query.filter(Livestock.breed.ilike(f"%{breed}%"))
     if gender:
         query = query.filter(Livestock.gender == gender)
     if min_price:
@@ -63,46 +110,158 @@ def search_livestock():
     if max_price:
         query = query.filter(Livestock.price <= max_price)
     if min_weight:
-        query = query.filter(Livestock.weight_kg >= min_weight)
+        query = query.filter(Livestock.weight >= min_weight)
     if max_weight:
-        query = query.filter(Livestock.weight_kg <= max_weight)
-    if health_status:
-        query = query.filter(Livestock.health_status == health_status)
+        query = query.filter(Livestock.weight <= max_weight)
+    if min_age is not None:
+        query = query.filter(Livestock.age_months >= min_age)
+    if max_age is not None:
+        query = query.filter(Livestock.age_months <= max_age)
+    if health_certified is not None:
+        query = query.filter(
+            Livestock.health_certified.is_(health_certified.lower() == "true")
+        )
 
-    sort_column = getattr(Livestock, sort, Livestock.created_at)
-    if order_dir == "desc":
-        query = query.order_by(sort_column.desc())
-    else:
-        query = query.order_by(sort_column.asc())
+    return query, rank
+
+
+def _columnar_search(sort, order_dir, page, per_page):
+    """Range-filtered search answered from the NumPy snapshot."""
+    args = request.args
+    ranges = {
+        "price": (args.get("min_price", type=float), args.get("max_price", type=float)),
+        "weight": (args.get("min_weight", type=float), args.get("max_weight", type=float)),
+        "age_months": (args.get("min_age", type=int), args.get("max_age", type=int)),
+    }
+    ids, total = listing_columns.select(
+        ranges=ranges,
+        species=args.get("species"),
+        sort=sort if sort in SEARCH_SORT_COLUMNS else "created_at",
+        descending=order_dir == "desc",
+        offset=(page - 1) * per_page,
+        limit=per_page,
+    )
 
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    # Hydrate just the page, keeping the snapshot's order
+    rows = {item.id: item for item in Livestock.query.filter(Livestock.id.in_(ids))} if ids else {}
+    items = [rows[i] for i in ids if i in rows]
 
     return jsonify({
-        "livestock": [item.to_dict() for item in pagination.items],
-        "total": pagination.total,
-        "page": pagination.page,
-        "per_page": pagination.per_page,
-        "pages": pagination.pages,
+        "livestock": [item.to_dict() for item in items],
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "pages": (total + per_page - 1) // per_page,
     }), 200
 
 
+@buyer_bp.route("/search", methods=["GET"])
+def search_livestock():
+    """
+    Search and filter livestock listings.
+
+    Free text (`q`) and the species/breed filters are answered by the
+    inverted index in app.services.search_index; numeric filters run in
+    SQL. With `q` the default sort is BM25 relevance. When
+    LISTING_COLUMNS_ENABLED is set, pure range/species searches are answered
+    from the columnar snapshot in app.services.listing_columns instead.
+
+    With `facets=true` the response also carries species/breed/location/
+    gender/price band/weight band counts for the matching set. Unfiltered
+    counts come from the in-memory facet snapshot; filtered counts from a
+    single aggregation query.
+    """
+    q = request.args.get("q", "")
+    with_facets = request.args.get("facets", "false").lower() == "true"
+    sort = request.args.get("sort", "relevance" if q else "created_at")
+    order_dir = request.args.get("order", "desc")
+    page = request.args.get("page", 1, type=int)
+    per_page = min(request.args.get("per_page", 12, type=int), 100)
+
+    if (
+        current_app.config["LISTING_COLUMNS_ENABLED"]
+        and not with_facets
+        and not any(request.args.get(name) for name in COLUMNAR_UNSUPPORTED_ARGS)
+    ):
+        return _columnar_search(sort, order_dir, page, per_page)
+
+    query, rank = _search_query(request.args)
+    if query is None:
+        return _empty_search_page(page, per_page, with_facets)
+
+    facets = None
+    if with_facets:
+        if any(request.args.get(name) for name in SEARCH_FILTER_ARGS):
+            facets = facet_counts(query)
+        else:
+            facets = facet_snapshot.counts()
+
+    if sort == "relevance" and rank is not None:
+        # Filter in SQL (ids only), order by rank here, hydrate one page
+        matching = [row.id for row in query.with_entities(Livestock.id)]
+        matching.sort(key=rank.__getitem__)
+        total = len(matching)
+        page_ids = matching[(page - 1) * per_page: page * per_page]
+        rows = Livestock.query.filter(Livestock.id.in_(page_ids)).all() if page_ids else []
+        items = sorted(rows, key=lambda item: rank[item.id])
+        pages = (total + per_page - 1) // per_page
+    else:
+        sort_column = SEARCH_SORT_COLUMNS.get(sort, Livestock.created_at)
+        if order_dir == "desc":
+            query = query.order_by(sort_column.desc(), Livestock.id.desc())
+        else:
+            query = query.order_by(sort_column.asc(), Livestock.id.asc())
+
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        items, total, pages = pagination.items, pagination.total, pagination.pages
+
+    body = {
+        "livestock": [item.to_dict() for item in items],
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "pages": pages,
+    }
+    if facets is not None:
+        body["facets"] = facets
+    return jsonify(body), 200
+
+
 @buyer_bp.route("/livestock/<int:livestock_id>", methods=["GET"])
+@jwt_required(optional=True)
 def get_livestock_detail(livestock_id):
-    """Get detailed livestock information."""
-    livestock = Livestock.query.filter_by(
-        id=livestock_id, status=LivestockStatus.AVAILABLE
-    ).first()
+    """
+    Get detailed livestock information.
+
+    The view is counted by app.services.view_counter and written later in
+    a batch, so this stays a read-only request.
+    """
+    livestock = (
+        Livestock.query
+        .options(
+            joinedload(Livestock.farmer).joinedload(User.profile),
+            selectinload(Livestock.vaccinations),
+        )
+        .filter_by(id=livestock_id, is_available=True)
+        .first()
+    )
 
     if not livestock:
         return jsonify({"error": "Livestock not found or not available"}), 404
 
-    livestock.view_count += 1
-    db.session.commit()
+    view_counter.record(
+        livestock.id,
+        user_id=get_jwt_identity(),
+        ip_address=request.remote_addr,
+        user_agent=request.user_agent.string,
+    )
 
-    farmer = User.query.get(livestock.farmer_id)
+    farmer = livestock.farmer
+    listing = livestock.to_dict()
+    listing["view_count"] = livestock.view_count + view_counter.pending(livestock.id)
 
     return jsonify({
-        "livestock": livestock.to_dict(),
+        "livestock": listing,
         "farmer": {
             "id": farmer.id,
             "first_name": farmer.first_name,
@@ -111,71 +270,29 @@ def get_livestock_detail(livestock_id):
             "rating": farmer.profile.rating if farmer.profile else None,
             "total_sales": farmer.profile.total_sales if farmer.profile else 0,
         },
-        "health_records": [
-            {
-                "id": hr.id,
-                "record_type": hr.record_type,
-                "record_date": hr.record_date.isoformat() if hr.record_date else None,
-                "description": hr.description,
-                "veterinarian_name": hr.veterinarian_name,
-            }
-            for hr in livestock.health_records
-        ],
+        "health_records": [v.to_dict() for v in livestock.vaccinations],
     }), 200
 
 
 @buyer_bp.route("/species", methods=["GET"])
+@response_cache.cached(tags=lambda: [LISTINGS_TAG])
 def get_species():
     """Get all available species and their counts."""
-    species_counts = (
-        db.session
-        .query(Livestock.species, func.count(Livestock.id))
-        .filter_by(status=LivestockStatus.AVAILABLE)
-        .group_by(Livestock.species)
-        .all()
-    )
+    species_counts = facet_snapshot.counts()["species"]
 
     return jsonify({
         "species": [
-            {"name": species, "count": count} for species, count in species_counts
+            {"name": item["value"], "count": item["count"]} for item in species_counts
         ]
     }), 200
 
 
-# In-memory cart for demo (use Redis/database in production)
-cart = {}
-
-
 @buyer_bp.route("/cart", methods=["GET"])
 @jwt_required()
 def get_cart():
-    """Get current user's cart."""
+    """Get current user's cart, priced from current listings."""
     current_user_id = get_jwt_identity()
-    user_cart = cart.get(current_user_id, [])
-
-    cart_items = []
-    total = 0
-
-    for item in user_cart:
-        livestock = Livestock.query.get(item["livestock_id"])
-        if livestock:
-            item_total = float(livestock.price) * item["quantity"]
-            total += item_total
-            cart_items.append({
-                "livestock_id": livestock.id,
-                "name": livestock.name,
-                "species": livestock.species,
-                "price": float(livestock.price),
-                "quantity": item["quantity"],
-                "total": item_total,
-                "image": livestock.images[0].image_url if livestock.images else None,
-            })
-
-    return jsonify({
-        "items": cart_items,
-        "total": total,
-        "item_count": len(cart_items),
-    }), 200
+    return jsonify(cart_store.priced(current_user_id)), 200
 
 
 @buyer_bp.route("/cart/add", methods=["POST"])
@@ -190,30 +307,24 @@ def add_to_cart():
 
     if not livestock_id:
         return jsonify({"error": "Livestock ID is required"}), 400
+    if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 1:
+        return jsonify({"error": "quantity must be a positive integer"}), 400
 
-    livestock = Livestock.query.get(livestock_id)
+    livestock = db.session.get(Livestock, livestock_id)
     if not livestock:
         return jsonify({"error": "Livestock not found"}), 404
 
-    if livestock.status != LivestockStatus.AVAILABLE:
+    if not livestock.is_available:
         return jsonify({"error": "Livestock is not available"}), 400
 
-    if current_user_id not in cart:
-        cart[current_user_id] = []
-
-    for item in cart[current_user_id]:
-        if item["livestock_id"] == livestock_id:
-            item["quantity"] += quantity
-            break
-    else:
-        cart[current_user_id].append({
-            "livestock_id": livestock_id,
-            "quantity": quantity,
-        })
+    try:
+        cart_count = cart_store.add(current_user_id, livestock.id, quantity)
+    except CartFull as e:
+        return jsonify({"error": str(e)}), 400
 
     return jsonify({
         "message": "Added to cart",
-        "cart_count": len(cart[current_user_id]),
+        "cart_count": cart_count,
     }), 200
 
 
@@ -229,16 +340,9 @@ def remove_from_cart():
     if not livestock_id:
         return jsonify({"error": "Livestock ID is required"}), 400
 
-    if current_user_id in cart:
-        cart[current_user_id] = [
-            item
-            for item in cart[current_user_id]
-            if item["livestock_id"] != livestock_id
-        ]
-
     return jsonify({
         "message": "Removed from cart",
-        "cart_count": len(cart.get(current_user_id, [])),
+        "cart_count": cart_store.remove(current_user_id, livestock_id),
     }), 200
 
 
@@ -247,7 +351,7 @@ def remove_from_cart():
 def clear_cart():
     """Clear user's cart."""
     current_user_id = get_jwt_identity()
-    cart[current_user_id] = []
+    cart_store.clear(current_user_id)
 
     return jsonify({"message": "Cart cleared"}), 200
 
@@ -335,7 +439,12 @@ def delete_address(address_id):
 @buyer_bp.route("/orders", methods=["POST"])
 @jwt_required()
 def place_order():
-    """Place a new order."""
+    """
+    Place a new order.
+
+    The listing is claimed with a conditional UPDATE, so of several buyers
+    racing for the same animal exactly one gets it; the rest get 409.
+    """
     current_user_id = get_jwt_identity()
     data = request.get_json()
 
@@ -344,13 +453,6 @@ def place_order():
         if not data.get(field):
             return jsonify({"error": f"Missing required field: {field}"}), 400
 
-    livestock = Livestock.query.get(data["livestock_id"])
-    if not livestock:
-        return jsonify({"error": "Livestock not found"}), 404
-
-    if livestock.status != LivestockStatus.AVAILABLE:
-        return jsonify({"error": "Livestock is not available"}), 400
-
     address = UserAddress.query.filter_by(
         id=data["address_id"], user_id=current_user_id
     ).first()
@@ -358,31 +460,34 @@ def place_order():
     if not address:
         return jsonify({"error": "Address not found"}), 404
 
-    quantity = data.get("quantity", 1)
-    subtotal = float(livestock.price) * quantity
-    commission_rate = 0.02
-    commission_amount = subtotal * commission_rate
+    listing = claim_listing(data["livestock_id"])
+    if listing is None:
+        db.session.rollback()
+        if db.session.get(Livestock, data["livestock_id"]) is None:
+            return jsonify({"error": "Livestock not found"}), 404
+        return jsonify({"error": "Livestock is not available"}), 409
 
-    order_number = f"ORD-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}-{current_user_id}"
+    quantity = data.get("quantity", 1)
+    subtotal = float(listing.price) * quantity
+    pricing = commission_engine.price(subtotal, listing.animal_type)
 
     order = Order(
-        order_number=order_number,
+        order_number=order_numbers.next(),
         buyer_id=current_user_id,
-        livestock_id=livestock.id,
+        livestock_id=listing.id,
         quantity=quantity,
-        unit_price=livestock.price,
+        unit_price=listing.price,
         subtotal=subtotal,
-        commission_rate=commission_rate,
-        commission_amount=commission_amount,
+        commission_rate=pricing.rate,
+        commission_amount=pricing.commission,
         total_amount=subtotal,
-        shipping_address=f"{address.recipient_name}, {address.street_address}, {address.city}, {address.county}",
+        shipping_address=_shipping_address(address),
         buyer_notes=data.get("buyer_notes"),
     )
 
-    livestock.status = LivestockStatus.RESERVED
-
     db.session.add(order)
     db.session.commit()
+    listing_changed(listing.id)
 
     return jsonify({
         "message": "Order placed successfully",
@@ -391,32 +496,128 @@ def place_order():
     }), 201
 
 
-@buyer_bp.route("/orders", methods=["GET"])
+def _shipping_address(address):
+    return f"{address.recipient_name}, {address.street_address}, {address.city}, {address.county}"
+
+
+@buyer_bp.route("/cart/checkout", methods=["POST"])
 @jwt_required()
-def get_my_orders():
-    """Get current user's orders."""
+def checkout_cart():
+    """
+    Turn the cart (or the listed subset of it) into orders in one transaction.
+
+    Body: { "address_id": 1, "livestock_ids": [optional subset], "buyer_notes": "..." }
+
+    Every listing is claimed with one conditional UPDATE; listings someone
+    else got first are reported and stay in the cart. Orders are inserted
+    together and committed once.
+    """
     current_user_id = get_jwt_identity()
+    data = request.get_json() or {}
+
+    if not data.get("address_id"):
+        return jsonify({"error": "Missing required field: address_id"}), 400
+
+    contents = cart_store.contents(current_user_id)
+    if data.get("livestock_ids") is not None:
+        ids = data["livestock_ids"]
+        if not isinstance(ids, list) or any(
+            not isinstance(i, int) or isinstance(i, bool) for i in ids
+        ):
+            return jsonify({"error": "livestock_ids must be a list of integers"}), 400
+        wanted = set(ids)
+        contents = {key: qty for key, qty in contents.items() if key in wanted}
+    if not contents:
+        return jsonify({"error": "Cart is empty"}), 400
 
-    status = request.args.get("status")
-    page = request.args.get("page", 1, type=int)
-    per_page = request.args.get("per_page", 10, type=int)
+    address = UserAddress.query.filter_by(
+        id=data["address_id"], user_id=current_user_id
+    ).first()
+    if not address:
+        return jsonify({"error": "Address not found"}), 404
+
+    claimed = claim_listings(contents)
+
+    shipping_address = _shipping_address(address)
+    commission = commission_engine.rules()
+    orders, results = [], []
+    for livestock_id, quantity in contents.items():
+        listing = claimed.get(livestock_id)
+        if listing is None:
+            results.append({"livestock_id": livestock_id, "status": "unavailable"})
+            continue
+        subtotal = float(listing.price) * quantity
+        pricing = commission.price(subtotal, listing.animal_type)
+        order = Order(
+            order_number=order_numbers.next(),
+            buyer_id=current_user_id,
+            livestock_id=livestock_id,
+            quantity=quantity,
+            unit_price=listing.price,
+            subtotal=subtotal,
+            commission_rate=pricing.rate,
+            commission_amount=pricing.commission,
+            total_amount=subtotal,
+            shipping_address=shipping_address,
+            buyer_notes=data.get("buyer_notes"),
+        )
+        orders.append(order)
+        results.append({"livestock_id": livestock_id, "status": "ordered", "order": order})
+
+    if not orders:
+        db.session.rollback()
+        return jsonify({"error": "None of the items are available", "items": results}), 409
+
+    # Orders go out in one executemany flush (multi-row INSERT where the
+    # driver supports it), cart rows in one DELETE, then one commit
+    db.session.add_all(orders)
+    cart_store.remove_many(current_user_id, list(claimed))
+    db.session.flush()
+    # Serialise before committing (commit expires every order) with the
+    # listings loaded in one query for order.livestock
+    Livestock.query.filter(Livestock.id.in_(list(claimed))).all()
+    for result in results:
+        if "order" in result:
+            result["order"] = result["order"].to_dict()
+    db.session.commit()
+    listing_changed(*claimed)
 
-    query = Order.query.filter_by(buyer_id=current_user_id)
+    return jsonify({
+        "message": f"{len(orders)} of {len(results)} items ordered",
+        "items": results,
+        "payment_required": sum(float(order.total_amount) for order in orders),
+    }), 201
 
+
+def _buyer_orders_query(buyer_id, status=None):
+    query = Order.query.filter_by(buyer_id=buyer_id)
     if status:
         query = query.filter(Order.status == status)
+    return query
+
 
-    pagination = query.order_by(Order.placed_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
+def _buyer_orders_validator():
+    current_user_id = get_jwt_identity()
+    query = _buyer_orders_query(current_user_id, request.args.get("status")).outerjoin(
+        Livestock, Order.livestock_id == Livestock.id
+    )
+    return aggregate_validator(
+        query, [Order.updated_at, Livestock.updated_at], current_user_id, request_args_part()
     )
 
-    return jsonify({
-        "orders": [order.to_dict() for order in pagination.items],
-        "total": pagination.total,
-        "page": pagination.page,
-        "per_page": pagination.per_page,
-        "pages": pagination.pages,
-    }), 200
+
+@buyer_bp.route("/orders", methods=["GET"])
+@jwt_required()
+@conditional(_buyer_orders_validator)
+def get_my_orders():
+    """Get current user's orders (paginated, slim list rows)."""
+    current_user_id = get_jwt_identity()
+
+    status = request.args.get("status")
+    page = request.args.get("page", 1, type=int)
+    per_page = request.args.get("per_page", 10, type=int)
+
+    return jsonify(order_page(order_list_query(current_user_id, status), page, per_page)), 200
 
 
 @buyer_bp.route("/orders/<int:order_id>", methods=["GET"])
@@ -457,11 +658,10 @@ def cancel_order(order_id):
     order.cancelled_at = datetime.utcnow()
     order.cancellation_reason = request.get_json().get("reason", "Buyer cancelled")
 
-    livestock = Livestock.query.get(order.livestock_id)
-    if livestock:
-        livestock.status = LivestockStatus.AVAILABLE
+    release_listings(order.livestock_id)
 
     db.session.commit()
+    listing_changed(order.livestock_id)
 
     return jsonify({
         "message": "Order cancelled successfully",
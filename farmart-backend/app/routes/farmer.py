@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from app import db
 from app.models import Livestock
+from app.services.listing_events import listing_changed
+from app.services.geo_search import locate_listings
 from app.utils.decorators import farmer_required
 from flask_jwt_extended import get_jwt_identity
 
@@ -22,8 +24,10 @@ def add_livestock():
         location=data["location"]
     )
 
+    locate_listings([animal], farmer_id)
     db.session.add(animal)
     db.session.commit()
+    listing_changed(animal.id)
 
     return jsonify(animal.to_dict()), 201
 
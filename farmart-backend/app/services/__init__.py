@@ -2,8 +2,8 @@
 FarmAT Services Package
 """
 
-from app.services.mpesa_service import MpesaService
+from app.services.mpesa_service import send_stk_push
 from app.services.escrow_manager import EscrowManager
-from app.services.file_handler import FileHandler
+from app.services.file_handler import parse_livestock_csv
 
-__all__ = ["MpesaService", "EscrowManager", "FileHandler"]
+__all__ = ["send_stk_push", "EscrowManager", "parse_livestock_csv"]
@@ -0,0 +1,117 @@
+"""
+Access Control
+Role and account-status checks decided from JWT claims.
+
+Access tokens carry the user's role and token version ("tv"). Each worker
+keeps a small snapshot of the only users whose tokens need checking:
+deactivated users, and users whose token version was bumped within the
+longest token lifetime (a token issued before an older bump has expired
+anyway, so it needs no check). Deactivation and role changes bump the
+version (User.revoke_tokens()). The snapshot is reloaded with one query
+when it is older than ACCESS_CONTROL_SYNC_SECONDS or after this worker
+changes an account (invalidate()). Authenticated requests never look
+the user up.
+
+- a token with an older version than the user's is revoked (401)
+- a deactivated user is refused by the role decorators (403)
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import or_, select
+
+from app import db
+from app.extensions import jwt
+from app.models import User
+
+TOKEN_VERSION_CLAIM = "tv"
+
+
+def token_claims(user):
+    """Additional JWT claims for a user's access and refresh tokens."""
+    return {"role": user.role, TOKEN_VERSION_CLAIM: user.token_version or 0}
+
+
+class _AccessState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.deactivated = frozenset()
+        self.versions = {}  # user_id -> current token version (only if > 0)
+        self.loaded_at = None
+
+
+class AccessControl:
+    """Per-worker snapshot of deactivated users and token versions."""
+
+    def init_app(self, app):
+        # Upper bound on how long another worker's (de)activation takes to
+        # reach this one
+        app.config.setdefault("ACCESS_CONTROL_SYNC_SECONDS", 30)
+        app.extensions["access_control"] = _AccessState()
+        jwt.token_in_blocklist_loader(self._is_revoked)
+
+    @property
+    def _state(self):
+        return current_app.extensions["access_control"]
+
+    def _snapshot(self):
+        state = self._state
+        ttl = current_app.config["ACCESS_CONTROL_SYNC_SECONDS"]
+        with state.lock:
+            if state.loaded_at is None or time.monotonic() - state.loaded_at > ttl:
+                window = _token_lifetime()
+                if window is None:
+                    bumped = User.token_version > 0
+                else:
+                    bumped = User.token_version_changed_at >= datetime.utcnow() - window
+                rows = db.session.execute(
+                    select(User.id, User.is_active, User.token_version).where(
+                        or_(User.is_active.is_(False), bumped)
+                    )
+                ).all()
+                state.deactivated = frozenset(row.id for row in rows if not row.is_active)
+                state.versions = {row.id: row.token_version for row in rows if row.token_version}
+                state.loaded_at = time.monotonic()
+            return state.deactivated, state.versions
+
+    def _is_revoked(self, jwt_header, jwt_payload):
+        _, versions = self._snapshot()
+        current = versions.get(_user_id(jwt_payload["sub"]), 0)
+        return jwt_payload.get(TOKEN_VERSION_CLAIM, 0) < current
+
+    def is_deactivated(self, user_id):
+        deactivated, _ = self._snapshot()
+        return _user_id(user_id) in deactivated
+
+    def invalidate(self):
+        """Reload the snapshot on next use (call after committing a change)."""
+        state = self._state
+        with state.lock:
+            state.loaded_at = None
+
+
+def _token_lifetime():
+    """The longest access/refresh token lifetime, or None if tokens never expire."""
+    lifetimes = []
+    for key in ("JWT_ACCESS_TOKEN_EXPIRES", "JWT_REFRESH_TOKEN_EXPIRES"):
+        lifetime = current_app.config[key]
+        if lifetime is False:
+            return None
+        if not isinstance(lifetime, timedelta):
+            lifetime = timedelta(seconds=lifetime)
+        lifetimes.append(lifetime)
+    return max(lifetimes)
+
+
+def _user_id(identity):
+    try:
+        return int(identity)
+    except (TypeError, ValueError):
+        return identity
+
+
+# exported instance, initialised in create_app
+access_control = AccessControl()
@@ -0,0 +1,326 @@
+"""
+Analytics Ingestion
+Buffered, batched writes of AnalyticsEvent rows.
+
+Events are validated on the request path and put on a bounded in-process
+queue; a background flusher drains it in batched INSERTs (one
+executemany per ANALYTICS_BATCH_SIZE rows, one transaction each). When
+the queue is full (the database is not keeping up) the overflow policy
+applies:
+- "drop": discard the event and count it
+- "spill": append it to a JSON-lines file, replayed by the next flush
+
+The spill file is shared by every worker on the host. A flush claims it
+by renaming it to a name unique to the process, so two workers never
+replay the same events. A spilled event whose batch keeps failing is
+re-spilled with its attempt count; after ANALYTICS_SPILL_MAX_ATTEMPTS
+(or if its line cannot be parsed) it is moved to the dead-letter file.
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import uuid
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import insert
+
+from app import db
+from app.models import AnalyticsEvent
+from app.utils.background import PeriodicFlusher
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = {"page_view", "search", "listing_view", "add_to_cart", "checkout"}
+
+# Every row is normalised to these keys so a batch binds one parameter shape
+EVENT_COLUMNS = (
+    "event_type", "user_id", "session_id", "entity_type", "entity_id",
+    "event_metadata", "ip_address", "user_agent", "created_at",
+)
+
+MAX_METADATA_BYTES = 2048
+
+# Per-line key carrying how many times a spilled event failed to insert
+ATTEMPTS_KEY = "_attempts"
+
+
+class InvalidEvent(ValueError):
+    """Raised when a client-supplied event fails validation."""
+
+
+def _truncate(value, length):
+    if value is None:
+        return None
+    return str(value)[:length]
+
+
+def build_event(data, user_id=None, ip_address=None, user_agent=None):
+    """
+    Validate a client event and turn it into an insertable row.
+
+    Args:
+        data: dict with event_type and optional session_id, entity_type,
+            entity_id, metadata
+        user_id, ip_address, user_agent: taken from the request, never
+            from the payload
+
+    Raises:
+        InvalidEvent: unknown type or malformed fields
+    """
+    if not isinstance(data, dict):
+        raise InvalidEvent("Each event must be an object")
+    event_type = data.get("event_type")
+    if event_type not in EVENT_TYPES:
+        raise InvalidEvent(f"Unknown event_type: {event_type!r}")
+
+    entity_id = data.get("entity_id")
+    if entity_id is not None and (isinstance(entity_id, bool) or not isinstance(entity_id, int)):
+        raise InvalidEvent("entity_id must be an integer")
+
+    metadata = data.get("metadata")
+    if metadata is not None:
+        metadata = json.dumps(metadata, separators=(",", ":"), default=str)
+        if len(metadata) > MAX_METADATA_BYTES:
+            raise InvalidEvent("metadata is too large")
+
+    return {
+        "event_type": event_type,
+        "user_id": user_id,
+        "session_id": _truncate(data.get("session_id"), 100),
+        "entity_type": _truncate(data.get("entity_type"), 50),
+        "entity_id": entity_id,
+        "event_metadata": metadata,
+        "ip_address": _truncate(ip_address, 50),
+        "user_agent": _truncate(user_agent, 255),
+        "created_at": datetime.utcnow(),
+    }
+
+
+class _PipelineState:
+    def __init__(self, maxsize):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.lock = threading.Lock()
+        self.spill_lock = threading.Lock()
+        self.stats = {
+            "accepted": 0, "dropped": 0, "spilled": 0, "written": 0, "failed_batches": 0,
+            "dead_lettered": 0,
+        }
+        self.flusher = None
+
+
+class AnalyticsPipeline:
+    """Flask extension owning the event queue and its flusher."""
+
+    def init_app(self, app):
+        app.config.setdefault("ANALYTICS_QUEUE_SIZE", 10000)
+        app.config.setdefault("ANALYTICS_BATCH_SIZE", 500)
+        # 0 disables the background flusher (call flush() yourself)
+        app.config.setdefault("ANALYTICS_FLUSH_SECONDS", 2)
+        app.config.setdefault("ANALYTICS_OVERFLOW", "drop")  # drop | spill
+        app.config.setdefault(
+            "ANALYTICS_SPILL_PATH", os.path.join(app.instance_path, "analytics_spill.jsonl")
+        )
+        # Spilled events go to the dead-letter file after this many failed inserts
+        app.config.setdefault("ANALYTICS_SPILL_MAX_ATTEMPTS", 5)
+        app.config.setdefault(
+            "ANALYTICS_DEAD_LETTER_PATH",
+            os.path.join(app.instance_path, "analytics_dead_letter.jsonl"),
+        )
+        # Largest batch the beacon endpoint accepts in one request
+        app.config.setdefault("ANALYTICS_MAX_BEACON_EVENTS", 100)
+
+        state = _PipelineState(app.config["ANALYTICS_QUEUE_SIZE"])
+        if app.config["ANALYTICS_FLUSH_SECONDS"] > 0:
+            state.flusher = PeriodicFlusher(
+                app, self.flush, app.config["ANALYTICS_FLUSH_SECONDS"], "analytics-flush"
+            )
+        app.extensions["analytics"] = state
+
+    @property
+    def _state(self):
+        return current_app.extensions["analytics"]
+
+    def _count(self, state, name, n=1):
+        with state.lock:
+            state.stats[name] += n
+
+    # ---------- request path ----------
+
+    def enqueue(self, events):
+        """
+        Queue validated rows (see build_event) without blocking.
+
+        Returns:
+            (accepted, overflowed) counts
+        """
+        state = self._state
+        overflow = []
+        accepted = 0
+        for event in events:
+            try:
+                state.queue.put_nowait(event)
+                accepted += 1
+            except queue.Full:
+                overflow.append(event)
+
+        self._count(state, "accepted", accepted)
+        if overflow:
+            self._overflow(state, overflow)
+
+        if state.flusher is not None:
+            state.flusher.start()
+            if state.queue.qsize() >= current_app.config["ANALYTICS_BATCH_SIZE"]:
+                state.flusher.wake()
+        return accepted, len(overflow)
+
+    def track(self, event_type, **fields):
+        """Queue one server-side event (fields as in build_event's output)."""
+        event = dict.fromkeys(EVENT_COLUMNS)
+        event.update(fields, event_type=event_type, created_at=datetime.utcnow())
+        return self.enqueue([event])
+
+    def _overflow(self, state, events, attempts=None):
+        if current_app.config["ANALYTICS_OVERFLOW"] == "spill":
+            try:
+                self._spill(state, events, attempts)
+                self._count(state, "spilled", len(events))
+                return
+            except OSError:
+                logger.exception("Analytics spill failed; dropping %d events", len(events))
+        self._count(state, "dropped", len(events))
+
+    def _spill(self, state, events, attempts=None):
+        lines = []
+        for index, event in enumerate(events):
+            if attempts and attempts[index]:
+                event = dict(event, **{ATTEMPTS_KEY: attempts[index]})
+            lines.append(json.dumps(event, default=str) + "\n")
+        self._append(state, current_app.config["ANALYTICS_SPILL_PATH"], lines)
+
+    def _append(self, state, path, lines):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with state.spill_lock, open(path, "a", encoding="utf-8") as handle:
+            handle.writelines(lines)
+
+    def _dead_letter(self, state, lines):
+        path = current_app.config["ANALYTICS_DEAD_LETTER_PATH"]
+        try:
+            self._append(state, path, lines)
+        except OSError:
+            logger.exception("Analytics dead-letter write failed; dropping %d events", len(lines))
+            self._count(state, "dropped", len(lines))
+            return
+        logger.error("Moved %d analytics events to %s", len(lines), path)
+        self._count(state, "dead_lettered", len(lines))
+
+    # ---------- flusher ----------
+
+    def _take_spill(self, state):
+        """
+        Atomically claim the spill file and load its events.
+
+        The rename target is unique to this process, so a worker that loses
+        the race to another one sees FileNotFoundError: nothing to replay.
+
+        Returns:
+            (events, attempts) parallel lists
+        """
+        path = current_app.config["ANALYTICS_SPILL_PATH"]
+        claimed = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.replay"
+        try:
+            os.replace(path, claimed)
+        except FileNotFoundError:
+            return [], []
+
+        events, attempts, bad = [], [], []
+        with open(claimed, encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    event = json.loads(line)
+                    tries = int(event.pop(ATTEMPTS_KEY, 0))
+                    if event.get("created_at"):
+                        event["created_at"] = datetime.fromisoformat(event["created_at"])
+                except (ValueError, TypeError, AttributeError):
+                    bad.append(line if line.endswith("\n") else line + "\n")
+                    continue
+                events.append(dict(dict.fromkeys(EVENT_COLUMNS), **event))
+                attempts.append(tries)
+        if bad:
+            self._dead_letter(state, bad)
+        os.remove(claimed)
+        return events, attempts
+
+    def _write(self, state, batch, attempts=None):
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(insert(AnalyticsEvent.__table__), batch)
+        except Exception:
+            logger.exception("Analytics batch of %d events failed", len(batch))
+            self._count(state, "failed_batches")
+            self._retry(state, batch, attempts or [0] * len(batch))
+            return 0
+        self._count(state, "written", len(batch))
+        return len(batch)
+
+    def _retry(self, state, batch, attempts):
+        """Re-spill a failed batch, dead-lettering events out of attempts."""
+        limit = current_app.config["ANALYTICS_SPILL_MAX_ATTEMPTS"]
+        retry, retry_attempts, dead = [], [], []
+        for event, tries in zip(batch, attempts):
+            tries += 1
+            if tries >= limit:
+                dead.append(json.dumps(dict(event, **{ATTEMPTS_KEY: tries}), default=str) + "\n")
+            else:
+                retry.append(event)
+                retry_attempts.append(tries)
+        if dead:
+            self._dead_letter(state, dead)
+        if retry:
+            self._overflow(state, retry, retry_attempts)
+
+    def flush(self):
+        """
+        Drain the queue (and any spilled events) in batched INSERTs.
+
+        Returns:
+            Number of events written
+        """
+        state = self._state
+        batch_size = current_app.config["ANALYTICS_BATCH_SIZE"]
+        written = 0
+
+        spilled, attempts = self._take_spill(state)
+        for start in range(0, len(spilled), batch_size):
+            end = start + batch_size
+            written += self._write(state, spilled[start:end], attempts[start:end])
+
+        # Only drain what is queued now, so a busy producer cannot pin us here
+        remaining = state.queue.qsize()
+        while remaining > 0:
+            batch = []
+            while len(batch) < min(batch_size, remaining):
+                try:
+                    batch.append(state.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                break
+            remaining -= len(batch)
+            written += self._write(state, batch)
+        return written
+
+    def stats(self):
+        """Ingestion counters for this worker."""
+        state = self._state
+        with state.lock:
+            stats = dict(state.stats)
+        stats["queued"] = state.queue.qsize()
+        return stats
+
+
+# exported instance, initialised in create_app
+analytics_pipeline = AnalyticsPipeline()
@@ -0,0 +1,124 @@
+"""
+Audit Trail
+Buffered, transactional audit logging for admin actions.
+
+`audit_trail.record(...)` only appends to a buffer on the current SQLAlchemy
+session. A `before_commit` hook writes the whole buffer with one
+executemany INSERT inside the transaction being committed, so:
+- an audit row exists if and only if the action it describes committed
+- a request (or bulk operation) pays one INSERT round trip, not one per item
+
+old/new values are reduced to the keys that actually changed and stored
+as compact, key-sorted JSON.
+"""
+
+import json
+from datetime import datetime
+
+from flask import has_request_context, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import AuditLog
+
+BUFFER_KEY = "audit_entries"
+
+
+def to_json(values):
+    """Compact, deterministic JSON (None stays None)."""
+    if values is None:
+        return None
+    return json.dumps(values, separators=(",", ":"), sort_keys=True, default=str)
+
+
+def from_json(text):
+    """Decode a stored value; legacy non-JSON text is returned as-is."""
+    if text is None:
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def diff(old_values, new_values):
+    """
+    Keep only the keys whose value changed.
+
+    Returns:
+        (old, new) dicts, either may be None
+    """
+    if not old_values or not new_values:
+        return old_values or None, new_values or None
+    keys = set(old_values) | set(new_values)
+    changed = {k for k in keys if old_values.get(k) != new_values.get(k)}
+    old = {k: old_values[k] for k in changed if k in old_values}
+    new = {k: new_values[k] for k in changed if k in new_values}
+    return old or None, new or None
+
+
+def _write_buffer(session):
+    entries = session.info.pop(BUFFER_KEY, None)
+    if entries:
+        session.connection().execute(insert(AuditLog.__table__), entries)
+
+
+def _drop_buffer(session, previous_transaction):
+    # The action rolled back, so there is nothing to audit
+    session.info.pop(BUFFER_KEY, None)
+
+
+class AuditTrail:
+    """Records admin actions into the committing transaction."""
+
+    _listening = False
+
+    def init_app(self, app):
+        if not AuditTrail._listening:
+            event.listen(Session, "before_commit", _write_buffer)
+            event.listen(Session, "after_soft_rollback", _drop_buffer)
+            AuditTrail._listening = True
+
+    def record(self, action, entity_type=None, entity_id=None,
+               old_values=None, new_values=None, admin_id=None, session=None):
+        """
+        Buffer an audit entry; it is written by the next commit.
+
+        Args:
+            action: e.g. "user_deactivated"
+            entity_type, entity_id: what the action touched
+            old_values, new_values: dicts; reduced to the changed keys
+            admin_id: defaults to the JWT identity of the current request
+            session: defaults to db.session
+        """
+        session = session or db.session()
+        old, new = diff(old_values, new_values)
+
+        ip_address = user_agent = None
+        if has_request_context():
+            ip_address = request.remote_addr
+            user_agent = (request.user_agent.string or "")[:255] or None
+            if admin_id is None:
+                admin_id = get_jwt_identity()
+
+        session.info.setdefault(BUFFER_KEY, []).append({
+            "admin_id": admin_id,
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "old_values": to_json(old),
+            "new_values": to_json(new),
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "created_at": datetime.utcnow(),
+        })
+
+    def pending(self, session=None):
+        """Entries buffered on the session and not yet committed."""
+        return list((session or db.session()).info.get(BUFFER_KEY, ()))
+
+
+# exported instance, initialised in create_app
+audit_trail = AuditTrail()
@@ -0,0 +1,268 @@
+"""
+Cart Store
+Database-backed buyer carts, shared by every worker and kept across restarts.
+
+Carts live in the cart_items table. Reading a cart prices it with one
+query (cart rows joined to their listings, or a single IN query when the
+cart's contents come from the cache) and reports items that stopped being
+available. Every write touches the whole cart's updated_at, and carts
+untouched for CART_TTL_DAYS are deleted by a periodic sweep (or
+`flask evict-carts`).
+
+With CART_CACHE_SECONDS > 0, each worker also keeps cart contents in a
+bounded LRU (CART_CACHE_MAX_USERS carts). A worker drops its own entry on
+every write; another worker's copy may lag by up to CART_CACHE_SECONDS.
+"""
+
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from sqlalchemy import delete, func, select, update
+
+from app import db
+from app.models import CartItem, Livestock
+from app.utils.background import PeriodicFlusher
+from app.utils.cache import LRUCache
+from app.utils.upsert import upsert
+
+# Listing columns a priced cart line needs
+PRICE_COLUMNS = (
+    Livestock.id,
+    Livestock.animal_type,
+    Livestock.breed,
+    Livestock.price,
+    Livestock.image_url,
+    Livestock.is_available,
+)
+
+
+class CartFull(ValueError):
+    """Raised when adding an item would exceed CART_MAX_ITEMS."""
+
+
+def _line(row, quantity):
+    price = float(row.price)
+    return {
+        "livestock_id": row.id,
+        "name": row.animal_type,
+        "species": row.animal_type,
+        "breed": row.breed,
+        "price": price,
+        "quantity": quantity,
+        "total": price * quantity,
+        "image": row.image_url,
+    }
+
+
+class _CartState:
+    def __init__(self, cache_size):
+        self.cache = LRUCache(cache_size)
+        self.sweeper = None
+
+
+class CartStore:
+    """Flask extension owning cart persistence, caching and eviction."""
+
+    def init_app(self, app):
+        app.config.setdefault("CART_TTL_DAYS", 30)
+        app.config.setdefault("CART_MAX_ITEMS", 50)
+        # 0 disables the per-worker cache (every read queries the database)
+        app.config.setdefault("CART_CACHE_SECONDS", 0)
+        app.config.setdefault("CART_CACHE_MAX_USERS", 1000)
+        # 0 disables the background sweep (call evict_abandoned() yourself)
+        app.config.setdefault("CART_EVICT_SECONDS", 3600)
+
+        state = _CartState(app.config["CART_CACHE_MAX_USERS"])
+        if app.config["CART_EVICT_SECONDS"] > 0:
+            state.sweeper = PeriodicFlusher(
+                app, self.evict_abandoned, app.config["CART_EVICT_SECONDS"], "cart-evict"
+            )
+        app.extensions["cart_store"] = state
+        app.cli.add_command(evict_carts_command)
+
+    @property
+    def _state(self):
+        return current_app.extensions["cart_store"]
+
+    @staticmethod
+    def _key(user_id):
+        return f"cart:{user_id}"
+
+    def _cache_ttl(self):
+        return current_app.config["CART_CACHE_SECONDS"]
+
+    # ---------- reads ----------
+
+    def contents(self, user_id):
+        """{livestock_id: quantity} in the order items were added."""
+        if self._cache_ttl():
+            cached = self._state.cache.get(self._key(user_id))
+            if cached is not None:
+                return dict(cached)
+
+        rows = db.session.execute(
+            select(CartItem.livestock_id, CartItem.quantity)
+            .where(CartItem.user_id == user_id)
+            .order_by(CartItem.added_at, CartItem.id)
+        ).all()
+        items = {row.livestock_id: row.quantity for row in rows}
+        self._remember(user_id, items)
+        return items
+
+    def _remember(self, user_id, items):
+        if self._cache_ttl():
+            self._state.cache.set(self._key(user_id), list(items.items()), self._cache_ttl())
+
+    def priced(self, user_id):
+        """
+        Price the cart with current listing data in one query.
+
+        Returns:
+            dict with items, unavailable (listings no longer for sale),
+            total and item_count
+        """
+        cached = self._state.cache.get(self._key(user_id)) if self._cache_ttl() else None
+        if cached is not None:
+            quantities = dict(cached)
+            listings = {
+                row.id: row
+                for row in db.session.execute(
+                    select(*PRICE_COLUMNS).where(Livestock.id.in_(quantities))
+                ).all()
+            } if quantities else {}
+            lines = [(listings[i], q) for i, q in quantities.items() if i in listings]
+        else:
+            rows = db.session.execute(
+                select(CartItem.quantity, *PRICE_COLUMNS)
+                .join(Livestock, Livestock.id == CartItem.livestock_id)
+                .where(CartItem.user_id == user_id)
+                .order_by(CartItem.added_at, CartItem.id)
+            ).all()
+            lines = [(row, row.quantity) for row in rows]
+            self._remember(user_id, {row.id: row.quantity for row in rows})
+
+        items, unavailable = [], []
+        for row, quantity in lines:
+            if row.is_available:
+                items.append(_line(row, quantity))
+            else:
+                unavailable.append({
+                    "livestock_id": row.id,
+                    "name": row.animal_type,
+                    "reason": "no longer available",
+                })
+
+        return {
+            "items": items,
+            "unavailable": unavailable,
+            "total": sum(item["total"] for item in items),
+            "item_count": len(items),
+        }
+
+    # ---------- writes ----------
+
+    def _touched(self, user_id):
+        """Date the whole cart, commit, and drop this worker's cached copy."""
+        db.session.execute(
+            update(CartItem)
+            .where(CartItem.user_id == user_id)
+            .values(updated_at=datetime.utcnow())
+        )
+        db.session.commit()
+        self._state.cache.delete(self._key(user_id))
+        if self._state.sweeper is not None:
+            self._state.sweeper.start()
+
+    def count(self, user_id):
+        return db.session.scalar(
+            select(func.count()).select_from(CartItem).where(CartItem.user_id == user_id)
+        )
+
+    def add(self, user_id, livestock_id, quantity=1):
+        """
+        Add `quantity` of a listing (or increase it if already in the cart).
+
+        Returns:
+            Number of distinct items in the cart
+
+        Raises:
+            CartFull: the cart already holds CART_MAX_ITEMS listings
+        """
+        result = db.session.execute(
+            update(CartItem)
+            .where(CartItem.user_id == user_id, CartItem.livestock_id == livestock_id)
+            .values(quantity=CartItem.quantity + quantity)
+        )
+        count = self.count(user_id)
+        if result.rowcount == 0:
+            if count >= current_app.config["CART_MAX_ITEMS"]:
+                db.session.rollback()
+                raise CartFull(
+                    f"A cart holds at most {current_app.config['CART_MAX_ITEMS']} items"
+                )
+            # A concurrent add of the same listing may have inserted the row
+            # since our UPDATE; then add to it instead of failing
+            table = CartItem.__table__
+            statement = upsert(db.session.connection(), table).values(
+                user_id=user_id,
+                livestock_id=livestock_id,
+                quantity=quantity,
+                added_at=datetime.utcnow(),
+            )
+            db.session.execute(statement.on_conflict_do_update(
+                index_elements=[table.c.user_id, table.c.livestock_id],
+                set_={"quantity": table.c.quantity + statement.excluded.quantity},
+            ))
+            count += 1
+        self._touched(user_id)
+        return count
+
+    def remove(self, user_id, livestock_id):
+        """Remove a listing; returns the number of items left."""
+        db.session.execute(
+            delete(CartItem).where(
+                CartItem.user_id == user_id, CartItem.livestock_id == livestock_id
+            )
+        )
+        count = self.count(user_id)
+        self._touched(user_id)
+        return count
+
+    def clear(self, user_id):
+        db.session.execute(delete(CartItem).where(CartItem.user_id == user_id))
+        self._touched(user_id)
+
+    def remove_many(self, user_id, livestock_ids):
+        """Remove several listings in one statement, in the caller's transaction."""
+        if livestock_ids:
+            db.session.execute(
+                delete(CartItem).where(
+                    CartItem.user_id == user_id, CartItem.livestock_id.in_(livestock_ids)
+                )
+            )
+        self._state.cache.delete(self._key(user_id))
+
+    # ---------- eviction ----------
+
+    def evict_abandoned(self):
+        """
+        Delete carts untouched for CART_TTL_DAYS.
+
+        Returns:
+            Number of cart rows deleted
+        """
+        cutoff = datetime.utcnow() - timedelta(days=current_app.config["CART_TTL_DAYS"])
+        result = db.session.execute(delete(CartItem).where(CartItem.updated_at < cutoff))
+        db.session.commit()
+        return result.rowcount
+
+
+@click.command("evict-carts")
+def evict_carts_command():
+    """Delete carts nobody has touched for CART_TTL_DAYS."""
+    click.echo(f"Evicted {cart_store.evict_abandoned()} cart items")
+
+
+# exported instance, initialised in create_app
+cart_store = CartStore()
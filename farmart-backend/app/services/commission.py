@@ -0,0 +1,271 @@
+"""
+Commission Engine
+Resolves the commission rate for an order from the CommissionRule table.
+
+Active rules are compiled into an interval index per category: the
+order-value axis is cut at every rule's min/max into elementary bands,
+and each band holds the effective-date cuts of the rules covering it
+with the winning rule per date span. Resolving a rate is two bisects
+(value, then date), O(log n) in the number of rules, with no query.
+
+Matching:
+- a rule applies when min_order_value <= value < max_order_value and
+  effective_from <= date <= effective_to (blank bounds are open)
+- category is the listing's animal type, case-insensitive; blank, "all"
+  and "order_value" rules apply to every listing, and a matching
+  category-specific rule beats them
+- among overlapping rules, the latest effective_from wins, then the
+  newest rule
+- nothing matching falls back to DEFAULT_COMMISSION_RATE
+
+Each worker compiles once and recompiles when the snapshot is older
+than COMMISSION_RULES_SYNC_SECONDS, or after this worker edits a rule
+(invalidate()).
+"""
+
+import threading
+import time
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import select
+
+from app import db
+from app.models import CommissionRule, Livestock, Order
+
+# Categories that mean "every listing"
+GENERIC_CATEGORIES = frozenset({"", "all", "order_value"})
+
+# end is exclusive (effective_to + 1 day); None bounds are open
+CompiledRule = namedtuple("CompiledRule", "id rate low high start end")
+
+# What the engine picked for one order
+Pricing = namedtuple("Pricing", "rule_id rate commission")
+
+_LOWEST_VALUE = float("-inf")
+
+
+def _category_key(category):
+    key = (category or "").strip().lower()
+    return None if key in GENERIC_CATEGORIES else key
+
+
+def _covers(low, high, point):
+    return (low is None or low <= point) and (high is None or point < high)
+
+
+def _cuts(bounds):
+    return sorted({bound for bound in bounds if bound is not None})
+
+
+def _points(cuts, lowest):
+    """One representative point per elementary span: below the first cut, then each cut."""
+    return [lowest] + cuts
+
+
+class _CategoryIndex:
+    """Value bands -> date spans -> winning rule, for one category."""
+
+    def __init__(self, rules):
+        # Highest priority first, so the first covering rule wins
+        rules = sorted(
+            rules, key=lambda rule: (rule.start or date.min, rule.id), reverse=True
+        )
+        self.value_cuts = _cuts(b for rule in rules for b in (rule.low, rule.high))
+        self.bands = []
+        for value in _points(self.value_cuts, _LOWEST_VALUE):
+            covering = [rule for rule in rules if _covers(rule.low, rule.high, value)]
+            date_cuts = _cuts(b for rule in covering for b in (rule.start, rule.end))
+            winners = [
+                next((rule for rule in covering if _covers(rule.start, rule.end, day)), None)
+                for day in _points(date_cuts, date.min)
+            ]
+            self.bands.append((date_cuts, winners))
+
+    def lookup(self, value, day):
+        date_cuts, winners = self.bands[bisect_right(self.value_cuts, value)]
+        return winners[bisect_right(date_cuts, day)]
+
+
+class CompiledRules:
+    """An immutable, compiled set of active commission rules."""
+
+    def __init__(self, rules, default_rate):
+        self.default_rate = default_rate
+        self.size = len(rules)
+        by_category = {}
+        for category, rule in rules:
+            by_category.setdefault(_category_key(category), []).append(rule)
+        self.generic = _CategoryIndex(by_category.pop(None, []))
+        self.specific = {key: _CategoryIndex(group) for key, group in by_category.items()}
+
+    def resolve(self, value, category=None, day=None):
+        """The winning CompiledRule, or None for the default rate."""
+        day = day or datetime.utcnow().date()
+        index = self.specific.get(_category_key(category))
+        rule = index.lookup(value, day) if index is not None else None
+        return rule or self.generic.lookup(value, day)
+
+    def price(self, subtotal, category=None, day=None):
+        subtotal = float(subtotal)
+        rule = self.resolve(subtotal, category, day)
+        rate = rule.rate if rule is not None else self.default_rate
+        return Pricing(rule.id if rule is not None else None, rate, subtotal * rate)
+
+
+def compile_rules(rows, default_rate):
+    """
+    Compile CommissionRule rows (or anything with the same attributes).
+
+    Inactive rules and rules whose date range is empty are dropped.
+    """
+    rules = []
+    for row in rows:
+        if not row.is_active:
+            continue
+        end = None
+        if row.effective_to and row.effective_to < date.max:
+            end = row.effective_to + timedelta(days=1)
+        if row.effective_from and end and row.effective_from >= end:
+            continue
+        rules.append((row.category, CompiledRule(
+            id=row.id,
+            rate=float(row.commission_rate),
+            low=float(row.min_order_value) if row.min_order_value is not None else None,
+            high=float(row.max_order_value) if row.max_order_value is not None else None,
+            start=row.effective_from,
+            end=end,
+        )))
+    return CompiledRules(rules, default_rate)
+
+
+class _CommissionState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rules = None
+        self.loaded_at = None
+
+
+class CommissionEngine:
+    """Flask extension holding each worker's compiled commission rules."""
+
+    def init_app(self, app):
+        # Rate when no rule matches
+        app.config.setdefault("DEFAULT_COMMISSION_RATE", 0.02)
+        # Upper bound on how long another worker's rule edit takes to apply here
+        app.config.setdefault("COMMISSION_RULES_SYNC_SECONDS", 60)
+        app.extensions["commission_engine"] = _CommissionState()
+
+    @property
+    def _state(self):
+        return current_app.extensions["commission_engine"]
+
+    def rules(self):
+        """The compiled rules, recompiled with one query when stale."""
+        state = self._state
+        ttl = current_app.config["COMMISSION_RULES_SYNC_SECONDS"]
+        with state.lock:
+            if state.loaded_at is None or time.monotonic() - state.loaded_at > ttl:
+                rows = db.session.execute(
+                    select(
+                        CommissionRule.id,
+                        CommissionRule.category,
+                        CommissionRule.min_order_value,
+                        CommissionRule.max_order_value,
+                        CommissionRule.commission_rate,
+                        CommissionRule.is_active,
+                        CommissionRule.effective_from,
+                        CommissionRule.effective_to,
+                    ).where(CommissionRule.is_active.is_(True))
+                ).all()
+                state.rules = compile_rules(rows, current_app.config["DEFAULT_COMMISSION_RATE"])
+                state.loaded_at = time.monotonic()
+            return state.rules
+
+    def invalidate(self):
+        """Recompile on next use (call after committing a rule change)."""
+        state = self._state
+        with state.lock:
+            state.loaded_at = None
+
+    def price(self, subtotal, category=None, day=None):
+        """
+        Commission for one order.
+
+        Args:
+            subtotal: order value
+            category: the listing's animal type
+            day: pricing date (default: today, UTC)
+
+        Returns:
+            Pricing(rule_id, rate, commission); rule_id is None for the default rate
+        """
+        return self.rules().price(subtotal, category, day)
+
+    # ---------- batch re-pricing ----------
+
+    def reprice(self, orders):
+        """
+        Price many (subtotal, category, day) tuples against one compiled snapshot.
+
+        Returns:
+            list of Pricing, in input order
+        """
+        rules = self.rules()
+        return [rules.price(subtotal, category, day) for subtotal, category, day in orders]
+
+    def reprice_orders(self, start=None, end=None, batch_size=2000):
+        """
+        Re-price placed orders under the current rules, for reporting.
+
+        Streams orders placed in [start, end] (dates, inclusive) in batches
+        and compares the commission charged with what the rules give now.
+
+        Returns:
+            dict with orders, charged, repriced, difference and by_rule
+            ({rule id or "default": {"orders", "commission"}})
+        """
+        query = (
+            select(Order.subtotal, Order.commission_amount, Order.placed_at, Livestock.animal_type)
+            .join(Livestock, Livestock.id == Order.livestock_id)
+            .execution_options(yield_per=batch_size)
+        )
+        if start:
+            query = query.where(Order.placed_at >= datetime.combine(start, datetime.min.time()))
+        if end:
+            query = query.where(
+                Order.placed_at < datetime.combine(end + timedelta(days=1), datetime.min.time())
+            )
+
+        rules = self.rules()
+        count, charged, repriced, by_rule = 0, 0.0, 0.0, {}
+        for partition in db.session.execute(query).partitions():
+            for row in partition:
+                day = row.placed_at.date() if row.placed_at else None
+                pricing = rules.price(row.subtotal, row.animal_type, day)
+                count += 1
+                charged += float(row.commission_amount or 0)
+                repriced += pricing.commission
+                bucket = by_rule.setdefault(
+                    str(pricing.rule_id) if pricing.rule_id is not None else "default",
+                    {"orders": 0, "commission": 0.0},
+                )
+                bucket["orders"] += 1
+                bucket["commission"] += pricing.commission
+
+        return {
+            "orders": count,
+            "charged": round(charged, 2),
+            "repriced": round(repriced, 2),
+            "difference": round(repriced - charged, 2),
+            "by_rule": {
+                key: {"orders": value["orders"], "commission": round(value["commission"], 2)}
+                for key, value in by_rule.items()
+            },
+        }
+
+
+# exported instance, initialised in create_app
+commission_engine = CommissionEngine()
@@ -0,0 +1,124 @@
+"""
+Admin Dashboard Metrics
+All dashboard counters in one round trip.
+
+Each table is scanned once with conditional aggregation (count/sum over
+CASE expressions), and the per-table aggregates are cross-joined into a
+single SELECT. Time windows are half-open created_at/placed_at ranges
+rather than func.date() predicates, so they can use the indexes.
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func, select, true
+
+from app import db
+from app.models import Dispute, DisputeStatus, Livestock, Order, OrderStatus, User, UserRole
+
+# Named windows for the `range` parameter
+RANGES = {
+    "today": 0,
+    "7d": 7,
+    "30d": 30,
+    "90d": 90,
+}
+
+
+def range_start(name, now=None):
+    """Start of a named window; "today" starts at midnight UTC."""
+    now = now or datetime.utcnow()
+    midnight = datetime.combine(now.date(), datetime.min.time())
+    days = RANGES[name]
+    return midnight if days == 0 else now - timedelta(days=days)
+
+
+def _count_if(condition):
+    return func.sum(case((condition, 1), else_=0))
+
+
+def _sum_if(condition, column):
+    return func.coalesce(func.sum(case((condition, column), else_=0)), 0)
+
+
+def dashboard_metrics(since, now=None):
+    """
+    Compute the dashboard for a window starting at `since`.
+
+    Returns:
+        JSON-able dict (users, orders, revenue, listings, disputes)
+    """
+    now = now or datetime.utcnow()
+    today = datetime.combine(now.date(), datetime.min.time())
+
+    users = select(
+        func.count().label("total"),
+        _count_if(User.role == UserRole.FARMER).label("farmers"),
+        _count_if(User.role == UserRole.BUYER).label("buyers"),
+        _count_if(User.created_at >= today).label("new_today"),
+        _count_if(User.created_at >= since).label("new_in_range"),
+    ).select_from(User).subquery()
+
+    delivered = Order.status == OrderStatus.DELIVERED
+    orders = select(
+        func.count().label("total"),
+        _count_if(Order.status == OrderStatus.PENDING).label("pending"),
+        _count_if(delivered).label("completed"),
+        _count_if(Order.placed_at >= since).label("in_range"),
+        _sum_if(delivered, Order.total_amount).label("revenue_total"),
+        _sum_if(delivered & (Order.placed_at >= today), Order.total_amount).label("revenue_today"),
+        _sum_if(delivered & (Order.placed_at >= since), Order.total_amount).label("revenue_in_range"),
+    ).select_from(Order).subquery()
+
+    listings = select(
+        func.count().label("total"),
+        _count_if(Livestock.is_available.is_(True)).label("available"),
+        _count_if(Livestock.created_at >= since).label("new_in_range"),
+    ).select_from(Livestock).subquery()
+
+    disputes = select(
+        _count_if(Dispute.status == DisputeStatus.OPEN).label("open"),
+        _count_if(Dispute.status == DisputeStatus.UNDER_REVIEW).label("under_review"),
+    ).select_from(Dispute).subquery()
+
+    # Each subquery is a single row, so the cross join is too
+    joined = (
+        users.join(orders, true())
+        .join(listings, true())
+        .join(disputes, true())
+    )
+    row = db.session.execute(
+        select(users, orders, listings, disputes).select_from(joined)
+    ).one()._mapping
+
+    def n(column):
+        return int(row[column] or 0)
+
+    def money(column):
+        return float(row[column] or 0)
+
+    return {
+        "users": {
+            "total": n(users.c.total),
+            "farmers": n(users.c.farmers),
+            "buyers": n(users.c.buyers),
+            "new_today": n(users.c.new_today),
+            "new_in_range": n(users.c.new_in_range),
+        },
+        "orders": {
+            "total": n(orders.c.total),
+            "pending": n(orders.c.pending),
+            "completed": n(orders.c.completed),
+            "in_range": n(orders.c.in_range),
+        },
+        "revenue": {
+            "total": money(orders.c.revenue_total),
+            "today": money(orders.c.revenue_today),
+            "in_range": money(orders.c.revenue_in_range),
+        },
+        "listings": {
+            "total": n(listings.c.total),
+            "available": n(listings.c.available),
+            "new_in_range": n(listings.c.new_in_range),
+        },
+        "disputes": {"open": n(disputes.c.open), "under_review": n(disputes.c.under_review)},
+    }
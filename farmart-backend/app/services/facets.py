@@ -0,0 +1,170 @@
+"""
+Search Facets
+Facet counts (species, breed, location, gender, price band, weight band)
+for the buyer search endpoint.
+
+Filtered searches get all facets from a single GROUP BY pass over the
+filtered set. The unfiltered counts are served from an in-memory
+snapshot that is updated incrementally as listings change.
+"""
+
+from collections import Counter
+
+from sqlalchemy import case, func
+
+from app.models import Livestock
+from app.services.read_model import ListingReadModel, ReadModelState
+
+# Upper bounds (exclusive) of each band; the last band is open-ended
+PRICE_BANDS = [5000, 10000, 25000, 50000, 100000]
+WEIGHT_BANDS = [25, 50, 100, 250, 500]
+
+FACETS = ["species", "breed", "location", "gender", "price_band", "weight_band"]
+
+
+def _band_labels(bounds):
+    labels, lower = [], 0
+    for upper in bounds:
+        labels.append(f"{lower}-{upper}")
+        lower = upper
+    labels.append(f"{lower}+")
+    return labels
+
+
+def band_label(value, bounds):
+    """Python-side twin of band_expression, for the snapshot."""
+    if value is None:
+        return None
+    labels = _band_labels(bounds)
+    for upper, label in zip(bounds, labels):
+        if value < upper:
+            return label
+    return labels[-1]
+
+
+def band_expression(column, bounds):
+    """SQL CASE mapping a numeric column onto band labels."""
+    labels = _band_labels(bounds)
+    return case(
+        *[(column < upper, label) for upper, label in zip(bounds, labels)],
+        else_=labels[-1],
+    )
+
+
+def _facet_columns():
+    return [
+        Livestock.animal_type,
+        Livestock.breed,
+        Livestock.location,
+        Livestock.gender,
+        band_expression(Livestock.price, PRICE_BANDS),
+        band_expression(Livestock.weight, WEIGHT_BANDS),
+    ]
+
+
+def _format(counters):
+    return {
+        facet: [
+            {"value": value, "count": count}
+            for value, count in sorted(counters[facet].items(), key=lambda kv: (-kv[1], str(kv[0])))
+            if count > 0
+        ]
+        for facet in FACETS
+    }
+
+
+def facet_counts(query):
+    """
+    All facet counts for a filtered Livestock query in one aggregation.
+
+    Groups by the full facet tuple once and rolls each facet up in Python;
+    the number of groups is bounded by distinct combinations, not rows.
+    """
+    columns = _facet_columns()
+    rows = (
+        query.order_by(None)
+        .with_entities(*columns, func.count())
+        .group_by(*columns)
+        .all()
+    )
+
+    counters = {facet: Counter() for facet in FACETS}
+    for row in rows:
+        count = row[-1]
+        for facet, value in zip(FACETS, row[:-1]):
+            if value is not None:
+                counters[facet][value] += count
+    return _format(counters)
+
+
+class _SnapshotState(ReadModelState):
+    def __init__(self):
+        super().__init__()
+        self.keys = {}  # livestock_id -> facet value tuple
+        self.counters = {facet: Counter() for facet in FACETS}
+        self.formatted = None
+
+    def add(self, livestock_id, values):
+        self.discard(livestock_id)
+        self.keys[livestock_id] = values
+        for facet, value in zip(FACETS, values):
+            if value is not None:
+                self.counters[facet][value] += 1
+
+    def discard(self, livestock_id):
+        values = self.keys.pop(livestock_id, None)
+        if values is None:
+            return
+        for facet, value in zip(FACETS, values):
+            if value is not None:
+                self.counters[facet][value] -= 1
+                if self.counters[facet][value] <= 0:
+                    del self.counters[facet][value]
+
+
+class FacetSnapshot(ListingReadModel):
+    """Unfiltered facet counts over all available listings."""
+
+    extension_key = "facet_snapshot"
+
+    def _new_state(self):
+        return _SnapshotState()
+
+    def _columns(self):
+        return [
+            Livestock.animal_type,
+            Livestock.breed,
+            Livestock.location,
+            Livestock.gender,
+            Livestock.price,
+            Livestock.weight,
+        ]
+
+    def _upsert(self, state, row):
+        state.add(row.id, (
+            row.animal_type,
+            row.breed,
+            row.location,
+            row.gender,
+            band_label(row.price, PRICE_BANDS),
+            band_label(row.weight, WEIGHT_BANDS),
+        ))
+
+    def _remove(self, state, livestock_id):
+        state.discard(livestock_id)
+
+    def _after_apply(self, state):
+        state.formatted = None
+
+    def counts(self):
+        """Facet counts for every available listing."""
+        state = self._state
+        with state.lock:
+            self._ensure_fresh(state)
+            if state.formatted is None:
+                state.formatted = _format(state.counters)
+            return state.formatted
+
+
+# exported instance, initialised in create_app
+facet_snapshot = FacetSnapshot()
@@ -2,6 +2,8 @@ import csv
 from io import StringIO
 from app.models import Livestock
 from app import db
+from app.services.listing_events import listing_changed
+from app.services.geo_search import locate_listings
 
 REQUIRED_FIELDS = ["animal_type", "weight", "price", "location"]
 
@@ -25,11 +27,17 @@ def parse_livestock_csv(file_stream, farmer_id):
         )
         animals.append(animal)
 
+    locate_listings(animals, farmer_id)
+
     try:
-        db.session.bulk_save_objects(animals)
+        # Unit-of-work insert (batched by the ORM) so the user stats flush
+        # hook counts the new listings; bulk_save_objects would bypass it
+        db.session.add_all(animals)
         db.session.commit()
     except Exception:
         db.session.rollback()
         raise
 
+    listing_changed(*[animal.id for animal in animals])
+
     return len(animals)
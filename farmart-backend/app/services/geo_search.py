@@ -0,0 +1,115 @@
+"""
+Geo Search Service
+"Near me" lookups over listings located at their farmer's coordinates.
+
+Listings carry a copy of the farmer profile's latitude/longitude plus a
+geohash. Proximity queries prefilter with one index range scan per
+covering geohash prefix and a bounding box, then rank the candidate set
+with an exact, vectorized haversine.
+"""
+
+import numpy as np
+from sqlalchemy import and_, or_
+
+from app import db
+from app.models import Livestock, UserProfile
+from app.utils.geo import bounding_box, covering_cells, encode_geohash, haversine_km
+
+MAX_RADIUS_KM = 500
+
+
+def farmer_coordinates(farmer_id):
+    """(latitude, longitude) from the farmer's profile, or None."""
+    row = (
+        db.session.query(UserProfile.latitude, UserProfile.longitude)
+        .filter(UserProfile.user_id == farmer_id)
+        .first()
+    )
+    if not row or row.latitude is None or row.longitude is None:
+        return None
+    return row.latitude, row.longitude
+
+
+def locate_listings(animals, farmer_id):
+    """Stamp new listings with their farmer's coordinates before insert."""
+    coordinates = farmer_coordinates(farmer_id)
+    if coordinates is None:
+        return
+    latitude, longitude = coordinates
+    geohash = encode_geohash(latitude, longitude)
+    for animal in animals:
+        animal.latitude = latitude
+        animal.longitude = longitude
+        animal.geohash = geohash
+
+
+def sync_farmer_listings(farmer_id):
+    """
+    Copy the farmer's current coordinates onto all their listings in one
+    UPDATE. Returns the affected listing ids (caller commits).
+    """
+    coordinates = farmer_coordinates(farmer_id)
+    if coordinates is None:
+        values = {"latitude": None, "longitude": None, "geohash": None}
+    else:
+        latitude, longitude = coordinates
+        values = {
+            "latitude": latitude,
+            "longitude": longitude,
+            "geohash": encode_geohash(latitude, longitude),
+        }
+
+    ids = [
+        row.id
+        for row in db.session.query(Livestock.id).filter(Livestock.farmer_id == farmer_id)
+    ]
+    if ids:
+        Livestock.query.filter(Livestock.farmer_id == farmer_id).update(
+            values, synchronize_session=False
+        )
+    return ids
+
+
+def nearby(query, latitude, longitude, radius_km):
+    """
+    Rank the listings matched by `query` by distance from a point.
+
+    Args:
+        query: Livestock query with any other filters applied
+        latitude, longitude: Search origin
+        radius_km: Search radius (capped at MAX_RADIUS_KM)
+
+    Returns:
+        (ids, distances) numpy arrays sorted by (distance, id)
+    """
+    radius_km = min(radius_km, MAX_RADIUS_KM)
+    box = bounding_box(latitude, longitude, radius_km)
+    min_lat, min_lon, max_lat, max_lon = box
+
+    # Geohash chars sort below "{", so [prefix, prefix + "{") is the prefix range
+    prefix_ranges = or_(*[
+        and_(Livestock.geohash >= cell, Livestock.geohash < cell + "{")
+        for cell in covering_cells(box)
+    ])
+
+    rows = (
+        query.order_by(None)
+        .filter(
+            prefix_ranges,
+            Livestock.latitude.between(min_lat, max_lat),
+            Livestock.longitude.between(min_lon, max_lon),
+        )
+        .with_entities(Livestock.id, Livestock.latitude, Livestock.longitude)
+        .all()
+    )
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+
+    ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    coords = np.array([(row[1], row[2]) for row in rows], dtype=float)
+    distances = haversine_km(latitude, longitude, coords[:, 0], coords[:, 1])
+
+    within = distances <= radius_km
+    ids, distances = ids[within], distances[within]
+    order = np.lexsort((ids, distances))
+    return ids[order], distances[order]
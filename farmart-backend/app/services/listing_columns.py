@@ -0,0 +1,198 @@
+"""
+Columnar Listing Snapshot
+Available listings held as NumPy columns for range filters and sorts.
+
+Price/weight/age filters and their sorts run as vectorized masks and an
+argsort over the snapshot; the database is only asked to hydrate the one
+page of rows that is returned. Kept current like every other listing read
+model (see app.services.read_model).
+
+Rows live in fixed slots; a removed listing frees its slot for reuse, so
+updates never shift or copy the columns. Capacity doubles when full.
+"""
+
+from datetime import datetime
+
+import numpy as np
+
+from app.models import Livestock
+from app.services.read_model import ListingReadModel, ReadModelState
+
+INITIAL_CAPACITY = 1024
+
+EPOCH = datetime(1970, 1, 1)
+
+# Numeric columns (float64, NaN for NULL) and what they are filtered/sorted by
+NUMERIC_COLUMNS = ("price", "weight", "age_months", "price_per_kg", "created_at")
+
+# Categorical columns stored as int32 codes (-1 for NULL)
+CODED_COLUMNS = ("species", "location")
+
+
+def _timestamp(value):
+    return (value - EPOCH).total_seconds() if value is not None else np.nan
+
+
+def _number(value):
+    return float(value) if value is not None else np.nan
+
+
+def _normalize(value):
+    return value.strip().lower() if value else None
+
+
+class _ColumnState(ReadModelState):
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        super().__init__()
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.numeric = {name: np.full(capacity, np.nan) for name in NUMERIC_COLUMNS}
+        self.coded = {name: np.full(capacity, -1, dtype=np.int32) for name in CODED_COLUMNS}
+        self.codes = {name: {} for name in CODED_COLUMNS}  # value -> code
+        self.slots = {}  # livestock_id -> slot
+        self.free = []
+        self.size = 0  # slots ever handed out
+
+    @property
+    def capacity(self):
+        return len(self.ids)
+
+    def _grow(self):
+        extra = self.capacity
+        self.ids = np.concatenate([self.ids, np.zeros(extra, dtype=np.int64)])
+        self.alive = np.concatenate([self.alive, np.zeros(extra, dtype=bool)])
+        for name, column in self.numeric.items():
+            self.numeric[name] = np.concatenate([column, np.full(extra, np.nan)])
+        for name, column in self.coded.items():
+            self.coded[name] = np.concatenate([column, np.full(extra, -1, dtype=np.int32)])
+
+    def code(self, name, value):
+        value = _normalize(value)
+        if value is None:
+            return -1
+        return self.codes[name].setdefault(value, len(self.codes[name]))
+
+    def upsert(self, livestock_id, numeric, coded):
+        slot = self.slots.get(livestock_id)
+        if slot is None:
+            if self.free:
+                slot = self.free.pop()
+            else:
+                if self.size == self.capacity:
+                    self._grow()
+                slot = self.size
+                self.size += 1
+            self.slots[livestock_id] = slot
+            self.ids[slot] = livestock_id
+            self.alive[slot] = True
+
+        for name, value in numeric.items():
+            self.numeric[name][slot] = value
+        for name, value in coded.items():
+            self.coded[name][slot] = self.code(name, value)
+
+    def remove(self, livestock_id):
+        slot = self.slots.pop(livestock_id, None)
+        if slot is None:
+            return
+        self.alive[slot] = False
+        self.free.append(slot)
+
+
+class ListingColumns(ListingReadModel):
+    """NumPy read model answering range-filtered, sorted listing pages."""
+
+    extension_key = "listing_columns"
+
+    def init_app(self, app):
+        app.config.setdefault("LISTING_COLUMNS_ENABLED", False)
+        super().init_app(app)
+
+    def _new_state(self):
+        return _ColumnState()
+
+    def _columns(self):
+        return [
+            Livestock.price,
+            Livestock.weight,
+            Livestock.age_months,
+            Livestock.price_per_kg,
+            Livestock.created_at,
+            Livestock.animal_type,
+            Livestock.location,
+        ]
+
+    def _upsert(self, state, row):
+        price_per_kg = row.price_per_kg
+        if price_per_kg is None and row.price is not None and row.weight:
+            price_per_kg = row.price / row.weight
+        state.upsert(
+            row.id,
+            {
+                "price": _number(row.price),
+                "weight": _number(row.weight),
+                "age_months": _number(row.age_months),
+                "price_per_kg": _number(price_per_kg),
+                "created_at": _timestamp(row.created_at),
+            },
+            {"species": row.animal_type, "location": row.location},
+        )
+
+    def _remove(self, state, livestock_id):
+        state.remove(livestock_id)
+
+    # ---------- queries ----------
+
+    def select(self, ranges=None, species=None, location=None,
+               sort="created_at", descending=True, offset=0, limit=24):
+        """
+        Filter and sort the snapshot, returning one page of ids.
+
+        Args:
+            ranges: {column: (low, high)} inclusive bounds, either may be None
+            species, location: exact (case-insensitive) matches
+            sort: one of NUMERIC_COLUMNS; ties break on id
+            descending: sort direction
+            offset, limit: page window
+
+        Returns:
+            (ids, total) with ids as a list in page order
+        """
+        if sort not in NUMERIC_COLUMNS:
+            raise ValueError(f"Unsupported sort column: {sort}")
+
+        state = self._state
+        with state.lock:
+            self._ensure_fresh(state)
+            size = state.size
+            mask = state.alive[:size].copy()
+
+            for name, (low, high) in (ranges or {}).items():
+                column = state.numeric[name][:size]
+                # NaN compares False, so NULLs drop out like they do in SQL
+                if low is not None:
+                    mask &= column >= low
+                if high is not None:
+                    mask &= column <= high
+
+            for name, value in (("species", species), ("location", location)):
+                if value:
+                    code = state.codes[name].get(_normalize(value))
+                    if code is None:
+                        return [], 0
+                    mask &= state.coded[name][:size] == code
+
+            slots = np.flatnonzero(mask)
+            ids = state.ids[slots]
+            keys = state.numeric[sort][slots]
+
+        total = len(slots)
+        if descending:
+            order = np.lexsort((-ids, -keys))
+        else:
+            order = np.lexsort((ids, keys))
+        return ids[order[offset:offset + limit]].tolist(), total
+
+
+# exported instance, initialised in create_app
+listing_columns = ListingColumns()
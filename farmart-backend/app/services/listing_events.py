@@ -0,0 +1,31 @@
+"""
+Listing Change Notifications
+Single hook for every write path that changes a livestock listing, so
+derived read models (search index, facet snapshot, columnar snapshot,
+response cache) stay in step.
+"""
+
+from app.services.facets import facet_snapshot
+from app.services.listing_columns import listing_columns
+from app.services.search_index import livestock_search
+from app.utils.cache import response_cache
+
+# Cache tag for anything computed over the set of listings (feed pages,
+# species counts); per-listing tags cover detail pages.
+LISTINGS_TAG = "livestock"
+
+
+def listing_tag(livestock_id):
+    """Cache tag for a single listing."""
+    return f"livestock:{livestock_id}"
+
+
+def listing_changed(*livestock_ids):
+    """
+    Propagate committed changes to the given listings.
+    Call after db.session.commit() so readers see the new rows.
+    """
+    livestock_search.refresh(*livestock_ids)
+    facet_snapshot.refresh(*livestock_ids)
+    listing_columns.refresh(*livestock_ids)
+    response_cache.invalidate(LISTINGS_TAG, *[listing_tag(i) for i in livestock_ids])
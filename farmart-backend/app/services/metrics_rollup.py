@@ -0,0 +1,300 @@
+"""
+Daily Metrics Rollup
+Keeps DailyMetrics current without rescanning the base tables.
+
+Each run looks only at rows changed since the last watermark (users,
+listings and orders by updated_at, analytics events by id), less an
+overlap that catches rows committed out of order, collects the days
+those rows count towards, and recomputes just those days. A day is
+always recomputed whole, so re-running, overlapping runs and late data
+all converge on the same numbers.
+
+Weekly and monthly figures are summed from the daily table.
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import click
+from flask import current_app
+from sqlalchemy import func
+
+from app import db
+from app.models import (
+    AnalyticsEvent,
+    DailyMetrics,
+    Livestock,
+    Order,
+    OrderStatus,
+    SystemSettings,
+    User,
+)
+
+WATERMARK_KEY = "metrics_rollup.watermark"
+
+PERIODS = ("day", "week", "month")
+
+# (bucket column, watermark column) per source; the bucket column decides
+# which day a row counts towards
+SOURCES = {
+    "users": (User.created_at, User.updated_at),
+    "livestock": (Livestock.created_at, Livestock.updated_at),
+    "orders": (Order.placed_at, Order.updated_at),
+    "analytics_events": (AnalyticsEvent.created_at, AnalyticsEvent.id),
+}
+
+COUNT_FIELDS = ("total_listings", "total_orders", "new_users", "active_users", "page_views")
+MONEY_FIELDS = ("total_revenue", "total_commission")
+
+
+def _as_date(value):
+    """func.date() yields a string on SQLite and a date elsewhere."""
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def _spans(days):
+    """Group sorted days into contiguous (first, last) spans."""
+    spans = []
+    for day in sorted(days):
+        if spans and day == spans[-1][1] + timedelta(days=1):
+            spans[-1][1] = day
+        else:
+            spans.append([day, day])
+    return spans
+
+
+def _day_counts(column, first, last, *filters, value=None):
+    """{day: aggregate} for rows whose `column` falls in [first, last]."""
+    day = func.date(column)
+    value = value if value is not None else func.count()
+    rows = (
+        db.session.query(day, value)
+        .filter(
+            column >= datetime.combine(first, datetime.min.time()),
+            column < datetime.combine(last + timedelta(days=1), datetime.min.time()),
+            *filters,
+        )
+        .group_by(day)
+        .all()
+    )
+    return {_as_date(key): amount for key, amount in rows}
+
+
+class MetricsRollup:
+    """Incremental and backfill maintenance of DailyMetrics."""
+
+    def init_app(self, app):
+        # Re-read this much before the watermark, so rows committed late by
+        # slower transactions are still seen (recomputing is idempotent)
+        app.config.setdefault("METRICS_ROLLUP_OVERLAP_SECONDS", 300)
+        # Same for event ids: several workers flush batches concurrently, so
+        # a lower id can commit after a higher one was already read
+        app.config.setdefault("METRICS_ROLLUP_ID_OVERLAP", 10000)
+        app.config.setdefault("METRICS_ROLLUP_WORKERS", 4)
+        app.cli.add_command(rollup_metrics_command)
+
+    # ---------- watermark ----------
+
+    def _load_watermark(self):
+        setting = SystemSettings.query.filter_by(key=WATERMARK_KEY).first()
+        if setting is None:
+            return {}
+        marks = json.loads(setting.value)
+        return {
+            name: datetime.fromisoformat(mark) if name != "analytics_events" else mark
+            for name, mark in marks.items()
+        }
+
+    def _save_watermark(self, marks):
+        value = json.dumps({
+            name: mark.isoformat() if isinstance(mark, datetime) else mark
+            for name, mark in marks.items()
+        })
+        setting = SystemSettings.query.filter_by(key=WATERMARK_KEY).first()
+        if setting is None:
+            setting = SystemSettings(
+                key=WATERMARK_KEY, value=value, description="DailyMetrics rollup progress"
+            )
+            db.session.add(setting)
+        else:
+            setting.value = value
+
+    # ---------- recomputation ----------
+
+    def recompute(self, days):
+        """Rebuild the DailyMetrics rows for `days` from the base tables (no commit)."""
+        days = set(days)
+        if not days:
+            return 0
+
+        metrics = {day: {field: 0 for field in COUNT_FIELDS + MONEY_FIELDS} for day in days}
+        for first, last in _spans(days):
+            delivered = Order.status == OrderStatus.DELIVERED
+            results = {
+                "total_listings": _day_counts(Livestock.created_at, first, last),
+                "total_orders": _day_counts(Order.placed_at, first, last),
+                "total_revenue": _day_counts(
+                    Order.placed_at, first, last, delivered, value=func.sum(Order.total_amount)
+                ),
+                "total_commission": _day_counts(
+                    Order.placed_at, first, last, delivered, value=func.sum(Order.commission_amount)
+                ),
+                "new_users": _day_counts(User.created_at, first, last),
+                "active_users": _day_counts(
+                    AnalyticsEvent.created_at, first, last,
+                    AnalyticsEvent.user_id.isnot(None),
+                    value=func.count(AnalyticsEvent.user_id.distinct()),
+                ),
+                "page_views": _day_counts(
+                    AnalyticsEvent.created_at, first, last,
+                    AnalyticsEvent.event_type == "page_view",
+                ),
+            }
+            for field, per_day in results.items():
+                for day, amount in per_day.items():
+                    if day in metrics and amount is not None:
+                        metrics[day][field] = amount
+
+        existing = {row.date: row for row in DailyMetrics.query.filter(DailyMetrics.date.in_(days))}
+        for day, values in metrics.items():
+            row = existing.get(day)
+            if row is None:
+                row = DailyMetrics(date=day)
+                db.session.add(row)
+            for field, amount in values.items():
+                setattr(row, field, Decimal(str(amount)) if field in MONEY_FIELDS else amount)
+        return len(days)
+
+    def run(self):
+        """
+        Recompute every day touched by rows changed since the last run.
+
+        Returns:
+            Number of days recomputed
+        """
+        overlap = timedelta(seconds=current_app.config["METRICS_ROLLUP_OVERLAP_SECONDS"])
+        id_overlap = current_app.config["METRICS_ROLLUP_ID_OVERLAP"]
+        marks = self._load_watermark()
+        dirty = set()
+
+        for name, (bucket, mark_column) in SOURCES.items():
+            mark = marks.get(name)
+            query = db.session.query(func.date(bucket), func.max(mark_column)).filter(
+                bucket.isnot(None)
+            )
+            if isinstance(mark, datetime):
+                query = query.filter(mark_column >= mark - overlap)
+            elif mark is not None:
+                query = query.filter(mark_column > mark - id_overlap)
+            rows = query.group_by(func.date(bucket)).all()
+
+            for day, newest in rows:
+                dirty.add(_as_date(day))
+                if newest is not None and (mark is None or newest > mark):
+                    mark = newest
+            if mark is not None:
+                marks[name] = mark
+
+        recomputed = self.recompute(dirty)
+        self._save_watermark(marks)
+        db.session.commit()
+        return recomputed
+
+    def backfill(self, start, end, chunk_days=31, workers=None):
+        """
+        Recompute every day in [start, end] in parallel chunks.
+
+        Each chunk runs in its own app context (and so its own session) and
+        commits on its own; chunks cover disjoint days, so they never
+        contend for the same DailyMetrics rows.
+
+        Returns:
+            Number of days written
+        """
+        app = current_app._get_current_object()
+        workers = workers or app.config["METRICS_ROLLUP_WORKERS"]
+        chunks = []
+        first = start
+        while first <= end:
+            last = min(first + timedelta(days=chunk_days - 1), end)
+            chunks.append((first, last))
+            first = last + timedelta(days=1)
+
+        def run_chunk(chunk):
+            first, last = chunk
+            with app.app_context():
+                days = [first + timedelta(days=i) for i in range((last - first).days + 1)]
+                written = self.recompute(days)
+                db.session.commit()
+                return written
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return sum(pool.map(run_chunk, chunks))
+
+    # ---------- reads ----------
+
+    def series(self, period, start, end):
+        """
+        Metrics per day, ISO week or calendar month, from DailyMetrics only.
+
+        Counts and money are summed; active users are averaged per day,
+        since distinct users do not add up across days.
+        """
+        if period not in PERIODS:
+            raise ValueError(f"period must be one of {', '.join(PERIODS)}")
+
+        rows = (
+            DailyMetrics.query
+            .filter(DailyMetrics.date >= start, DailyMetrics.date <= end)
+            .order_by(DailyMetrics.date)
+            .all()
+        )
+
+        buckets = {}
+        for row in rows:
+            if period == "week":
+                key = row.date - timedelta(days=row.date.weekday())
+            elif period == "month":
+                key = row.date.replace(day=1)
+            else:
+                key = row.date
+            bucket = buckets.setdefault(key, {"days": 0, **{f: 0 for f in COUNT_FIELDS + MONEY_FIELDS}})
+            bucket["days"] += 1
+            for field in COUNT_FIELDS:
+                bucket[field] += getattr(row, field) or 0
+            for field in MONEY_FIELDS:
+                bucket[field] += float(getattr(row, field) or 0)
+
+        series = []
+        for key, bucket in buckets.items():
+            active = bucket.pop("active_users")
+            bucket["avg_daily_active_users"] = round(active / bucket["days"], 2)
+            bucket["period_start"] = key.isoformat()
+            series.append(bucket)
+        return series
+
+
+@click.command("rollup-metrics")
+@click.option("--backfill-from", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+              help="Recompute every day from this date (inclusive).")
+@click.option("--backfill-to", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+              help="Last day to backfill (default: today).")
+@click.option("--workers", type=int, default=None, help="Parallel backfill chunks.")
+def rollup_metrics_command(backfill_from, backfill_to, workers):
+    """Bring DailyMetrics up to date (or backfill a date range)."""
+    if backfill_from:
+        end = (backfill_to or datetime.utcnow()).date()
+        days = metrics_rollup.backfill(backfill_from.date(), end, workers=workers)
+        click.echo(f"Backfilled {days} days")
+    days = metrics_rollup.run()
+    click.echo(f"Recomputed {days} days")
+
+
+# exported instance, initialised in create_app
+metrics_rollup = MetricsRollup()
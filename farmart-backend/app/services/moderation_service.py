@@ -13,12 +13,11 @@ from app.models import (
     DisputeStatus,
     Order,
     OrderStatus,
-    Livestock,
-    LivestockStatus,
     Payment,
     PaymentStatus,
 )
 from app.services.escrow_manager import EscrowManager
+from app.services.reservations import release_listings
 
 
 class ModerationService:
@@ -89,9 +88,7 @@ class ModerationService:
         else:
             order.cancellation_reason = "Refunded after dispute resolution"
 
-        livestock = Livestock.query.get(order.livestock_id)
-        if livestock:
-            livestock.status = LivestockStatus.AVAILABLE
+        release_listings(order.livestock_id)
 
         db.session.commit()
         return True
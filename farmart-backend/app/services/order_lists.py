@@ -0,0 +1,105 @@
+"""
+Order Lists
+Column-projected queries and slim rows for order list views.
+
+List endpoints select just the order columns a list row shows plus the
+few listing columns needed to label it (one outer join), and build plain
+dicts from the result tuples. No Order or Livestock objects are
+hydrated, nothing is lazy-loaded per row, and the listing's description
+and image list are never read. Detail views keep using Order.to_dict().
+"""
+
+from app import db
+from app.models import Livestock, Order
+
+# Order columns a list row shows
+ORDER_COLUMNS = (
+    Order.id,
+    Order.order_number,
+    Order.buyer_id,
+    Order.livestock_id,
+    Order.quantity,
+    Order.unit_price,
+    Order.subtotal,
+    Order.commission_amount,
+    Order.total_amount,
+    Order.status,
+    Order.placed_at,
+    Order.created_at,
+)
+
+# Listing columns that label the row (labelled: Livestock.id would clash)
+LISTING_COLUMNS = (
+    Livestock.animal_type.label("listing_animal_type"),
+    Livestock.breed.label("listing_breed"),
+    Livestock.image_url.label("listing_image_url"),
+    Livestock.location.label("listing_location"),
+)
+
+
+def order_list_query(buyer_id=None, status=None):
+    """Projected query over orders and their listings (filters applied, no ORDER BY)."""
+    query = db.session.query(*ORDER_COLUMNS, *LISTING_COLUMNS).outerjoin(
+        Livestock, Livestock.id == Order.livestock_id
+    )
+    if buyer_id is not None:
+        query = query.filter(Order.buyer_id == buyer_id)
+    if status:
+        query = query.filter(Order.status == status)
+    return query
+
+
+def _money(value):
+    return float(value) if value is not None else None
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def order_row(row):
+    """One list row from an order_list_query result tuple."""
+    return {
+        "id": row.id,
+        "order_number": row.order_number,
+        "buyer_id": row.buyer_id,
+        "livestock_id": row.livestock_id,
+        "livestock": {
+            "id": row.livestock_id,
+            "name": row.listing_animal_type,
+            "species": row.listing_animal_type,
+            "animal_type": row.listing_animal_type,
+            "breed": row.listing_breed,
+            "image_url": row.listing_image_url,
+            "location": row.listing_location,
+        }
+        if row.listing_animal_type is not None
+        else None,
+        "quantity": row.quantity,
+        "unit_price": _money(row.unit_price),
+        "subtotal": _money(row.subtotal),
+        "commission_amount": _money(row.commission_amount),
+        "total_amount": _money(row.total_amount),
+        "status": row.status,
+        "placed_at": _iso(row.placed_at),
+        "created_at": _iso(row.created_at),
+    }
+
+
+def order_page(query, page, per_page, max_per_page=100):
+    """
+    One page of a projected order list, newest first.
+
+    Returns:
+        dict with orders, total, page, per_page and pages
+    """
+    pagination = query.order_by(Order.placed_at.desc(), Order.id.desc()).paginate(
+        page=page, per_page=per_page, max_per_page=max_per_page, error_out=False
+    )
+    return {
+        "orders": [order_row(row) for row in pagination.items],
+        "total": pagination.total,
+        "page": pagination.page,
+        "per_page": pagination.per_page,
+        "pages": pagination.pages,
+    }
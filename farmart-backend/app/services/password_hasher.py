@@ -0,0 +1,171 @@
+"""
+Password Hashing
+Key derivation off the request threads, on a small process pool.
+
+Hashing and verifying a password is deliberately slow (hundreds of
+milliseconds), so doing it inline lets a burst of logins occupy every WSGI
+thread and starve cheap catalogue reads. Instead each worker hands the
+work to a process pool of PASSWORD_HASH_WORKERS processes and admits at
+most PASSWORD_HASH_MAX_PENDING jobs at once; beyond that, callers get
+HasherBusy immediately and the route answers 429.
+
+Hashes use PASSWORD_HASH_METHOD (any werkzeug method string). Short forms
+such as "scrypt" are expanded once at startup to the full string werkzeug
+writes into hashes ("scrypt:32768:8:1"), and a login that verifies a hash
+made with other parameters returns a fresh hash, so stored hashes
+converge on the configured method as users sign in.
+"""
+
+import atexit
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+
+from flask import current_app, has_app_context
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = "scrypt:32768:8:1"
+
+
+class HasherBusy(RuntimeError):
+    """Raised when the hashing queue is full; retry after a moment."""
+
+
+# ---------- pool tasks (module level so they pickle) ----------
+
+def _hash(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def _verify(pwhash, password, method):
+    """(matches, replacement hash or None)."""
+    if not check_password_hash(pwhash, password):
+        return False, None
+    if method_of(pwhash) != method:
+        return True, generate_password_hash(password, method=method)
+    return True, None
+
+
+def method_of(pwhash):
+    """The werkzeug method string a hash was made with."""
+    return (pwhash or "").split("$", 1)[0]
+
+
+def normalize_method(method):
+    """The full method string werkzeug records for `method` (fills in defaults)."""
+    return method_of(generate_password_hash("", method=method))
+
+
+class _HasherState:
+    def __init__(self, method, workers, max_pending):
+        self.method = method
+        self.workers = workers
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.lock = threading.Lock()
+        self.pool = None
+        self.stats = {"hashed": 0, "verified": 0, "rehashed": 0, "rejected": 0}
+
+    def executor(self):
+        # Created on first use, so a pre-forking server forks before the
+        # pool's processes exist
+        with self.lock:
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(max_workers=self.workers)
+                atexit.register(self.pool.shutdown, wait=False)
+            return self.pool
+
+
+class PasswordHasher:
+    """Flask extension running password key derivation on a process pool."""
+
+    def init_app(self, app):
+        app.config.setdefault("PASSWORD_HASH_METHOD", DEFAULT_METHOD)
+        # 0 hashes inline on the calling thread (no pool)
+        app.config.setdefault("PASSWORD_HASH_WORKERS", 2)
+        # Jobs admitted at once (running + waiting); more are refused
+        app.config.setdefault("PASSWORD_HASH_MAX_PENDING", 8)
+        app.config.setdefault("PASSWORD_HASH_TIMEOUT_SECONDS", 10)
+
+        app.extensions["password_hasher"] = _HasherState(
+            normalize_method(app.config["PASSWORD_HASH_METHOD"]),
+            app.config["PASSWORD_HASH_WORKERS"],
+            app.config["PASSWORD_HASH_MAX_PENDING"],
+        )
+
+    def _run(self, fn, *args):
+        if not has_app_context() or "password_hasher" not in current_app.extensions:
+            # Scripts and shells without the extension hash inline
+            return fn(*args)
+
+        state = current_app.extensions["password_hasher"]
+        if not state.slots.acquire(blocking=False):
+            with state.lock:
+                state.stats["rejected"] += 1
+            raise HasherBusy("Too many sign-ins in progress, please retry")
+        if state.workers <= 0:
+            try:
+                return fn(*args)
+            finally:
+                state.slots.release()
+
+        try:
+            future = state.executor().submit(fn, *args)
+        except BaseException:
+            state.slots.release()
+            raise
+        # The slot stays taken until the job really ends: a caller that
+        # stops waiting does not stop the worker process
+        future.add_done_callback(lambda _: state.slots.release())
+        try:
+            return future.result(timeout=current_app.config["PASSWORD_HASH_TIMEOUT_SECONDS"])
+        except FutureTimeout:
+            future.cancel()
+            raise HasherBusy("Password hashing timed out, please retry")
+
+    def _count(self, name):
+        if has_app_context() and "password_hasher" in current_app.extensions:
+            state = current_app.extensions["password_hasher"]
+            with state.lock:
+                state.stats[name] += 1
+
+    def _method(self):
+        if has_app_context() and "password_hasher" in current_app.extensions:
+            return current_app.extensions["password_hasher"].method
+        return DEFAULT_METHOD
+
+    def hash(self, password):
+        """
+        Hash a password with the configured method.
+
+        Raises:
+            HasherBusy: the queue is full
+        """
+        pwhash = self._run(_hash, password, self._method())
+        self._count("hashed")
+        return pwhash
+
+    def verify(self, pwhash, password):
+        """
+        Check a password against a stored hash.
+
+        Returns:
+            (matches, new_hash) where new_hash is set when the stored hash
+            should be replaced with one using the configured parameters
+
+        Raises:
+            HasherBusy: the queue is full
+        """
+        matches, new_hash = self._run(_verify, pwhash, password, self._method())
+        self._count("verified")
+        if new_hash:
+            self._count("rehashed")
+        return matches, new_hash
+
+    def stats(self):
+        """Counters for this worker."""
+        state = current_app.extensions["password_hasher"]
+        with state.lock:
+            return dict(state.stats)
+
+
+# exported instance, initialised in create_app
+password_hasher = PasswordHasher()
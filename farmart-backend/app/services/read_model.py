@@ -0,0 +1,121 @@
+"""
+Listing Read Models
+Base class for per-worker, in-memory views over available listings.
+
+A read model is loaded from the database on first use and then kept
+current two ways:
+- refresh(*ids) from listing_changed() after this worker's own writes
+- an `updated_at` watermark catch-up every READ_MODEL_SYNC_SECONDS, which
+  picks up writes made by other workers
+"""
+
+import threading
+import time
+
+from flask import current_app
+
+from app import db
+from app.models import Livestock
+
+
+class ReadModelState:
+    """Per-app bookkeeping shared by every read model. Guarded by `lock`."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.loaded = False
+        self.watermark = None
+        self.last_sync = 0.0
+
+
+class ListingReadModel:
+    """
+    Flask extension base. Subclasses set `extension_key` and implement
+    `_columns`, `_new_state`, `_upsert` and `_remove`.
+    """
+
+    extension_key = None
+
+    def init_app(self, app):
+        app.config.setdefault("READ_MODEL_SYNC_SECONDS", 5)
+        app.extensions[self.extension_key] = self._new_state()
+
+    @property
+    def _state(self):
+        return current_app.extensions[self.extension_key]
+
+    # ---------- subclass hooks ----------
+
+    def _new_state(self):
+        return ReadModelState()
+
+    def _columns(self):
+        """Livestock columns the model needs, besides id/is_available/updated_at."""
+        raise NotImplementedError
+
+    def _upsert(self, state, row):
+        raise NotImplementedError
+
+    def _remove(self, state, livestock_id):
+        raise NotImplementedError
+
+    def _after_apply(self, state):
+        """Called (under the lock) after a batch of rows was applied."""
+
+    # ---------- synchronisation ----------
+
+    def _query(self):
+        return db.session.query(
+            Livestock.id, Livestock.is_available, Livestock.updated_at, *self._columns()
+        )
+
+    def _apply_rows(self, state, rows):
+        for row in rows:
+            if row.is_available:
+                self._upsert(state, row)
+            else:
+                self._remove(state, row.id)
+            if row.updated_at and (state.watermark is None or row.updated_at > state.watermark):
+                state.watermark = row.updated_at
+        self._after_apply(state)
+
+    def _ensure_fresh(self, state):
+        """Load on first use, then catch up on other workers' writes."""
+        interval = current_app.config["READ_MODEL_SYNC_SECONDS"]
+        if state.loaded and time.monotonic() - state.last_sync < interval:
+            return
+
+        query = self._query()
+        if not state.loaded:
+            rows = query.filter(Livestock.is_available.is_(True)).all()
+        elif state.watermark is not None:
+            # >= so rows sharing the watermark timestamp are not missed
+            rows = query.filter(Livestock.updated_at >= state.watermark).all()
+        else:
+            rows = query.all()
+
+        self._apply_rows(state, rows)
+        state.loaded = True
+        state.last_sync = time.monotonic()
+
+    def refresh(self, *livestock_ids):
+        """Add, refresh or drop listings after their rows are committed."""
+        state = self._state
+        with state.lock:
+            if not state.loaded or not livestock_ids:
+                # The first read loads everything, including these rows
+                return
+            rows = self._query().filter(Livestock.id.in_(livestock_ids)).all()
+            self._apply_rows(state, rows)
+
+    def remove(self, *livestock_ids):
+        """Drop listings (e.g. deleted rows)."""
+        state = self._state
+        with state.lock:
+            for livestock_id in livestock_ids:
+                self._remove(state, livestock_id)
+            self._after_apply(state)
+
+    def rebuild(self):
+        """Discard the model; the next read reloads it from the database."""
+        current_app.extensions[self.extension_key] = self._new_state()
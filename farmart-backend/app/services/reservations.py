@@ -0,0 +1,91 @@
+"""
+Listing Reservations
+Claiming listings for orders without double-selling.
+
+A claim is a conditional UPDATE (`... WHERE id IN (...) AND is_available`):
+the database flips is_available for exactly the listings that were still
+for sale, and concurrent claimers of the same listing cannot both win.
+A loser learns it lost from the statement's result alone, without
+reading the listing first.
+Where the backend supports UPDATE ... RETURNING (PostgreSQL, SQLite
+3.35+), the claimed rows' prices come back from the same statement.
+Elsewhere the candidates are read first and each is claimed with its own
+conditional UPDATE; only those whose rowcount is 1 count as claimed, as
+the read may be stale where FOR UPDATE is a no-op.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from app import db
+from app.models import Livestock
+
+# What an order needs from each claimed listing
+CLAIM_COLUMNS = (Livestock.id, Livestock.farmer_id, Livestock.price, Livestock.animal_type)
+
+
+def claim_listings(livestock_ids):
+    """
+    Mark every still-available listing in `livestock_ids` unavailable.
+
+    Runs in the caller's transaction (no commit), so rolling back releases
+    the claims.
+
+    Returns:
+        {livestock_id: row with id, farmer_id, price, animal_type} for the listings
+        this call claimed; the others were already taken or do not exist
+    """
+    livestock_ids = list(set(livestock_ids))
+    if not livestock_ids:
+        return {}
+
+    table = Livestock.__table__
+    claim = (
+        update(table)
+        .where(table.c.id.in_(livestock_ids), table.c.is_available.is_(True))
+        .values(is_available=False, updated_at=datetime.utcnow())
+    )
+
+    if db.engine.dialect.update_returning:
+        rows = db.session.execute(
+            claim.returning(*[table.c[column.key] for column in CLAIM_COLUMNS])
+        ).all()
+        return {row.id: row for row in rows}
+
+    # No RETURNING: read the candidates, then claim them one by one. A
+    # row another buyer took since the read matches nothing (rowcount 0)
+    rows = db.session.execute(
+        select(*CLAIM_COLUMNS)
+        .where(Livestock.id.in_(livestock_ids), Livestock.is_available.is_(True))
+        .with_for_update()
+    ).all()
+    return {
+        row.id: row
+        for row in rows
+        if db.session.execute(claim.where(table.c.id == row.id)).rowcount == 1
+    }
+
+
+def claim_listing(livestock_id):
+    """Claim a single listing; returns its row, or None if someone else has it."""
+    return claim_listings([livestock_id]).get(livestock_id)
+
+
+def release_listings(*livestock_ids):
+    """
+    Put listings back on sale (cancelled or refunded orders), in the
+    caller's transaction.
+
+    Returns:
+        Number of listings released
+    """
+    if not livestock_ids:
+        return 0
+    table = Livestock.__table__
+    result = db.session.execute(
+        update(table)
+        .where(table.c.id.in_(livestock_ids), table.c.is_available.is_(False))
+        .values(is_available=True, updated_at=datetime.utcnow())
+    )
+    return result.rowcount
@@ -0,0 +1,207 @@
+"""
+Livestock Search Index
+In-process inverted index with BM25 ranking and prefix matching.
+
+The index holds only available listings and is kept current like every
+other listing read model (see app.services.read_model).
+"""
+
+import math
+import re
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+from app.models import Livestock
+from app.services.read_model import ListingReadModel, ReadModelState
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Field weights (BM25F-lite): a match on species outranks one in free text
+FIELD_WEIGHTS = {
+    "animal_type": 3.0,
+    "breed": 2.0,
+    "location": 1.5,
+    "description": 1.0,
+    "reason_for_sale": 1.0,
+}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_PREFIX_EXPANSIONS = 50
+
+
+def tokenize(text):
+    """Lowercase and split text into alphanumeric tokens."""
+    if not text:
+        return []
+    return TOKEN_RE.findall(str(text).lower())
+
+
+class _IndexState(ReadModelState):
+    """Per-app index data. Guarded by `lock`."""
+
+    def __init__(self):
+        super().__init__()
+        self.postings = defaultdict(dict)  # token -> {doc_id: weighted tf}
+        self.field_postings = defaultdict(lambda: defaultdict(set))  # field -> token -> ids
+        self.doc_terms = {}  # doc_id -> {token: weighted tf}
+        self.doc_fields = {}  # doc_id -> {field: set(tokens)}
+        self.doc_length = {}  # doc_id -> weighted length
+        self.total_length = 0.0
+        self.vocabulary = []  # sorted tokens, for prefix lookups
+
+    # ---------- mutation ----------
+
+    def remove(self, doc_id):
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for token in terms:
+            docs = self.postings[token]
+            docs.pop(doc_id, None)
+            if not docs:
+                del self.postings[token]
+                i = bisect_left(self.vocabulary, token)
+                if i < len(self.vocabulary) and self.vocabulary[i] == token:
+                    self.vocabulary.pop(i)
+        for field, tokens in self.doc_fields.pop(doc_id, {}).items():
+            for token in tokens:
+                self.field_postings[field][token].discard(doc_id)
+        self.total_length -= self.doc_length.pop(doc_id, 0.0)
+
+    def upsert(self, doc_id, values):
+        self.remove(doc_id)
+
+        terms = defaultdict(float)
+        fields = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            tokens = tokenize(values.get(field))
+            if not tokens:
+                continue
+            fields[field] = set(tokens)
+            for token in tokens:
+                terms[token] += weight
+                self.field_postings[field][token].add(doc_id)
+
+        for token, tf in terms.items():
+            if token not in self.postings:
+                insort(self.vocabulary, token)
+            self.postings[token][doc_id] = tf
+
+        length = sum(terms.values())
+        self.doc_terms[doc_id] = dict(terms)
+        self.doc_fields[doc_id] = fields
+        self.doc_length[doc_id] = length
+        self.total_length += length
+
+    # ---------- lookup ----------
+
+    def expand(self, token, prefix):
+        """Return the vocabulary terms a query token matches."""
+        if not prefix:
+            return [token] if token in self.postings else []
+        matches = []
+        i = bisect_left(self.vocabulary, token)
+        while i < len(self.vocabulary) and self.vocabulary[i].startswith(token):
+            matches.append(self.vocabulary[i])
+            if len(matches) >= MAX_PREFIX_EXPANSIONS:
+                break
+            i += 1
+        return matches
+
+
+class LivestockSearch(ListingReadModel):
+    """Flask extension exposing the per-app livestock search index."""
+
+    extension_key = "livestock_search"
+
+    def _new_state(self):
+        return _IndexState()
+
+    def _columns(self):
+        return [getattr(Livestock, field) for field in FIELD_WEIGHTS]
+
+    def _upsert(self, state, row):
+        state.upsert(row.id, {field: getattr(row, field) for field in FIELD_WEIGHTS})
+
+    def _remove(self, state, livestock_id):
+        state.remove(livestock_id)
+
+    # ---------- queries ----------
+
+    def search(self, text, prefix=True, limit=None):
+        """
+        Rank available listings against a free-text query.
+
+        Every query token must match (AND semantics). With `prefix`, the
+        last token also matches any longer term ("goa" -> "goat").
+
+        Returns:
+            list of (livestock_id, score), best match first
+        """
+        tokens = tokenize(text)
+        if not tokens:
+            return []
+
+        state = self._state
+        with state.lock:
+            self._ensure_fresh(state)
+            n_docs = len(state.doc_terms)
+            if not n_docs:
+                return []
+            avg_length = state.total_length / n_docs
+
+            scores = None
+            for i, token in enumerate(tokens):
+                terms = state.expand(token, prefix and i == len(tokens) - 1)
+                token_scores = {}
+                for term in terms:
+                    docs = state.postings[term]
+                    idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                    for doc_id, tf in docs.items():
+                        norm = BM25_K1 * (1 - BM25_B + BM25_B * state.doc_length[doc_id] / avg_length)
+                        score = idf * tf * (BM25_K1 + 1) / (tf + norm)
+                        if score > token_scores.get(doc_id, 0.0):
+                            token_scores[doc_id] = score
+
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {
+                        doc_id: total + token_scores[doc_id]
+                        for doc_id, total in scores.items()
+                        if doc_id in token_scores
+                    }
+                if not scores:
+                    return []
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit] if limit else ranked
+
+    def match_field(self, field, text, prefix=True):
+        """
+        Return ids of available listings whose `field` contains every token
+        of `text` (the last token by prefix when `prefix` is set).
+        """
+        tokens = tokenize(text)
+        if not tokens:
+            return set()
+
+        state = self._state
+        with state.lock:
+            self._ensure_fresh(state)
+            field_index = state.field_postings[field]
+            result = None
+            for i, token in enumerate(tokens):
+                terms = state.expand(token, prefix and i == len(tokens) - 1)
+                ids = set()
+                for term in terms:
+                    ids |= field_index.get(term, set())
+                result = ids if result is None else result & ids
+                if not result:
+                    return set()
+            return result
+
+
+# exported instance, initialised in create_app
+livestock_search = LivestockSearch()
@@ -0,0 +1,256 @@
+"""
+User Statistics
+Maintains the UserStats rollup (listings, sales and revenue for farmers;
+orders, purchases and spend for buyers).
+
+A session `after_flush` hook turns every flushed Order insert/delete or
+status change, and every Livestock insert/delete, into `col = col + delta`
+UPDATEs on the affected users' rows, inside the same transaction. It
+covers every write that goes through the ORM unit of work (buyer routes,
+moderation, escrow, admin, CSV import) without each one having to
+remember. Bulk and Core statements (bulk_save_objects, insert()/delete()
+on these tables) bypass it: such a path must add its deltas itself, or
+be followed by `reconcile()`, which rebuilds the table in bulk from the
+base tables.
+
+A user's first activity creates the row with an upsert, so two
+transactions doing that at once never collide on the primary key: the
+second one adds its deltas to the row the first one inserted.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+import click
+from sqlalchemy import bindparam, event, func, inspect, select, update
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import Livestock, Order, OrderStatus, UserProfile, UserStats
+from app.utils.upsert import upsert
+
+STAT_FIELDS = (
+    "listings_count", "sales_count", "revenue_total",
+    "orders_count", "purchases_count", "spent_total",
+)
+
+
+def _money(value):
+    return Decimal(str(value or 0))
+
+
+def _compute(connection, user_ids=None):
+    """
+    {user_id: {field: value}} straight from the base tables.
+
+    Args:
+        user_ids: restrict to these users (None for everyone with activity)
+    """
+    delivered = Order.status == OrderStatus.DELIVERED
+
+    def scoped(query, column):
+        return query.where(column.in_(user_ids)) if user_ids is not None else query
+
+    queries = {
+        ("listings_count",): scoped(
+            select(Livestock.farmer_id, func.count()).group_by(Livestock.farmer_id),
+            Livestock.farmer_id,
+        ),
+        ("sales_count", "revenue_total"): scoped(
+            select(Livestock.farmer_id, func.count(), func.sum(Order.total_amount))
+            .join(Order, Order.livestock_id == Livestock.id)
+            .where(delivered)
+            .group_by(Livestock.farmer_id),
+            Livestock.farmer_id,
+        ),
+        ("orders_count",): scoped(
+            select(Order.buyer_id, func.count()).group_by(Order.buyer_id), Order.buyer_id
+        ),
+        ("purchases_count", "spent_total"): scoped(
+            select(Order.buyer_id, func.count(), func.sum(Order.total_amount))
+            .where(delivered)
+            .group_by(Order.buyer_id),
+            Order.buyer_id,
+        ),
+    }
+
+    stats = defaultdict(lambda: dict.fromkeys(STAT_FIELDS, 0))
+    # Users asked for by id get a row even with no activity
+    stats.update({user_id: dict.fromkeys(STAT_FIELDS, 0) for user_id in user_ids or ()})
+    for fields, query in queries.items():
+        for row in connection.execute(query):
+            for field, value in zip(fields, row[1:]):
+                stats[row[0]][field] = _money(value) if field.endswith("_total") else value
+    return stats
+
+
+# ---------- transactional maintenance ----------
+
+def _order_effects(order, status, sign, farmer_id):
+    """(user_id, field, delta) triples for an order counted under `status`."""
+    effects = [(order.buyer_id, "orders_count", sign)]
+    if status == OrderStatus.DELIVERED:
+        amount = _money(order.total_amount) * sign
+        effects += [
+            (order.buyer_id, "purchases_count", sign),
+            (order.buyer_id, "spent_total", amount),
+            (farmer_id, "sales_count", sign),
+            (farmer_id, "revenue_total", amount),
+        ]
+    return effects
+
+
+def _status_change(order):
+    """(old, new) if the order's status changed in this flush, else None."""
+    history = inspect(order).attrs.status.history
+    if not history.has_changes() or not history.deleted:
+        return None
+    old, new = history.deleted[0], order.status
+    return (old, new) if old != new else None
+
+
+def _collect_deltas(session):
+    deltas = defaultdict(lambda: defaultdict(int))
+
+    orders = []  # (order, [(status, sign), ...])
+    for obj in session.new:
+        if isinstance(obj, Order):
+            orders.append((obj, [(obj.status, 1)]))
+        elif isinstance(obj, Livestock):
+            deltas[obj.farmer_id]["listings_count"] += 1
+    for obj in session.deleted:
+        if isinstance(obj, Order):
+            orders.append((obj, [(obj.status, -1)]))
+        elif isinstance(obj, Livestock):
+            deltas[obj.farmer_id]["listings_count"] -= 1
+    for obj in session.dirty:
+        if isinstance(obj, Order):
+            change = _status_change(obj)
+            if change and OrderStatus.DELIVERED in change:
+                old, new = change
+                orders.append((obj, [(old, -1), (new, 1)]))
+
+    if orders:
+        # One lookup for the farmers behind all affected orders
+        livestock_ids = {order.livestock_id for order, _ in orders}
+        farmers = dict(session.connection().execute(
+            select(Livestock.id, Livestock.farmer_id).where(Livestock.id.in_(livestock_ids))
+        ).all())
+        for order, transitions in orders:
+            for status, sign in transitions:
+                for user_id, field, delta in _order_effects(
+                    order, status, sign, farmers.get(order.livestock_id)
+                ):
+                    if user_id is not None:
+                        deltas[user_id][field] += delta
+
+    return {
+        user_id: {field: delta for field, delta in fields.items() if delta}
+        for user_id, fields in deltas.items()
+        if any(fields.values())
+    }
+
+
+def _apply_deltas(session, flush_context):
+    deltas = _collect_deltas(session)
+    if not deltas:
+        return
+
+    connection = session.connection()
+    missing = []
+    for user_id, fields in deltas.items():
+        table = UserStats.__table__
+        result = connection.execute(
+            update(table)
+            .where(table.c.user_id == user_id)
+            .values({field: table.c[field] + delta for field, delta in fields.items()})
+        )
+        if result.rowcount == 0:
+            missing.append(user_id)
+
+    if missing:
+        # First activity (or never reconciled): compute the row whole; it
+        # already reflects this flush. If a concurrent transaction inserted
+        # the row meanwhile, its row lacks our changes, so add our deltas.
+        table = UserStats.__table__
+        for user_id, fields in _compute(connection, missing).items():
+            statement = upsert(connection, table).values(user_id=user_id, **fields)
+            connection.execute(statement.on_conflict_do_update(
+                index_elements=[table.c.user_id],
+                set_={
+                    field: table.c[field] + delta for field, delta in deltas[user_id].items()
+                },
+            ))
+
+
+def _insert(connection, stats):
+    if stats:
+        connection.execute(
+            UserStats.__table__.insert(),
+            [{"user_id": user_id, **fields} for user_id, fields in stats.items()],
+        )
+
+
+class UserStatsService:
+    """Registers the flush hook and offers reads and bulk reconciliation."""
+
+    _listening = False
+
+    def init_app(self, app):
+        if not UserStatsService._listening:
+            event.listen(Session, "after_flush", _apply_deltas)
+            UserStatsService._listening = True
+        app.cli.add_command(reconcile_user_stats_command)
+
+    def for_user(self, user):
+        """
+        The user's stats row. A user without one (no activity yet, or never
+        reconciled) gets an unsaved row computed from the base tables;
+        `reconcile()` is what persists missing rows.
+        """
+        if user.stats is not None:
+            return user.stats
+        fields = _compute(db.session.connection(), [user.id])[user.id]
+        return UserStats(user_id=user.id, **fields)
+
+    def reconcile(self):
+        """
+        Rebuild every row from the base tables in one transaction and copy
+        the delivered counts onto UserProfile.total_sales/total_purchases.
+
+        Returns:
+            Number of users with stats
+        """
+        connection = db.session.connection()
+        stats = _compute(connection)
+        table = UserStats.__table__
+        connection.execute(table.delete())
+        _insert(connection, stats)
+
+        profiles = UserProfile.__table__
+        connection.execute(
+            update(profiles).values(total_sales=0, total_purchases=0)
+        )
+        if stats:
+            connection.execute(
+                update(profiles)
+                .where(profiles.c.user_id == bindparam("b_user_id"))
+                .values(total_sales=bindparam("b_sales"), total_purchases=bindparam("b_purchases")),
+                [
+                    {"b_user_id": user_id, "b_sales": fields["sales_count"],
+                     "b_purchases": fields["purchases_count"]}
+                    for user_id, fields in stats.items()
+                ],
+            )
+        db.session.commit()
+        return len(stats)
+
+
+@click.command("reconcile-user-stats")
+def reconcile_user_stats_command():
+    """Rebuild the UserStats rollup from orders and listings."""
+    click.echo(f"Reconciled stats for {user_stats.reconcile()} users")
+
+
+# exported instance, initialised in create_app
+user_stats = UserStatsService()
@@ -0,0 +1,122 @@
+"""
+Listing View Counter
+Write-behind counting of listing detail views.
+
+Views are aggregated in memory per worker and written by a background
+flusher as one batched UPDATE. With VIEW_COUNTER_EVENTS set, each view is
+also queued as a `listing_view` event on the analytics pipeline. The
+detail page never waits on a write; counts lag by at most
+VIEW_COUNTER_FLUSH_SECONDS.
+"""
+
+import logging
+import threading
+from collections import Counter
+
+from flask import current_app
+from sqlalchemy import bindparam, update
+
+from app import db
+from app.models import Livestock
+from app.services.analytics import analytics_pipeline
+from app.utils.background import PeriodicFlusher
+
+logger = logging.getLogger(__name__)
+
+
+class _CounterState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = Counter()  # livestock_id -> unflushed views
+        self.flusher = None
+
+
+class ViewCounter:
+    """Flask extension buffering view increments for batched writes."""
+
+    def init_app(self, app):
+        # 0 disables the background flusher (call flush() yourself)
+        app.config.setdefault("VIEW_COUNTER_FLUSH_SECONDS", 10)
+        # Flush early once this many distinct listings are pending
+        app.config.setdefault("VIEW_COUNTER_MAX_PENDING", 5000)
+        # Also record a `listing_view` analytics event per view
+        app.config.setdefault("VIEW_COUNTER_EVENTS", False)
+
+        state = _CounterState()
+        if app.config["VIEW_COUNTER_FLUSH_SECONDS"] > 0:
+            state.flusher = PeriodicFlusher(
+                app, self.flush, app.config["VIEW_COUNTER_FLUSH_SECONDS"], "view-counter-flush"
+            )
+        app.extensions["view_counter"] = state
+
+    @property
+    def _state(self):
+        return current_app.extensions["view_counter"]
+
+    def record(self, livestock_id, user_id=None, ip_address=None, user_agent=None):
+        """Count one view. Never touches the database."""
+        state = self._state
+        with state.lock:
+            state.pending[livestock_id] += 1
+            backlog = len(state.pending)
+
+        if current_app.config["VIEW_COUNTER_EVENTS"]:
+            analytics_pipeline.track(
+                "listing_view",
+                user_id=user_id,
+                entity_type="livestock",
+                entity_id=livestock_id,
+                ip_address=ip_address,
+                user_agent=(user_agent or "")[:255] or None,
+            )
+
+        if state.flusher is not None:
+            state.flusher.start()
+            if backlog >= current_app.config["VIEW_COUNTER_MAX_PENDING"]:
+                state.flusher.wake()
+
+    def pending(self, livestock_id):
+        """Views recorded by this worker that are not yet in the database."""
+        state = self._state
+        with state.lock:
+            return state.pending.get(livestock_id, 0)
+
+    def flush(self):
+        """
+        Write buffered views in one batched UPDATE.
+
+        Returns:
+            Number of listings updated
+        """
+        state = self._state
+        with state.lock:
+            pending, state.pending = state.pending, Counter()
+        if not pending:
+            return 0
+
+        table = Livestock.__table__
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            # Keep updated_at as is: a view is not a listing change, and
+            # bumping it would churn read-model watermarks and ETags
+            .values(view_count=table.c.view_count + bindparam("b_views"),
+                    updated_at=table.c.updated_at)
+        )
+        try:
+            with db.engine.begin() as connection:
+                connection.execute(
+                    statement,
+                    [{"b_id": key, "b_views": views} for key, views in pending.items()],
+                )
+        except Exception:
+            # Put the counts back so the next flush retries them
+            logger.exception("View counter flush failed; retrying next cycle")
+            with state.lock:
+                state.pending.update(pending)
+            return 0
+        return len(pending)
+
+
+# exported instance, initialised in create_app
+view_counter = ViewCounter()
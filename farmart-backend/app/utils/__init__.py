@@ -4,6 +4,7 @@ FarmAT Utils Package
 
 from app.utils.decorators import farmer_required, buyer_required, admin_required
 from app.utils.validators import validate_email, validate_password, validate_phone
+from app.utils.dataloader import BatchLoader, loader_for
 
 __all__ = [
     "farmer_required",
@@ -12,4 +13,6 @@ __all__ = [
     "validate_email",
     "validate_password",
     "validate_phone",
+    "BatchLoader",
+    "loader_for",
 ]
@@ -0,0 +1,54 @@
+"""
+Background Flushers
+Per-worker daemon threads that periodically run a flush callable inside
+an app context. Used by the write-behind services (view counts, analytics).
+"""
+
+import atexit
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicFlusher:
+    """
+    Run `flush()` every `interval` seconds, or sooner after `wake()`.
+
+    The final flush also runs at interpreter exit, so a clean shutdown
+    does not lose buffered writes.
+    """
+
+    def __init__(self, app, flush, interval, name):
+        self.app = app
+        self.flush = flush
+        self.interval = interval
+        self.name = name
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the thread once; later calls are no-ops."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        atexit.register(self.run_once)
+
+    def wake(self):
+        self._wakeup.set()
+
+    def run_once(self):
+        with self.app.app_context():
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("%s flush failed", self.name)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.run_once()
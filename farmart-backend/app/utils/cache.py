@@ -0,0 +1,338 @@
+"""
+Response Cache
+Read-through caching of public GET responses with tag-based invalidation.
+
+Backends:
+- memory:// (default) per-worker LRU with TTL
+- redis://host:port/db shared across workers (requires the `redis` package)
+
+Invalidation bumps a per-tag version that is folded into every cache key,
+so dropping all pages that depend on a tag is O(1) and needs no key scan.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+
+from flask import current_app, g, request, make_response, Response
+
+# Optional: shared backend (install with: pip install redis)
+try:
+    import redis
+except ImportError:
+    redis = None
+
+CACHE_HEADER = "X-Cache"
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """In-process LRU cache with per-entry TTL. Thread-safe."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        # Tag versions live outside the LRU so eviction can never roll one back
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def get_counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._counters.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisCache:
+    """Shared cache backend on Redis; same interface as LRUCache."""
+
+    def __init__(self, url, prefix="farmart:cache:"):
+        if redis is None:
+            raise RuntimeError("CACHE_URL points at Redis but the redis package is not installed")
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def get(self, key):
+        value = self._client.get(self._prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl):
+        self._client.set(self._prefix + key, json.dumps(value), ex=max(int(ttl), 1))
+
+    def delete(self, key):
+        self._client.delete(self._prefix + key)
+
+    def get_counter(self, key):
+        value = self._client.get(self._prefix + key)
+        return int(value) if value is not None else 0
+
+    def incr(self, key):
+        return self._client.incr(self._prefix + key)
+
+    def clear(self):
+        for key in self._client.scan_iter(self._prefix + "*"):
+            self._client.delete(key)
+
+    def __len__(self):
+        return sum(1 for _ in self._client.scan_iter(self._prefix + "*"))
+
+
+class ResponseCache:
+    """Flask extension providing the `cached` view decorator."""
+
+    def init_app(self, app):
+        app.config.setdefault("CACHE_URL", "memory://")
+        app.config.setdefault("CACHE_DEFAULT_TTL", 30)
+        app.config.setdefault("CACHE_MAX_ENTRIES", 1024)
+
+        url = app.config["CACHE_URL"]
+        if url.startswith("redis://") or url.startswith("rediss://"):
+            backend = RedisCache(url)
+        else:
+            backend = LRUCache(app.config["CACHE_MAX_ENTRIES"])
+
+        app.extensions["response_cache"] = {
+            "backend": backend,
+            "stats": {"hits": 0, "misses": 0, "invalidations": 0},
+            "lock": threading.Lock(),
+        }
+
+    @property
+    def _ext(self):
+        return current_app.extensions["response_cache"]
+
+    @property
+    def backend(self):
+        return self._ext["backend"]
+
+    def _count(self, name, n=1):
+        ext = self._ext
+        with ext["lock"]:
+            ext["stats"][name] += n
+
+    def stats(self):
+        """Hit/miss counters for this worker."""
+        ext = self._ext
+        with ext["lock"]:
+            stats = dict(ext["stats"])
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["entries"] = len(ext["backend"])
+        return stats
+
+    # ---------- keys ----------
+
+    @staticmethod
+    def _normalized_args():
+        """Query parameters sorted and with empty values dropped."""
+        return sorted(
+            (key, value) for key, value in request.args.items(multi=True) if value != ""
+        )
+
+    def _versions(self, tags):
+        backend = self.backend
+        return [(tag, backend.get_counter("tag:" + tag)) for tag in tags]
+
+    def _key(self, tags):
+        versions = self._versions(tags)
+        # Under @conditional the row validator is part of the key, so a
+        # body is only served under the validator it was cached with
+        raw = json.dumps(
+            [
+                request.endpoint,
+                request.view_args,
+                self._normalized_args(),
+                versions,
+                g.get("response_etag"),
+            ],
+            sort_keys=True,
+            default=str,
+        )
+        return "resp:" + hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    # ---------- API ----------
+
+    def cached(self, tags, ttl=None):
+        """
+        Cache a GET view's 200 responses.
+
+        Args:
+            tags: callable receiving the view kwargs and returning the tags
+                the response depends on; invalidating any of them evicts it
+            ttl: seconds to keep the entry (default CACHE_DEFAULT_TTL)
+        """
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method != "GET":
+                    return view(*args, **kwargs)
+
+                key = self._key(tags(**kwargs))
+                entry = self.backend.get(key)
+                if entry is not None:
+                    self._count("hits")
+                    response = Response(entry["body"], status=200, mimetype=entry["mimetype"])
+                    response.headers[CACHE_HEADER] = "HIT"
+                    return response
+
+                self._count("misses")
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200:
+                    self.backend.set(
+                        key,
+                        {"body": response.get_data(as_text=True), "mimetype": response.mimetype},
+                        ttl or current_app.config["CACHE_DEFAULT_TTL"],
+                    )
+                response.headers[CACHE_HEADER] = "MISS"
+                return response
+
+            return wrapper
+
+        return decorator
+
+    def cached_validator(self, tags, validator, ttl=None):
+        """
+        Memoize a @conditional validator under the same tags as the response.
+
+        With the response under `cached`, a repeat request (304 or 200)
+        then runs no query at all; invalidating a tag drops both. A None
+        result (row not found) is not memoized.
+
+        Args:
+            tags: callable receiving the view kwargs, as for `cached`
+            validator: callable returning (etag, last_modified) or None
+            ttl: seconds to keep the entry (default CACHE_DEFAULT_TTL)
+        """
+
+        @wraps(validator)
+        def wrapper(**kwargs):
+            versions = self._versions(tags(**kwargs))
+            raw = json.dumps(
+                [validator.__module__, validator.__qualname__, kwargs, versions],
+                sort_keys=True,
+                default=str,
+            )
+            key = "val:" + hashlib.sha1(raw.encode("utf-8")).hexdigest()
+            entry = self.backend.get(key)
+            if entry is not None:
+                last_modified = entry["last_modified"]
+                return entry["etag"], datetime.fromisoformat(last_modified) if last_modified else None
+
+            validators = validator(**kwargs)
+            if validators is not None:
+                etag, last_modified = validators
+                self.backend.set(
+                    key,
+                    {
+                        "etag": etag,
+                        "last_modified": last_modified.isoformat() if last_modified else None,
+                    },
+                    ttl or current_app.config["CACHE_DEFAULT_TTL"],
+                )
+            return validators
+
+        return wrapper
+
+    def stale_while_revalidate(self, key, compute, ttl, stale_ttl):
+        """
+        Memoize `compute()` (JSON-able result) under `key`.
+
+        Fresh for `ttl` seconds; for a further `stale_ttl` seconds the old
+        value is served while one background thread recomputes it, so only
+        the first caller after a cold start ever waits.
+
+        Returns:
+            (value, state) with state "fresh", "stale" or "miss"
+        """
+        backend = self.backend
+        key = "swr:" + key
+        entry = backend.get(key)
+        now = time.time()
+
+        if entry is not None:
+            age = now - entry["at"]
+            if age < ttl:
+                return entry["value"], "fresh"
+            self._revalidate(key, compute, ttl + stale_ttl)
+            return entry["value"], "stale"
+
+        value = compute()
+        backend.set(key, {"value": value, "at": now}, ttl + stale_ttl)
+        return value, "miss"
+
+    def _revalidate(self, key, compute, keep):
+        ext = self._ext
+        with ext["lock"]:
+            refreshing = ext.setdefault("refreshing", set())
+            if key in refreshing:
+                return
+            refreshing.add(key)
+
+        app = current_app._get_current_object()
+
+        def refresh():
+            try:
+                with app.app_context():
+                    value = compute()
+                    self.backend.set(key, {"value": value, "at": time.time()}, keep)
+            except Exception:
+                logger.exception("Background refresh of %s failed", key)
+            finally:
+                with ext["lock"]:
+                    refreshing.discard(key)
+
+        threading.Thread(target=refresh, name="swr-refresh", daemon=True).start()
+
+    def invalidate(self, *tags):
+        """Evict every cached response that depends on any of `tags`."""
+        for tag in tags:
+            self.backend.incr("tag:" + tag)
+        self._count("invalidations", len(tags))
+
+    def clear(self):
+        self.backend.clear()
+
+
+# exported instance, initialised in create_app
+response_cache = ResponseCache()
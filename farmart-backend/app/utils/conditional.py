@@ -0,0 +1,104 @@
+"""
+Conditional GET Helpers
+ETag / If-None-Match and Last-Modified / If-Modified-Since support.
+
+Validators are computed from cheap aggregate queries (max(updated_at),
+row count) before the view runs, so a 304 never pays for serialization.
+"""
+
+import hashlib
+import json
+from datetime import timezone
+from functools import wraps
+
+from flask import g, request, make_response, Response
+from sqlalchemy import func
+
+
+def make_etag(*parts):
+    """Hash arbitrary JSON-able parts into an ETag value."""
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def _as_http_date(value):
+    """Naive UTC datetime -> aware, second resolution (HTTP-date precision)."""
+    if value is None:
+        return None
+    return value.replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def aggregate_validator(query, updated_columns, *parts):
+    """
+    Build (etag, last_modified) for a list endpoint from one aggregate query.
+
+    Args:
+        query: The list query with its filters applied (no ORDER BY/LIMIT)
+        updated_columns: updated_at columns whose max() marks a change
+        parts: Extra values folded into the ETag (page, filters, user)
+
+    Returns:
+        (etag, last_modified)
+    """
+    row = query.order_by(None).with_entities(
+        func.count(), *[func.max(column) for column in updated_columns]
+    ).one()
+    count, maxima = row[0], [m for m in row[1:] if m is not None]
+    last_modified = max(maxima) if maxima else None
+    return make_etag(count, *row[1:], *parts), last_modified
+
+
+def request_args_part():
+    """Query parameters normalised for inclusion in an ETag."""
+    return sorted(request.args.items(multi=True))
+
+
+def _is_not_modified(etag, last_modified):
+    if request.if_none_match:
+        # Weak comparison is the rule for GET (RFC 9110 13.1.2)
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified is not None:
+        return _as_http_date(last_modified) <= request.if_modified_since
+    return False
+
+
+def _set_validators(response, etag, last_modified):
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = _as_http_date(last_modified)
+    return response
+
+
+def conditional(validator):
+    """
+    Answer conditional GETs with 304 before the view runs.
+
+    Args:
+        validator: callable receiving the view kwargs and returning
+            (etag, last_modified), or None to skip (e.g. row not found)
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(*args, **kwargs)
+
+            validators = validator(**kwargs)
+            if validators is None:
+                return view(*args, **kwargs)
+
+            etag, last_modified = validators
+            # Lets an inner response cache key on the same validator
+            g.response_etag = etag
+            if _is_not_modified(etag, last_modified):
+                return _set_validators(Response(status=304), etag, last_modified)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                _set_validators(response, etag, last_modified)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,53 @@
+"""
+Batched Loader
+DataLoader-style, per-request batching of primary/foreign key lookups
+"""
+
+from flask import g
+
+
+class BatchLoader:
+    """
+    Load rows of one model by a key column, batching misses into a single
+    IN query and caching hits for the rest of the request.
+
+    Usage:
+        farmers = loader_for(User).load_many(item.farmer_id for item in page)
+        farmers.get(item.farmer_id)
+    """
+
+    def __init__(self, model, key=None):
+        self.model = model
+        self.key = key if key is not None else model.__mapper__.primary_key[0]
+        self._cache = {}
+
+    def prime(self, *objects):
+        """Seed the cache with rows the caller already holds."""
+        for obj in objects:
+            self._cache[getattr(obj, self.key.key)] = obj
+
+    def load_many(self, keys):
+        """Return {key: row} for every key that exists, in one query at most."""
+        keys = {k for k in keys if k is not None}
+        missing = [k for k in keys if k not in self._cache]
+
+        if missing:
+            for row in self.model.query.filter(self.key.in_(missing)).all():
+                self._cache[getattr(row, self.key.key)] = row
+            for k in missing:
+                self._cache.setdefault(k, None)
+
+        return {k: self._cache[k] for k in keys if self._cache[k] is not None}
+
+    def load(self, key):
+        """Return a single row (or None), batched with any other pending keys."""
+        return self.load_many([key]).get(key)
+
+
+def loader_for(model, key=None):
+    """Return the request-scoped loader for `model` keyed on `key`."""
+    loaders = g.setdefault("_batch_loaders", {})
+    cache_key = (model, key.key if key is not None else None)
+    if cache_key not in loaders:
+        loaders[cache_key] = BatchLoader(model, key)
+    return loaders[cache_key]
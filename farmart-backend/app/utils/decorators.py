@@ -1,78 +1,57 @@
 """
 Decorators
 @farmer_required, @admin_required logic
+
+Each decorator verifies the JWT itself, so routes need no separate
+@jwt_required(). Role comes from the token's claims and deactivation from
+the access-control snapshot; neither costs a query per request.
 """
 
 from functools import wraps
 from flask import jsonify
-from flask_jwt_extended import get_jwt_identity, jwt_required
+from flask_jwt_extended import get_jwt, get_jwt_identity, verify_jwt_in_request
 from app.models import User
+from app.services.access_control import access_control
 
 
-def farmer_required(f):
-    """Decorator to require farmer role."""
-
-    @wraps(f)
-    @jwt_required()
-    def decorated_function(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-
-        if not user:
-            return jsonify({"error": "User not found"}), 404
+def _role_required(role, message):
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            verify_jwt_in_request()
+            current_user_id = get_jwt_identity()
 
-        if user.role != "farmer":
-            return jsonify({"error": "Farmer access required"}), 403
+            user_role = get_jwt().get("role")
+            if user_role is None:
+                # Token issued before roles were added to the claims
+                user = User.query.get(current_user_id)
+                if not user:
+                    return jsonify({"error": "User not found"}), 404
+                user_role = user.role
 
-        if not user.is_active:
-            return jsonify({"error": "Account is deactivated"}), 403
+            if user_role != role:
+                return jsonify({"error": message}), 403
 
-        return f(*args, **kwargs)
+            if access_control.is_deactivated(current_user_id):
+                return jsonify({"error": "Account is deactivated"}), 403
 
-    return decorated_function
+            return f(*args, **kwargs)
 
+        return decorated_function
 
-def buyer_required(f):
-    """Decorator to require buyer role."""
-
-    @wraps(f)
-    @jwt_required()
-    def decorated_function(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+    return decorator
 
-        if not user:
-            return jsonify({"error": "User not found"}), 404
 
-        if user.role != "buyer":
-            return jsonify({"error": "Buyer access required"}), 403
-
-        if not user.is_active:
-            return jsonify({"error": "Account is deactivated"}), 403
+def farmer_required(f):
+    """Decorator to require farmer role."""
+    return _role_required("farmer", "Farmer access required")(f)
 
-        return f(*args, **kwargs)
 
-    return decorated_function
+def buyer_required(f):
+    """Decorator to require buyer role."""
+    return _role_required("buyer", "Buyer access required")(f)
 
 
 def admin_required(f):
     """Decorator to require admin role."""
-
-    @wraps(f)
-    @jwt_required()
-    def decorated_function(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
-
-        if not user:
-            return jsonify({"error": "User not found"}), 404
-
-        if user.role != "admin":
-            return jsonify({"error": "Admin access required"}), 403
-
-        if not user.is_active:
-            return jsonify({"error": "Account is deactivated"}), 403
-
-        return f(*args, **kwargs)
-
-    return decorated_function
+    return _role_required("admin", "Admin access required")(f)
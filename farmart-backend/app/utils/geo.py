@@ -0,0 +1,91 @@
+"""
+Geospatial Helpers
+Geohash encoding, radius bounding boxes and vectorized haversine distance
+"""
+
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 9  # ~5m cells; stored on every located listing
+
+# Upper bound on prefix ranges per proximity query
+MAX_COVER_CELLS = 16
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Encode a coordinate as a geohash string."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+
+    while len(chars) < precision:
+        rng, value = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+
+    return "".join(chars)
+
+
+def _cell_size(precision):
+    """(lat_degrees, lon_degrees) covered by one geohash cell."""
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """(min_lat, min_lon, max_lat, max_lon) enclosing a radius around a point."""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    dlon = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(latitude)), 0.01))
+    return (
+        max(latitude - dlat, -90.0),
+        max(longitude - dlon, -180.0),
+        min(latitude + dlat, 90.0),
+        min(longitude + dlon, 180.0),
+    )
+
+
+def covering_cells(box):
+    """
+    Geohash prefixes whose cells together cover `box`.
+
+    Picks the finest precision that needs at most MAX_COVER_CELLS cells, so
+    each prefix becomes one short index range scan.
+    """
+    min_lat, min_lon, max_lat, max_lon = box
+
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        cell_lat, cell_lon = _cell_size(precision)
+        rows = math.ceil((max_lat - min_lat) / cell_lat) + 1
+        cols = math.ceil((max_lon - min_lon) / cell_lon) + 1
+        if rows * cols <= MAX_COVER_CELLS or precision == 1:
+            break
+
+    lats = [min(min_lat + i * cell_lat, max_lat) for i in range(rows)] + [max_lat]
+    lons = [min(min_lon + j * cell_lon, max_lon) for j in range(cols)] + [max_lon]
+    return sorted({encode_geohash(lat, lon, precision) for lat in lats for lon in lons})
+
+
+def haversine_km(latitude, longitude, latitudes, longitudes):
+    """Great-circle distances (km) from one point to arrays of points."""
+    lat1 = math.radians(latitude)
+    lat2 = np.radians(np.asarray(latitudes, dtype=float))
+    dlat = lat2 - lat1
+    dlon = np.radians(np.asarray(longitudes, dtype=float) - longitude)
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
@@ -0,0 +1,165 @@
+"""
+Order Numbers
+Unique, sortable order numbers generated in-process (no database round trip).
+
+    ORD-20261016-0X4K9-Q2M7P-A0B3C
+
+After the UTC date come 15 fixed-width Crockford base32 characters
+packing, most significant first:
+- milliseconds since midnight UTC (27 bits)
+- host id (10 bits): ORDER_NUMBER_HOST_ID, or derived from the hostname
+- process id (22 bits, Linux's pid_max)
+- per-process sequence within the millisecond (12 bits)
+
+Numbers are strictly increasing within a process (the clock is never
+allowed to run backwards, and a sequence overflow borrows the next
+millisecond) and sort by time across processes, so they compare
+correctly as plain strings and can serve as a keyset pagination key.
+Two live processes on one host never share a pid; across hosts,
+uniqueness rests on distinct host ids, so set ORDER_NUMBER_HOST_ID
+(0-1023) per host when running more than one.
+"""
+
+import os
+import socket
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+PREFIX = "ORD"
+
+# Crockford base32: no I, L, O, U; ASCII order matches numeric order
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+MS_BITS, HOST_BITS, PID_BITS, SEQ_BITS = 27, 10, 22, 12
+SUFFIX_CHARS = 15  # ceil(71 bits / 5)
+
+MS_PER_DAY = 86400000
+EPOCH = datetime(1970, 1, 1)
+
+
+def _encode(value, width):
+    chars = []
+    for _ in range(width):
+        value, digit = divmod(value, 32)
+        chars.append(ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+def _decode(text):
+    value = 0
+    for char in text:
+        value = value * 32 + ALPHABET.index(char)
+    return value
+
+
+def default_host_id():
+    """A stable host id from the hostname (set ORDER_NUMBER_HOST_ID to be sure)."""
+    return zlib.crc32(socket.gethostname().encode()) % (1 << HOST_BITS)
+
+
+def format_order_number(epoch_ms, host_id, pid, sequence):
+    day, ms_of_day = divmod(epoch_ms, MS_PER_DAY)
+    date = (EPOCH + timedelta(days=day)).strftime("%Y%m%d")
+    value = ms_of_day
+    value = (value << HOST_BITS) | host_id
+    value = (value << PID_BITS) | (pid % (1 << PID_BITS))
+    value = (value << SEQ_BITS) | sequence
+    suffix = _encode(value, SUFFIX_CHARS)
+    return f"{PREFIX}-{date}-{suffix[:5]}-{suffix[5:10]}-{suffix[10:]}"
+
+
+def parse_order_number(order_number):
+    """
+    Split an order number into its parts.
+
+    Returns:
+        dict with issued_at (UTC datetime), host_id, pid and sequence
+
+    Raises:
+        ValueError: not an order number in this format
+    """
+    try:
+        prefix, date, *groups = order_number.split("-")
+        suffix = "".join(groups)
+        if prefix != PREFIX or len(suffix) != SUFFIX_CHARS:
+            raise ValueError
+        day = datetime.strptime(date, "%Y%m%d")
+        value = _decode(suffix)
+    except ValueError:
+        raise ValueError(f"Not an order number: {order_number!r}") from None
+
+    sequence = value & ((1 << SEQ_BITS) - 1)
+    value >>= SEQ_BITS
+    pid = value & ((1 << PID_BITS) - 1)
+    value >>= PID_BITS
+    host_id = value & ((1 << HOST_BITS) - 1)
+    ms_of_day = value >> HOST_BITS
+    return {
+        "issued_at": day + timedelta(milliseconds=ms_of_day),
+        "host_id": host_id,
+        "pid": pid,
+        "sequence": sequence,
+    }
+
+
+class OrderNumberGenerator:
+    """
+    Flask extension handing out order numbers.
+
+    The clock and sequence are per process (shared by every app in it), so
+    numbers stay unique even when several apps live in one interpreter.
+    """
+
+    def __init__(self):
+        self._reset()
+        if hasattr(os, "register_at_fork"):
+            # A lock held by another thread at fork time would never be released
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._last_ms = 0
+        self._sequence = 0
+
+    def init_app(self, app):
+        # None derives the host id from the hostname
+        app.config.setdefault("ORDER_NUMBER_HOST_ID", None)
+        host_id = app.config["ORDER_NUMBER_HOST_ID"]
+        if host_id is None:
+            host_id = default_host_id()
+        if not 0 <= int(host_id) < (1 << HOST_BITS):
+            raise ValueError(f"ORDER_NUMBER_HOST_ID must be 0-{(1 << HOST_BITS) - 1}")
+        app.extensions["order_numbers"] = int(host_id)
+
+    def _tick(self, now_ms):
+        """Next (ms, sequence) for this process; callers hold the lock."""
+        pid = os.getpid()
+        if pid != self._pid:
+            # Forked: a new pid is a fresh namespace, so restart the sequence
+            self._pid, self._last_ms, self._sequence = pid, 0, 0
+
+        if now_ms > self._last_ms:
+            self._last_ms, self._sequence = now_ms, 0
+        else:
+            # Same millisecond, or the wall clock stepped back: stay on ours
+            self._sequence += 1
+            if self._sequence >= (1 << SEQ_BITS):
+                self._last_ms, self._sequence = self._last_ms + 1, 0
+        return self._last_ms, self._sequence
+
+    def next(self):
+        """A new order number for the current app's host."""
+        host_id = current_app.extensions["order_numbers"]
+        with self._lock:
+            epoch_ms, sequence = self._tick(time.time_ns() // 1000000)
+            pid = self._pid
+        return format_order_number(epoch_ms, host_id, pid, sequence)
+
+
+# exported instance, initialised in create_app
+order_numbers = OrderNumberGenerator()
@@ -0,0 +1,108 @@
+"""
+Keyset (cursor) Pagination Helpers
+Opaque cursors for stable, constant-cost paging over sorted queries
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client supplies a cursor we did not issue."""
+
+
+def clamp_limit(limit, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Clamp a requested page size to [1, maximum]."""
+    if not limit or limit < 1:
+        return default
+    return min(limit, maximum)
+
+
+def encode_cursor(values):
+    """Encode the sort-key tuple of the last row into an opaque token."""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, types):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        token: Opaque cursor string from the client
+        types: Sequence of expected Python types for each key column
+
+    Returns:
+        tuple of decoded values, one per key column
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise InvalidCursor("Malformed cursor")
+
+        decoded = []
+        for value, expected in zip(values, types):
+            if expected is datetime:
+                decoded.append(datetime.fromisoformat(value))
+            else:
+                decoded.append(expected(value))
+        return tuple(decoded)
+    except InvalidCursor:
+        raise
+    except (ValueError, TypeError, UnicodeError):
+        raise InvalidCursor("Malformed cursor")
+
+
+def keyset_filter(columns, values, descending):
+    """
+    Build the WHERE clause that resumes a (col1, col2, ...) ordering
+    strictly after the given key values.
+
+    Expanded into OR/AND form rather than a row-value comparison so it
+    works on every backend and can still use a composite index.
+    """
+    clauses = []
+    for i, column in enumerate(columns):
+        equal_prefix = [columns[j] == values[j] for j in range(i)]
+        step = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal_prefix, step))
+    return or_(*clauses)
+
+
+def keyset_page(query, columns, types, cursor, limit, descending=False):
+    """
+    Fetch one page of a keyset-paginated query.
+
+    Args:
+        query: Base query (filters applied, no ORDER BY)
+        columns: Sort key columns; the last one must be unique (e.g. id)
+        types: Python types used to decode the cursor values
+        cursor: Opaque cursor from the previous page, or None
+        limit: Page size (already clamped)
+        descending: Sort direction applied to every key column
+
+    Returns:
+        (items, next_cursor) where next_cursor is None on the last page
+    """
+    if cursor:
+        values = decode_cursor(cursor, types)
+        query = query.filter(keyset_filter(columns, values, descending))
+
+    ordering = [c.desc() if descending else c.asc() for c in columns]
+    rows = query.order_by(*ordering).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, c.key) for c in columns])
+
+    return rows, next_cursor
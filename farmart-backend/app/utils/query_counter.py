@@ -0,0 +1,32 @@
+"""
+Query Counter
+Counts SQL statements per request and reports them in debug mode
+"""
+
+from flask import g, has_request_context
+from sqlalchemy import event
+
+QUERY_COUNT_HEADER = "X-Query-Count"
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.query_count = g.get("query_count", 0) + 1
+
+
+def init_query_counter(app, engine):
+    """
+    Attach the counter to `engine` and expose the per-request total as an
+    X-Query-Count response header. Only enabled in debug mode or when
+    QUERY_COUNT_HEADER is set in config.
+    """
+    if not (app.debug or app.config.get("QUERY_COUNT_HEADER")):
+        return
+
+    if not event.contains(engine, "before_cursor_execute", _count_query):
+        event.listen(engine, "before_cursor_execute", _count_query)
+
+    @app.after_request
+    def add_query_count(response):
+        response.headers[QUERY_COUNT_HEADER] = str(g.get("query_count", 0))
+        return response
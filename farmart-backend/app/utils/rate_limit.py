@@ -0,0 +1,447 @@
+"""
+Rate Limiting
+Per-route and per-role request limits with storage shared across workers.
+
+Strategies:
+- sliding-window: a log of hit timestamps; at most N hits in any window
+  of the given length (no 2x burst at fixed-window boundaries)
+- token-bucket: N tokens refilled evenly over the period; smooth rate
+  with bursts of up to N
+
+Storage (RATELIMIT_STORAGE_URI):
+- memory:// per-worker counters (tests, single process)
+- sqlite:///path/to/file.db shared by every worker on the host
+- redis://host:port/db shared across hosts (requires the `redis` package)
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+from collections import deque, namedtuple
+from functools import wraps
+
+from flask import current_app, g, jsonify, request
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+
+# Optional: shared backend across hosts (install with: pip install redis)
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ("sliding-window", "token-bucket")
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+Limit = namedtuple("Limit", "amount seconds")
+
+# allowed, hits left, seconds until the next hit would be allowed
+Decision = namedtuple("Decision", "allowed remaining retry_after")
+
+_LIMIT_PATTERN = re.compile(r"^\s*(\d+)\s*(?:/|per)\s*(\d+)?\s*(second|minute|hour|day)s?\s*$")
+
+
+def parse_limit(text):
+    """
+    Parse "5 per minute", "5/minute" or "100 per 10 seconds".
+
+    Raises:
+        ValueError: unrecognised format
+    """
+    match = _LIMIT_PATTERN.match(text.lower())
+    if not match:
+        raise ValueError(f"Invalid rate limit: {text!r}")
+    amount, multiple, period = match.groups()
+    return Limit(int(amount), int(multiple or 1) * PERIODS[period])
+
+
+# ---------- backends ----------
+
+class MemoryStorage:
+    """Per-process storage. Thread-safe, pruned as it grows."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._logs = {}  # key -> deque of hit timestamps
+        self._buckets = {}  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def sliding_window(self, key, limit, now):
+        with self._lock:
+            log = self._logs.setdefault(key, deque())
+            while log and log[0] <= now - limit.seconds:
+                log.popleft()
+            if len(log) < limit.amount:
+                log.append(now)
+                decision = Decision(True, limit.amount - len(log), 0.0)
+            else:
+                decision = Decision(False, 0, log[0] + limit.seconds - now)
+            if len(self._logs) > self.max_keys:
+                self._prune(now)
+            return decision
+
+    def token_bucket(self, key, limit, now):
+        rate = limit.amount / limit.seconds
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (limit.amount, now))
+            tokens = min(limit.amount, tokens + (now - updated_at) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                decision = Decision(True, int(tokens), 0.0)
+            else:
+                decision = Decision(False, 0, (1 - tokens) / rate)
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+            return decision
+
+    def _prune(self, now):
+        # Drop keys idle for a day: their windows are long gone and their
+        # buckets are full again for every limit we configure
+        stale = now - PERIODS["day"]
+        self._logs = {k: v for k, v in self._logs.items() if v and v[-1] > stale}
+        self._buckets = {k: v for k, v in self._buckets.items() if v[1] > stale}
+
+    def clear(self):
+        with self._lock:
+            self._logs.clear()
+            self._buckets.clear()
+
+
+# Connections a forked child inherited. Closing one in the child would
+# release the child's own POSIX locks on the file (and SQLite's shared
+# lock bookkeeping came from the parent), so they stay open, unused, for
+# the child's lifetime.
+_INHERITED_CONNECTIONS = []
+
+
+def _close_connections(connections):
+    """Close this process's connections; keep (never close) inherited ones."""
+    pid = os.getpid()
+    for (owner, _), connection in list(connections.items()):
+        if owner == pid:
+            connection.close()
+        else:
+            _INHERITED_CONNECTIONS.append(connection)
+    connections.clear()
+
+
+class SQLiteStorage:
+    """
+    Host-wide storage in a SQLite file (WAL mode).
+
+    Each hit is one short BEGIN IMMEDIATE transaction, so concurrent
+    workers serialise on the file lock and never double-count.
+    """
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        # (pid, thread id) -> connection. sqlite3 connections are only freed
+        # by the cyclic garbage collector, so they are closed explicitly
+        # when the storage goes away, and never in a forked child.
+        self._connections = {}
+        weakref.finalize(self, _close_connections, self._connections)
+        self._hits = 0
+        connection = self._connection()
+        connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS rate_limit_hits (
+                key TEXT NOT NULL, at REAL NOT NULL, expires_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_rate_limit_hits_key_at ON rate_limit_hits (key, at);
+            CREATE INDEX IF NOT EXISTS ix_rate_limit_hits_expires ON rate_limit_hits (expires_at);
+            CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            """
+        )
+
+    def _connection(self):
+        # One connection per thread, opened afresh after a fork
+        key = (os.getpid(), threading.get_ident())
+        connection = self._connections.get(key)
+        if connection is None:
+            # Only this thread uses it; the finalizer may close it from another
+            connection = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._connections[key] = connection
+        return connection
+
+    def _transaction(self, work):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            result = work(connection)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        self._hits += 1
+        if self._hits % self.PRUNE_EVERY == 0:
+            self._prune(time.time())
+        return result
+
+    def sliding_window(self, key, limit, now):
+        def work(connection):
+            connection.execute(
+                "DELETE FROM rate_limit_hits WHERE key = ? AND at <= ?", (key, now - limit.seconds)
+            )
+            count, oldest = connection.execute(
+                "SELECT count(*), min(at) FROM rate_limit_hits WHERE key = ?", (key,)
+            ).fetchone()
+            if count < limit.amount:
+                connection.execute(
+                    "INSERT INTO rate_limit_hits (key, at, expires_at) VALUES (?, ?, ?)",
+                    (key, now, now + limit.seconds),
+                )
+                return Decision(True, limit.amount - count - 1, 0.0)
+            return Decision(False, 0, oldest + limit.seconds - now)
+
+        return self._transaction(work)
+
+    def token_bucket(self, key, limit, now):
+        rate = limit.amount / limit.seconds
+
+        def work(connection):
+            row = connection.execute(
+                "SELECT tokens, updated_at FROM rate_limit_buckets WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated_at = row if row else (limit.amount, now)
+            tokens = min(limit.amount, tokens + (now - updated_at) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                decision = Decision(True, int(tokens), 0.0)
+            else:
+                decision = Decision(False, 0, (1 - tokens) / rate)
+            connection.execute(
+                "INSERT OR REPLACE INTO rate_limit_buckets (key, tokens, updated_at, expires_at) "
+                "VALUES (?, ?, ?, ?)",
+                # Once full again the row carries no information
+                (key, tokens, now, now + (limit.amount - tokens) / rate),
+            )
+            return decision
+
+        return self._transaction(work)
+
+    def _prune(self, now):
+        connection = self._connection()
+        connection.execute("DELETE FROM rate_limit_hits WHERE expires_at < ?", (now,))
+        connection.execute("DELETE FROM rate_limit_buckets WHERE expires_at < ?", (now,))
+
+    def clear(self):
+        connection = self._connection()
+        connection.execute("DELETE FROM rate_limit_hits")
+        connection.execute("DELETE FROM rate_limit_buckets")
+
+
+# Both scripts return {allowed, remaining, retry_after}; floats travel as
+# strings because Redis truncates Lua numbers to integers
+_REDIS_SLIDING_WINDOW = """
+local now, window, amount = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+local count = redis.call('ZCARD', KEYS[1])
+if count < amount then
+  redis.call('ZADD', KEYS[1], now, ARGV[4])
+  redis.call('PEXPIRE', KEYS[1], math.ceil(window * 1000))
+  return {1, amount - count - 1, '0'}
+end
+local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+return {0, 0, tostring(tonumber(oldest[2]) + window - now)}
+"""
+
+_REDIS_TOKEN_BUCKET = """
+local now, amount, rate = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or amount
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(amount, tokens + (now - updated_at) * rate)
+local allowed, retry_after = 0, (1 - tokens) / rate
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed, retry_after = 1, 0
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((amount - tokens) / rate * 1000) + 1000)
+return {allowed, math.floor(tokens), tostring(retry_after)}
+"""
+
+
+class RedisStorage:
+    """Storage shared across hosts; each hit is one atomic Lua script."""
+
+    def __init__(self, url, prefix="farmart:ratelimit:"):
+        if redis is None:
+            raise RuntimeError(
+                "RATELIMIT_STORAGE_URI points at Redis but the redis package is not installed"
+            )
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+        self._sliding_window = self._client.register_script(_REDIS_SLIDING_WINDOW)
+        self._token_bucket = self._client.register_script(_REDIS_TOKEN_BUCKET)
+
+    def sliding_window(self, key, limit, now):
+        allowed, remaining, retry_after = self._sliding_window(
+            keys=[self._prefix + "log:" + key],
+            args=[now, limit.seconds, limit.amount, f"{now}:{uuid.uuid4().hex}"],
+        )
+        return Decision(bool(allowed), int(remaining), float(retry_after))
+
+    def token_bucket(self, key, limit, now):
+        allowed, remaining, retry_after = self._token_bucket(
+            keys=[self._prefix + "bucket:" + key],
+            args=[now, limit.amount, limit.amount / limit.seconds],
+        )
+        return Decision(bool(allowed), int(remaining), float(retry_after))
+
+    def clear(self):
+        for key in self._client.scan_iter(self._prefix + "*"):
+            self._client.delete(key)
+
+
+def storage_from_uri(uri):
+    """Build a storage backend from a RATELIMIT_STORAGE_URI."""
+    if uri.startswith("redis://") or uri.startswith("rediss://"):
+        return RedisStorage(uri)
+    if uri.startswith("sqlite:///"):
+        return SQLiteStorage(uri[len("sqlite:///"):])
+    if uri.startswith("memory://"):
+        return MemoryStorage()
+    raise ValueError(f"Unsupported RATELIMIT_STORAGE_URI: {uri!r}")
+
+
+# ---------- extension ----------
+
+def _too_many(decision, message="Rate limit exceeded"):
+    response = jsonify({"error": message, "retry_after": round(decision.retry_after, 2)})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(max(1, int(decision.retry_after + 0.999)))
+    return response
+
+
+class RateLimiter:
+    """
+    Flask extension offering `@limiter.limit("5 per minute")` for routes
+    and RATELIMIT_ROLE_LIMITS for every authenticated /api request.
+    """
+
+    def init_app(self, app):
+        app.config.setdefault("RATELIMIT_ENABLED", True)
+        app.config.setdefault("RATELIMIT_STRATEGY", "sliding-window")
+        # Requests per authenticated user by role (None: unlimited)
+        app.config.setdefault("RATELIMIT_ROLE_LIMITS", {})
+        uri = app.config.get("RATELIMIT_STORAGE_URI") or "sqlite:///" + os.path.join(
+            app.instance_path, "ratelimit.db"
+        )
+        app.config["RATELIMIT_STORAGE_URI"] = uri
+
+        if app.config["RATELIMIT_STRATEGY"] not in STRATEGIES:
+            raise ValueError(f"RATELIMIT_STRATEGY must be one of {', '.join(STRATEGIES)}")
+
+        app.extensions["rate_limiter"] = {
+            "storage": storage_from_uri(uri),
+            "role_limits": {
+                role: parse_limit(text)
+                for role, text in app.config["RATELIMIT_ROLE_LIMITS"].items()
+                if text
+            },
+        }
+        app.before_request(self._check_role_limit)
+
+    @property
+    def storage(self):
+        return current_app.extensions["rate_limiter"]["storage"]
+
+    def hit(self, key, limit, strategy=None):
+        """
+        Count one hit against `limit` (a Limit or limit string) for `key`.
+
+        Returns:
+            Decision; storage failures allow the request (fail open)
+        """
+        if isinstance(limit, str):
+            limit = parse_limit(limit)
+        strategy = strategy or current_app.config["RATELIMIT_STRATEGY"]
+        storage = self.storage
+        try:
+            if strategy == "token-bucket":
+                return storage.token_bucket(key, limit, time.time())
+            return storage.sliding_window(key, limit, time.time())
+        except Exception:
+            logger.exception("Rate limit storage failed; allowing request")
+            return Decision(True, limit.amount, 0.0)
+
+    def limit(self, limit_string, key_func=None, strategy=None, scope=None):
+        """
+        Limit a view (or flask-restful method) per client.
+
+        Args:
+            limit_string: e.g. "5 per minute"
+            key_func: returns the client key (default: remote address)
+            strategy: "sliding-window" or "token-bucket" (default: config)
+            scope: name shared by views that draw on one allowance
+                (default: the decorated function)
+        """
+        limit = parse_limit(limit_string)
+
+        def decorator(f):
+            name = scope or f"{f.__module__}.{f.__qualname__}"
+
+            @wraps(f)
+            def wrapper(*args, **kwargs):
+                if current_app.config["RATELIMIT_ENABLED"]:
+                    client = key_func() if key_func else request.remote_addr
+                    decision = self.hit(f"{name}:{client}", limit, strategy)
+                    if not decision.allowed:
+                        return _too_many(decision)
+                    g.rate_limit_remaining = decision.remaining
+                return f(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def _check_role_limit(self):
+        if not current_app.config["RATELIMIT_ENABLED"] or not request.path.startswith("/api"):
+            return None
+        role_limits = current_app.extensions["rate_limiter"]["role_limits"]
+        if not role_limits or request.method == "OPTIONS":
+            return None
+
+        try:
+            if verify_jwt_in_request(optional=True) is None:
+                return None
+            claims = get_jwt()
+        except Exception:
+            # Bad or expired token: the view's own auth check answers it
+            return None
+
+        limit = role_limits.get(claims.get("role"))
+        if limit is None:
+            return None
+        decision = self.hit(f"role:{claims['role']}:{claims['sub']}", limit)
+        if not decision.allowed:
+            return _too_many(decision)
+        return None
+
+    def clear(self):
+        self.storage.clear()
+
+
+# exported instance, initialised in create_app
+limiter = RateLimiter()
@@ -0,0 +1,25 @@
+"""
+Upsert Helpers
+INSERT ... ON CONFLICT DO UPDATE for the dialects the app runs on
+"""
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+# Both dialects spell it on_conflict_do_update(index_elements=..., set_=...)
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def upsert(bind, table):
+    """
+    A dialect INSERT for `table` supporting on_conflict_do_update().
+
+    Args:
+        bind: the connection (or engine) the statement will run on
+
+    Raises:
+        NotImplementedError: the dialect has no ON CONFLICT clause here
+    """
+    try:
+        return _INSERTS[bind.dialect.name](table)
+    except KeyError:
+        raise NotImplementedError(f"No upsert for dialect {bind.dialect.name!r}") from None
@@ -0,0 +1,70 @@
+"""
+Benchmark: analytics ingestion throughput
+Events/sec for one INSERT + commit per event versus the queued pipeline
+(request-side enqueue from several threads, then batched flushes).
+
+    python -m benchmarks.bench_analytics_ingest --events 50000 --threads 8
+"""
+
+import argparse
+import threading
+import time
+
+from benchmarks.common import make_app
+from app import db
+from app.models import AnalyticsEvent
+from app.services.analytics import analytics_pipeline, build_event
+
+
+def per_event_inserts(count):
+    start = time.perf_counter()
+    for i in range(count):
+        db.session.add(AnalyticsEvent(**build_event({"event_type": "page_view", "entity_id": i})))
+        db.session.commit()
+    return count / (time.perf_counter() - start)
+
+
+def threaded_enqueue(app, count, threads):
+    per_thread = count // threads
+
+    def produce():
+        with app.app_context():
+            for i in range(per_thread):
+                analytics_pipeline.enqueue([build_event({"event_type": "page_view", "entity_id": i})])
+
+    workers = [threading.Thread(target=produce) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return per_thread * threads / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--baseline-events", type=int, default=2000)
+    args = parser.parse_args()
+
+    app = make_app()
+    app.config["ANALYTICS_QUEUE_SIZE"] = args.events
+    with app.app_context():
+        analytics_pipeline.init_app(app)
+
+        baseline = per_event_inserts(args.baseline_events)
+        enqueue_rate = threaded_enqueue(app, args.events, args.threads)
+
+        start = time.perf_counter()
+        written = analytics_pipeline.flush()
+        flush_rate = written / (time.perf_counter() - start)
+
+        print(f"one INSERT + commit per event: {baseline:>12,.0f} events/s")
+        print(f"enqueue ({args.threads} threads):          {enqueue_rate:>12,.0f} events/s")
+        print(f"batched flush ({app.config['ANALYTICS_BATCH_SIZE']}/batch):    {flush_rate:>12,.0f} events/s")
+        print(f"stats: {analytics_pipeline.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark: listing claims on a hot listing
+Threads (standing in for request workers) race to claim the same listing,
+round after round. Each round the listing is relisted and exactly one
+claim must win; reports double sales (must be 0), claims/s and how long
+losers wait for their 409.
+
+    python -m benchmarks.bench_listing_claims --threads 8 --rounds 200
+"""
+
+import argparse
+import statistics
+import threading
+import time
+
+from sqlalchemy import update
+
+from benchmarks.common import make_app, seed_farmer, seed_listings
+from app import db
+from app.models import Livestock
+from app.services.reservations import claim_listing
+
+
+def relist(livestock_id):
+    db.session.execute(
+        update(Livestock).where(Livestock.id == livestock_id).values(is_available=True)
+    )
+    db.session.commit()
+
+
+def run(app, livestock_id, threads, rounds):
+    start_round = threading.Barrier(threads + 1)
+    end_round = threading.Barrier(threads + 1)
+    wins = [0] * rounds
+    lock = threading.Lock()
+    claim_ms, loser_ms = [], []
+
+    def worker():
+        with app.app_context():
+            for round_no in range(rounds):
+                start_round.wait()
+                started = time.perf_counter()
+                won = claim_listing(livestock_id) is not None
+                if won:
+                    db.session.commit()
+                else:
+                    db.session.rollback()
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    claim_ms.append(elapsed)
+                    if won:
+                        wins[round_no] += 1
+                    else:
+                        loser_ms.append(elapsed)
+                end_round.wait()
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+
+    busy = 0.0
+    for _ in range(rounds):
+        relist(livestock_id)
+        started = time.perf_counter()
+        start_round.wait()
+        end_round.wait()
+        busy += time.perf_counter() - started
+
+    for thread in pool:
+        thread.join()
+
+    loser_ms.sort()
+    return {
+        "double_sales": sum(1 for count in wins if count > 1),
+        "unsold_rounds": sum(1 for count in wins if count == 0),
+        "claims_per_s": len(claim_ms) / busy,
+        "loser_p50_ms": statistics.median(loser_ms) if loser_ms else 0.0,
+        "loser_p95_ms": loser_ms[int(len(loser_ms) * 0.95) - 1] if loser_ms else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        farmer = seed_farmer()
+        seed_listings(100, farmer.id)
+        hot = db.session.query(Livestock.id).order_by(Livestock.id).first().id
+
+        result = run(app, hot, args.threads, args.rounds)
+
+    print(f"{args.threads} threads x {args.rounds} rounds on one listing")
+    print(f"  double sales     {result['double_sales']:>8}")
+    print(f"  unsold rounds    {result['unsold_rounds']:>8}")
+    print(f"  claims/s         {result['claims_per_s']:>8,.0f}")
+    print(f"  409 latency      p50 {result['loser_p50_ms']:.2f} ms  p95 {result['loser_p95_ms']:.2f} ms")
+    if result["double_sales"]:
+        raise SystemExit("listing sold more than once")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: columnar listing snapshot vs SQL
+Times range-filtered, sorted page lookups (ids of one page plus the total)
+through app.services.listing_columns and through the equivalent SQL.
+
+    python -m benchmarks.bench_listing_columns --rows 50000
+"""
+
+import argparse
+
+from benchmarks.common import make_app, seed_farmer, seed_listings, timed
+from app.models import Livestock
+from app.services.listing_columns import listing_columns
+
+CASES = [
+    ("price range, newest", {"price": (10000, 40000)}, None, "created_at", True),
+    ("weight + age, cheapest", {"weight": (100, 300), "age_months": (12, 48)}, None, "price", False),
+    ("species, heaviest", {}, "goat", "weight", True),
+    ("no filter, newest", {}, None, "created_at", True),
+]
+
+
+def sql_page(ranges, species, sort, descending, limit):
+    query = Livestock.query.filter(Livestock.is_available.is_(True))
+    for name, (low, high) in ranges.items():
+        column = getattr(Livestock, name)
+        if low is not None:
+            query = query.filter(column >= low)
+        if high is not None:
+            query = query.filter(column <= high)
+    if species:
+        query = query.filter(Livestock.animal_type.ilike(species))
+    column = getattr(Livestock, sort)
+    ordering = (column.desc(), Livestock.id.desc()) if descending else (column.asc(), Livestock.id.asc())
+    total = query.count()
+    ids = [row.id for row in query.order_by(*ordering).with_entities(Livestock.id).limit(limit)]
+    return ids, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=24)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        farmer = seed_farmer()
+        seed_listings(args.rows, farmer.id)
+
+        listing_columns.select(limit=1)  # initial load, not timed
+        print(f"{args.rows} listings, page size {args.limit}\n")
+        print(f"{'case':<28}{'sql p50':>10}{'numpy p50':>12}{'speedup':>10}")
+
+        for name, ranges, species, sort, descending in CASES:
+            sql_ms, _, sql_result = timed(
+                lambda: sql_page(ranges, species, sort, descending, args.limit), args.repeat
+            )
+            np_ms, _, np_result = timed(
+                lambda: listing_columns.select(
+                    ranges=ranges, species=species, sort=sort,
+                    descending=descending, limit=args.limit,
+                ),
+                args.repeat,
+            )
+            assert sql_result == np_result, f"{name}: results differ"
+            print(f"{name:<28}{sql_ms:>8.2f}ms{np_ms:>10.2f}ms{sql_ms / np_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark: order list serialization
+Time and peak Python memory to serialize N orders, with each order's
+listing, the old way (ORM objects + Order.to_dict(), listing loaded per
+order or with selectinload) and with the projected list rows.
+
+    python -m benchmarks.bench_order_lists --orders 10000
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from sqlalchemy.orm import selectinload
+
+from benchmarks.common import make_app, seed_farmer, seed_listings
+from app import db
+from app.models import Livestock, Order, User
+from app.services.order_lists import order_list_query, order_row
+
+
+def seed_orders(count):
+    buyer = User(
+        email="bench-buyer@farmart.com",
+        first_name="Bench",
+        last_name="Buyer",
+        phone_number="254700000098",
+        role="buyer",
+    )
+    buyer.password_hash = "x"
+    db.session.add(buyer)
+    db.session.commit()
+
+    listings = db.session.query(Livestock.id, Livestock.price).order_by(Livestock.id).all()
+    db.session.bulk_insert_mappings(Order, [
+        {
+            "order_number": f"ORD-BENCH-{i:06d}",
+            "buyer_id": buyer.id,
+            "livestock_id": listing.id,
+            "quantity": 1,
+            "unit_price": listing.price,
+            "subtotal": listing.price,
+            "commission_rate": 0.02,
+            "commission_amount": listing.price * 0.02,
+            "total_amount": listing.price,
+            "shipping_address": "Bench Buyer, 1 Market Rd, Nakuru",
+        }
+        for i, listing in enumerate(listings[:count])
+    ])
+    db.session.commit()
+    return buyer.id
+
+
+def lazy_to_dict(buyer_id):
+    return [order.to_dict() for order in Order.query.filter_by(buyer_id=buyer_id).all()]
+
+
+def eager_to_dict(buyer_id):
+    orders = (
+        Order.query.options(selectinload(Order.livestock)).filter_by(buyer_id=buyer_id).all()
+    )
+    return [order.to_dict() for order in orders]
+
+
+def projected(buyer_id):
+    return [order_row(row) for row in order_list_query(buyer_id).all()]
+
+
+def measure(fn, buyer_id):
+    """(ms, peak MiB, rows); timed without tracemalloc, which slows allocation."""
+    db.session.expunge_all()
+    gc.collect()
+    start = time.perf_counter()
+    rows = fn(buyer_id)
+    elapsed = time.perf_counter() - start
+
+    del rows
+    db.session.expunge_all()
+    gc.collect()
+    tracemalloc.start()
+    rows = fn(buyer_id)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed * 1000, peak / 2 ** 20, len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--orders", type=int, default=10000)
+    args = parser.parse_args()
+
+    app = make_app()
+    with app.app_context():
+        farmer = seed_farmer()
+        seed_listings(args.orders, farmer.id)
+        # Realistic listings carry a description and an image list
+        db.session.query(Livestock).update({
+            Livestock.description: "Healthy, vaccinated and dewormed. " * 8,
+            Livestock.images: ",".join(f"https://img.example/{n}.jpg" for n in range(6)),
+        })
+        db.session.commit()
+        buyer_id = seed_orders(args.orders)
+
+        for name, fn in (
+            ("to_dict, lazy listing", lazy_to_dict),
+            ("to_dict, selectinload", eager_to_dict),
+            ("projected list rows", projected),
+        ):
+            ms, peak_mb, rows = measure(fn, buyer_id)
+            print(f"{name:<24} {rows:>6} orders  {ms:>9.1f} ms  peak {peak_mb:>7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark: login throughput under concurrent catalogue load
+A fixed pool of request threads (standing in for WSGI threads) serves a
+burst of logins mixed with catalogue reads, once with passwords hashed
+inline and once on the bounded process pool. Reports logins/s, 429s and
+catalogue latency (queueing included).
+
+    python -m benchmarks.bench_password_hashing --logins 60 --reads 600 --threads 8
+"""
+
+import argparse
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import make_app, seed_farmer, seed_listings
+from app import db
+from app.models import User
+from app.services.password_hasher import DEFAULT_METHOD, password_hasher
+
+PASSWORD = "BenchPassword123"
+
+
+def seed_users(count):
+    pwhash = password_hasher.hash(PASSWORD)
+    db.session.bulk_insert_mappings(User, [
+        {
+            "email": f"bench-user{i}@farmart.com",
+            "password_hash": pwhash,
+            "phone_number": f"2547100{i:05d}",
+            "first_name": "Bench",
+            "last_name": "User",
+            "role": "buyer",
+            "is_verified": True,
+            "is_active": True,
+        }
+        for i in range(count)
+    ])
+    db.session.commit()
+
+
+def run_mix(app, logins, reads, threads, users, seed=7):
+    rng = random.Random(seed)
+    requests = ["login"] * logins + ["read"] * reads
+    rng.shuffle(requests)
+    client = app.test_client()
+
+    def serve(kind, submitted):
+        if kind == "login":
+            email = f"bench-user{rng.randrange(users)}@farmart.com"
+            status = client.post("/api/auth/login", json={"email": email, "password": PASSWORD}).status_code
+        else:
+            status = client.get("/api/livestock?limit=24").status_code
+        return kind, status, time.perf_counter() - submitted
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = [pool.submit(serve, kind, time.perf_counter()) for kind in requests]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+
+    ok_logins = sum(1 for kind, status, _ in results if kind == "login" and status == 200)
+    rejected = sum(1 for kind, status, _ in results if kind == "login" and status == 429)
+    read_ms = sorted(latency * 1000 for kind, _, latency in results if kind == "read")
+    return {
+        "logins_per_s": ok_logins / elapsed,
+        "rejected": rejected,
+        "read_p50_ms": statistics.median(read_ms),
+        "read_p95_ms": read_ms[int(len(read_ms) * 0.95) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=60)
+    parser.add_argument("--reads", type=int, default=600)
+    parser.add_argument("--threads", type=int, default=8, help="request threads")
+    parser.add_argument("--workers", type=int, default=2, help="hashing processes")
+    parser.add_argument("--max-pending", type=int, default=4)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--method", default=DEFAULT_METHOD)
+    args = parser.parse_args()
+
+    app = make_app()
+    app.config["RATELIMIT_ENABLED"] = False  # measure hashing, not the login rate limit
+
+    modes = {
+        "inline": {"PASSWORD_HASH_WORKERS": 0, "PASSWORD_HASH_MAX_PENDING": args.threads},
+        f"pool ({args.workers} procs, {args.max_pending} pending)": {
+            "PASSWORD_HASH_WORKERS": args.workers,
+            "PASSWORD_HASH_MAX_PENDING": args.max_pending,
+        },
+    }
+    with app.app_context():
+        app.config["PASSWORD_HASH_METHOD"] = args.method
+        farmer = seed_farmer()
+        seed_listings(2000, farmer.id)
+        seed_users(args.users)
+
+        for name, settings in modes.items():
+            app.config.update(settings)
+            password_hasher.init_app(app)
+            result = run_mix(app, args.logins, args.reads, args.threads, args.users)
+            print(
+                f"{name:<28} logins {result['logins_per_s']:>7.1f}/s  "
+                f"429s {result['rejected']:>4}  "
+                f"catalogue p50 {result['read_p50_ms']:>8.1f} ms  p95 {result['read_p95_ms']:>8.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
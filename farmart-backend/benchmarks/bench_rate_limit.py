@@ -0,0 +1,74 @@
+"""
+Benchmark: rate limiter overhead
+Microseconds per limit check for each storage and strategy (one process,
+then several processes sharing the SQLite file), and the added latency of
+the per-role check on an authenticated request.
+
+    python -m benchmarks.bench_rate_limit --hits 20000 --processes 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from benchmarks.common import make_app, seed_farmer, seed_listings, timed
+from app.utils.rate_limit import Limit, MemoryStorage, SQLiteStorage
+
+LIMIT = Limit(1000000, 60)  # never denies: measures the bookkeeping alone
+
+
+def per_hit_us(storage, strategy, hits, keys=100):
+    check = getattr(storage, strategy)
+    start = time.perf_counter()
+    for i in range(hits):
+        check(f"client-{i % keys}", LIMIT, time.time())
+    return (time.perf_counter() - start) / hits * 1e6
+
+
+def _worker(path, strategy, hits):
+    return per_hit_us(SQLiteStorage(path), strategy, hits)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hits", type=int, default=20000)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="farmart-ratelimit-")
+    for strategy in ("sliding_window", "token_bucket"):
+        memory = per_hit_us(MemoryStorage(), strategy, args.hits)
+        sqlite = per_hit_us(SQLiteStorage(os.path.join(scratch, f"{strategy}.db")), strategy, args.hits)
+        print(f"{strategy:<15} memory {memory:>8.1f} us/hit   sqlite {sqlite:>8.1f} us/hit")
+
+        path = os.path.join(scratch, f"{strategy}-shared.db")
+        SQLiteStorage(path)
+        with multiprocessing.get_context("fork").Pool(args.processes) as pool:
+            start = time.perf_counter()
+            pool.starmap(_worker, [(path, strategy, args.hits // args.processes)] * args.processes)
+            rate = args.hits / (time.perf_counter() - start)
+        print(f"{'':<15} sqlite shared by {args.processes} processes: {rate:>10,.0f} hits/s")
+
+    app = make_app()
+    with app.app_context():
+        farmer = seed_farmer()
+        seed_listings(200, farmer.id)
+        headers = {"Authorization": f"Bearer {farmer.get_tokens()['access_token']}"}
+        client = app.test_client()
+
+        def request():
+            return client.get("/api/v1/farmer/livestock", headers=headers)
+
+        results = {}
+        for name, limits in (("no role limit", {}), ("role limit", {"farmer": Limit(10 ** 6, 60)})):
+            app.extensions["rate_limiter"]["role_limits"] = limits
+            results[name] = timed(request, repeat=args.requests)
+        for name, (median, p95, _) in results.items():
+            print(f"authenticated request, {name:<14} p50 {median:>7.2f} ms  p95 {p95:>7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
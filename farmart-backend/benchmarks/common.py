@@ -0,0 +1,82 @@
+"""
+Benchmark Helpers
+Throwaway app + database setup shared by the benchmark scripts.
+
+Run a benchmark from the backend root, e.g.:
+    python -m benchmarks.bench_listing_columns --rows 50000
+"""
+
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Point the app at a scratch database before the config module is imported
+_DB_DIR = tempfile.mkdtemp(prefix="farmart-bench-")
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(_DB_DIR, "bench.db"))
+
+from app import create_app, db  # noqa: E402
+from app.models import User, Livestock  # noqa: E402
+
+SPECIES = ["Cow", "Goat", "Sheep", "Pig", "Chicken"]
+LOCATIONS = ["Nakuru", "Eldoret", "Nairobi", "Kisumu", "Nyeri", "Machakos"]
+
+
+def make_app():
+    """A fresh 'testing' app with empty tables."""
+    app = create_app("testing")
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+def seed_farmer(email="bench-farmer@farmart.com"):
+    farmer = User(
+        email=email,
+        first_name="Bench",
+        last_name="Farmer",
+        phone_number="254700000099",
+        role="farmer",
+    )
+    farmer.password_hash = "x"
+    db.session.add(farmer)
+    db.session.commit()
+    return farmer
+
+
+def seed_listings(count, farmer_id, seed=42):
+    """Bulk insert `count` random available listings."""
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1)
+    rows = []
+    for i in range(count):
+        weight = rng.uniform(5, 600)
+        rows.append({
+            "farmer_id": farmer_id,
+            "animal_type": rng.choice(SPECIES),
+            "breed": "Mixed",
+            "weight": weight,
+            "age_months": rng.randint(1, 96),
+            "price": round(rng.uniform(1000, 150000), 2),
+            "location": rng.choice(LOCATIONS),
+            "is_available": rng.random() > 0.1,
+            "created_at": base + timedelta(minutes=i),
+            "updated_at": base + timedelta(minutes=i),
+        })
+    db.session.bulk_insert_mappings(Livestock, rows)
+    db.session.commit()
+
+
+def timed(fn, repeat=20):
+    """Run `fn` repeatedly; return (median_ms, p95_ms, last_result)."""
+    samples, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return statistics.median(samples), p95, result
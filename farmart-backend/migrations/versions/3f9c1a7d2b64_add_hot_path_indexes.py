@@ -0,0 +1,46 @@
+"""add indexes for hot listing, order, escrow and audit queries
+
+Revision ID: 3f9c1a7d2b64
+Revises:
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c1a7d2b64'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# Tables are created by db.create_all(), which also creates these indexes on
+# a fresh database, so every create/drop is guarded with if_(not_)exists.
+INDEXES = [
+    ('ix_livestock_available_created', 'livestock', ['is_available', 'created_at', 'id']),
+    ('ix_livestock_available_price', 'livestock', ['is_available', 'price', 'id']),
+    ('ix_livestock_available_animal_type', 'livestock', ['is_available', 'animal_type']),
+    ('ix_livestock_farmer_created', 'livestock', ['farmer_id', 'created_at']),
+    ('ix_livestock_updated_at', 'livestock', ['updated_at']),
+    ('ix_orders_livestock_id', 'orders', ['livestock_id']),
+    ('ix_orders_buyer_placed', 'orders', ['buyer_id', 'placed_at']),
+    ('ix_orders_buyer_created', 'orders', ['buyer_id', 'created_at']),
+    ('ix_orders_status_placed', 'orders', ['status', 'placed_at']),
+    ('ix_payments_checkout_request_id', 'payments', ['checkout_request_id']),
+    ('ix_escrow_accounts_status_held_at', 'escrow_accounts', ['status', 'held_at']),
+    ('ix_disputes_status_created', 'disputes', ['status', 'created_at']),
+    ('ix_audit_logs_admin_action_created', 'audit_logs', ['admin_id', 'action', 'created_at']),
+    ('ix_audit_logs_created_at', 'audit_logs', ['created_at']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,47 @@
+"""add token_version_changed_at to users so the revocation snapshot stays small
+
+Revision ID: 7d4e2b9c1f60
+Revises: c9f2a7e4b158
+Create Date: 2026-10-16 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d4e2b9c1f60'
+down_revision = 'c9f2a7e4b158'
+branch_labels = None
+depends_on = None
+
+
+def _existing_columns():
+    return {c['name'] for c in sa.inspect(op.get_bind()).get_columns('users')}
+
+
+def upgrade():
+    # db.create_all() may already have added it on a fresh database
+    if 'token_version_changed_at' not in _existing_columns():
+        with op.batch_alter_table('users') as batch_op:
+            batch_op.add_column(sa.Column('token_version_changed_at', sa.DateTime(), nullable=True))
+    op.create_index(
+        'ix_users_token_version_changed_at', 'users', ['token_version_changed_at'],
+        unique=False, if_not_exists=True,
+    )
+    # Versions bumped before this column existed count as bumped now, so
+    # tokens they revoked stay revoked until they would have expired anyway
+    op.execute(
+        sa.text(
+            "UPDATE users SET token_version_changed_at = CURRENT_TIMESTAMP "
+            "WHERE token_version > 0 AND token_version_changed_at IS NULL"
+        )
+    )
+
+
+def downgrade():
+    op.drop_index('ix_users_token_version_changed_at', table_name='users', if_exists=True)
+    if 'token_version_changed_at' not in _existing_columns():
+        return
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('token_version_changed_at')
@@ -0,0 +1,73 @@
+"""add latitude, longitude and geohash to livestock for proximity search
+
+Revision ID: 8b2e4d6f1a93
+Revises: 3f9c1a7d2b64
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.geo import encode_geohash
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e4d6f1a93'
+down_revision = '3f9c1a7d2b64'
+branch_labels = None
+depends_on = None
+
+
+def _columns():
+    return [
+        sa.Column('latitude', sa.Float(), nullable=True),
+        sa.Column('longitude', sa.Float(), nullable=True),
+        sa.Column('geohash', sa.String(length=12), nullable=True),
+    ]
+
+
+def _existing_columns():
+    return {c['name'] for c in sa.inspect(op.get_bind()).get_columns('livestock')}
+
+
+def upgrade():
+    # db.create_all() may already have added these on a fresh database
+    existing = _existing_columns()
+    with op.batch_alter_table('livestock') as batch_op:
+        for column in _columns():
+            if column.name not in existing:
+                batch_op.add_column(column)
+
+    op.create_index(
+        'ix_livestock_available_geohash', 'livestock', ['is_available', 'geohash'],
+        unique=False, if_not_exists=True,
+    )
+
+    # Backfill listings from their farmer's profile coordinates
+    bind = op.get_bind()
+    profiles = bind.execute(sa.text(
+        'SELECT user_id, latitude, longitude FROM user_profiles '
+        'WHERE latitude IS NOT NULL AND longitude IS NOT NULL'
+    )).fetchall()
+    for user_id, latitude, longitude in profiles:
+        bind.execute(
+            sa.text(
+                'UPDATE livestock SET latitude = :lat, longitude = :lng, geohash = :geohash '
+                'WHERE farmer_id = :farmer_id'
+            ),
+            {
+                'lat': latitude,
+                'lng': longitude,
+                'geohash': encode_geohash(latitude, longitude),
+                'farmer_id': user_id,
+            },
+        )
+
+
+def downgrade():
+    op.drop_index('ix_livestock_available_geohash', table_name='livestock', if_exists=True)
+    existing = _existing_columns()
+    with op.batch_alter_table('livestock') as batch_op:
+        for column in reversed(_columns()):
+            if column.name in existing:
+                batch_op.drop_column(column.name)
@@ -0,0 +1,32 @@
+"""index audit logs by entity and by admin for the audit log filters
+
+Revision ID: a6d3f1c8e052
+Revises: f2b8d4e6a913
+Create Date: 2026-10-16 16:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d3f1c8e052'
+down_revision = 'f2b8d4e6a913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_audit_logs_entity_created', 'audit_logs',
+        ['entity_type', 'entity_id', 'created_at'],
+        unique=False, if_not_exists=True,
+    )
+    op.create_index(
+        'ix_audit_logs_admin_created', 'audit_logs', ['admin_id', 'created_at'],
+        unique=False, if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_audit_logs_admin_created', table_name='audit_logs', if_exists=True)
+    op.drop_index('ix_audit_logs_entity_created', table_name='audit_logs', if_exists=True)
@@ -0,0 +1,37 @@
+"""add token_version to users for claim-based authorization
+
+Revision ID: b3e8c5a2d741
+Revises: a6d3f1c8e052
+Create Date: 2026-10-16 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e8c5a2d741'
+down_revision = 'a6d3f1c8e052'
+branch_labels = None
+depends_on = None
+
+
+def _existing_columns():
+    return {c['name'] for c in sa.inspect(op.get_bind()).get_columns('users')}
+
+
+def upgrade():
+    # db.create_all() may already have added it on a fresh database
+    if 'token_version' in _existing_columns():
+        return
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(
+            sa.Column('token_version', sa.Integer(), nullable=False, server_default='0')
+        )
+
+
+def downgrade():
+    if 'token_version' not in _existing_columns():
+        return
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('token_version')
@@ -0,0 +1,37 @@
+"""add view_count to livestock for buffered view counting
+
+Revision ID: c4a7e2d9b815
+Revises: 8b2e4d6f1a93
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a7e2d9b815'
+down_revision = '8b2e4d6f1a93'
+branch_labels = None
+depends_on = None
+
+
+def _existing_columns():
+    return {c['name'] for c in sa.inspect(op.get_bind()).get_columns('livestock')}
+
+
+def upgrade():
+    # db.create_all() may already have added it on a fresh database
+    if 'view_count' in _existing_columns():
+        return
+    with op.batch_alter_table('livestock') as batch_op:
+        batch_op.add_column(
+            sa.Column('view_count', sa.Integer(), nullable=False, server_default='0')
+        )
+
+
+def downgrade():
+    if 'view_count' not in _existing_columns():
+        return
+    with op.batch_alter_table('livestock') as batch_op:
+        batch_op.drop_column('view_count')
@@ -0,0 +1,42 @@
+"""add cart_items for the database-backed cart
+
+Revision ID: c9f2a7e4b158
+Revises: b3e8c5a2d741
+Create Date: 2026-10-16 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9f2a7e4b158'
+down_revision = 'b3e8c5a2d741'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # db.create_all() may already have created it on a fresh database
+    if 'cart_items' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            'cart_items',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'),
+                      nullable=False),
+            sa.Column('livestock_id', sa.Integer(),
+                      sa.ForeignKey('livestock.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('quantity', sa.Integer(), nullable=False, server_default='1'),
+            sa.Column('added_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.UniqueConstraint('user_id', 'livestock_id', name='uq_cart_items_user_livestock'),
+        )
+    op.create_index(
+        'ix_cart_items_updated_at', 'cart_items', ['updated_at'],
+        unique=False, if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_cart_items_updated_at', table_name='cart_items', if_exists=True)
+    op.drop_table('cart_items', if_exists=True)
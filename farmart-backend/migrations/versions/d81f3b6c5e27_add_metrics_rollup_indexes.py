@@ -0,0 +1,44 @@
+"""indexes for the incremental DailyMetrics rollup; one row per day
+
+Revision ID: d81f3b6c5e27
+Revises: c4a7e2d9b815
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd81f3b6c5e27'
+down_revision = 'c4a7e2d9b815'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_users_created_at', 'users', ['created_at']),
+    ('ix_users_updated_at', 'users', ['updated_at']),
+    ('ix_orders_placed_at', 'orders', ['placed_at']),
+    ('ix_orders_updated_at', 'orders', ['updated_at']),
+    ('ix_analytics_events_created_at', 'analytics_events', ['created_at']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+    # DailyMetrics.date becomes unique; nothing wrote the table before
+    op.drop_index('ix_daily_metrics_date', table_name='daily_metrics', if_exists=True)
+    op.create_index(
+        'uq_daily_metrics_date', 'daily_metrics', ['date'], unique=True, if_not_exists=True
+    )
+
+
+def downgrade():
+    op.drop_index('uq_daily_metrics_date', table_name='daily_metrics', if_exists=True)
+    op.create_index(
+        'ix_daily_metrics_date', 'daily_metrics', ['date'], unique=False, if_not_exists=True
+    )
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
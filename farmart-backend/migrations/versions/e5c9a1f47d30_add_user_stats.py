@@ -0,0 +1,38 @@
+"""add user_stats rollup table
+
+Revision ID: e5c9a1f47d30
+Revises: d81f3b6c5e27
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5c9a1f47d30'
+down_revision = 'd81f3b6c5e27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # db.create_all() may already have created it on a fresh database
+    if 'user_stats' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            'user_stats',
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'),
+                      primary_key=True),
+            sa.Column('listings_count', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('sales_count', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('revenue_total', sa.Numeric(12, 2), nullable=False, server_default='0'),
+            sa.Column('orders_count', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('purchases_count', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('spent_total', sa.Numeric(12, 2), nullable=False, server_default='0'),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+    # Rows are filled by `flask reconcile-user-stats` (or lazily on first read)
+
+
+def downgrade():
+    op.drop_table('user_stats', if_exists=True)
@@ -0,0 +1,26 @@
+"""index disputes by type for the admin dispute queue filters
+
+Revision ID: f2b8d4e6a913
+Revises: e5c9a1f47d30
+Create Date: 2026-10-16 15:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b8d4e6a913'
+down_revision = 'e5c9a1f47d30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_disputes_type_created', 'disputes', ['dispute_type', 'created_at'],
+        unique=False, if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_index('ix_disputes_type_created', table_name='disputes', if_exists=True)
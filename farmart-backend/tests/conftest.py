@@ -70,6 +70,22 @@ def test_buyer(db_session):
     return user
 
 
+@pytest.fixture
+def test_admin(db_session):
+    """Create a test admin user."""
+    user = User(
+        email="admin@test.com",
+        phone_number="254700000003",
+        first_name="Test",
+        last_name="Admin",
+        role="admin",
+    )
+    user.set_password("TestPassword123")
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
 @pytest.fixture
 def farmer_token(client, test_farmer):
     """Get farmer JWT token."""
@@ -88,3 +104,91 @@ def buyer_token(client, test_buyer):
         json={"email": "buyer@test.com", "password": "TestPassword123"},
     )
     return response.json.get("access_token")
+
+
+@pytest.fixture
+def sample_livestock(db_session, test_farmer):
+    """Create a small catalogue of available livestock."""
+    from datetime import datetime, timedelta
+    from app.models import Livestock
+
+    base = datetime(2025, 1, 1)
+    animals = []
+    for i in range(7):
+        animal = Livestock(
+            farmer_id=test_farmer.id,
+            animal_type="Goat" if i % 2 else "Cow",
+            breed="Boer" if i % 2 else "Friesian",
+            weight=50 + i * 10,
+            age_months=6 + i,
+            price=[5000, 12000, 5000, 8000, 30000, 12000, 7000][i],
+            location="Nakuru" if i < 4 else "Eldoret",
+            created_at=base + timedelta(days=i),
+        )
+        animals.append(animal)
+    db_session.add_all(animals)
+    db_session.commit()
+    return animals
+
+
+@pytest.fixture
+def count_queries(app):
+    """Collect SQL statements issued while the returned list is live."""
+    from sqlalchemy import event
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(db.engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def auth_headers(app):
+    """Build an Authorization header for a user."""
+
+    def make(user):
+        return {"Authorization": f"Bearer {user.get_tokens()['access_token']}"}
+
+    return make
+
+
+@pytest.fixture
+def sample_orders(db_session, test_buyer, sample_livestock):
+    """Create pending orders for the test buyer on the first listings."""
+    from app.models import Order
+
+    orders = []
+    for i, animal in enumerate(sample_livestock[:3]):
+        orders.append(Order(
+            order_number=f"ORD-TEST-{i}",
+            buyer_id=test_buyer.id,
+            livestock_id=animal.id,
+            quantity=1,
+            unit_price=animal.price,
+            subtotal=animal.price,
+            commission_rate=0.02,
+            commission_amount=animal.price * 0.02,
+            total_amount=animal.price,
+            shipping_address="Test Buyer, 1 Farm Rd, Nakuru",
+        ))
+    db_session.add_all(orders)
+    db_session.commit()
+    return orders
+
+
+@pytest.fixture
+def buyer_address(db_session, test_buyer):
+    """A delivery address for the test buyer."""
+    from app.models import UserAddress
+
+    address = UserAddress(
+        user_id=test_buyer.id, recipient_name="Test Buyer", recipient_phone="254700000002",
+        street_address="1 Market Rd", city="Nakuru",
+    )
+    db_session.add(address)
+    db_session.commit()
+    return address
@@ -53,3 +53,85 @@ class TestLivestockModel:
             db_session.commit()
 
             assert livestock.status == LivestockStatus.AVAILABLE
+
+
+class TestQueryIndexes:
+    """EXPLAIN QUERY PLAN checks that hot queries are served by an index."""
+
+    def _plan(self, query):
+        from app import db
+
+        compiled = query.statement.compile(
+            db.engine, compile_kwargs={"literal_binds": True}
+        )
+        rows = db.session.execute(db.text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+        return " | ".join(row[-1] for row in rows)
+
+    def _assert_index(self, query, index_name):
+        plan = self._plan(query)
+        assert index_name in plan, plan
+        assert "USE TEMP B-TREE FOR ORDER BY" not in plan, plan
+
+    def test_feed_newest(self, app):
+        from app.models import Livestock
+
+        query = (
+            Livestock.query.filter_by(is_available=True)
+            .order_by(Livestock.created_at.desc(), Livestock.id.desc())
+            .limit(25)
+        )
+        self._assert_index(query, "ix_livestock_available_created")
+
+    def test_feed_by_price(self, app):
+        from app.models import Livestock
+
+        query = (
+            Livestock.query.filter_by(is_available=True)
+            .filter(Livestock.price > 5000)
+            .order_by(Livestock.price.asc(), Livestock.id.asc())
+            .limit(25)
+        )
+        self._assert_index(query, "ix_livestock_available_price")
+
+    def test_farmer_listings(self, app):
+        from app.models import Livestock
+
+        self._assert_index(
+            Livestock.query.filter_by(farmer_id=1), "ix_livestock_farmer_created"
+        )
+
+    def test_buyer_orders(self, app):
+        from app.models import Order
+
+        query = Order.query.filter_by(buyer_id=1).order_by(Order.placed_at.desc())
+        self._assert_index(query, "ix_orders_buyer_placed")
+
+    def test_orders_by_livestock(self, app):
+        from app.models import Order
+
+        self._assert_index(Order.query.filter_by(livestock_id=1), "ix_orders_livestock_id")
+
+    def test_payment_callback_lookup(self, app):
+        from app.models import Payment
+
+        self._assert_index(
+            Payment.query.filter_by(checkout_request_id="ws_CO_1"),
+            "ix_payments_checkout_request_id",
+        )
+
+    def test_expired_escrow_scan(self, app):
+        from datetime import datetime
+        from app.models import EscrowAccount
+
+        query = EscrowAccount.query.filter(
+            EscrowAccount.status == "held", EscrowAccount.held_at <= datetime(2025, 1, 1)
+        )
+        self._assert_index(query, "ix_escrow_accounts_status_held_at")
+
+    def test_audit_log_filter(self, app):
+        from app.models import AuditLog
+
+        query = AuditLog.query.filter_by(admin_id=1, action="user_activated").order_by(
+            AuditLog.created_at.desc()
+        )
+        self._assert_index(query, "ix_audit_logs_admin_action_created")
@@ -93,3 +93,779 @@ class TestValidation:
         )
 
         assert response.status_code == 400
+
+
+class TestLivestockFeed:
+    """Tests for the paginated public marketplace feed."""
+
+    def _walk(self, client, **params):
+        ids, cursor = [], None
+        while True:
+            query = dict(params, limit=3)
+            if cursor:
+                query["cursor"] = cursor
+            response = client.get("/api/livestock", query_string=query)
+            assert response.status_code == 200
+            data = response.json
+            assert len(data["livestock"]) <= 3
+            ids.extend(item["id"] for item in data["livestock"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                return ids
+
+    def test_newest_pages_cover_catalogue_once(self, client, sample_livestock):
+        """Walking all pages yields every listing exactly once, newest first."""
+        ids = self._walk(client)
+        newest_first = sorted(sample_livestock, key=lambda a: a.created_at, reverse=True)
+        assert ids == [a.id for a in newest_first]
+
+    def test_price_sort_with_ties(self, client, sample_livestock):
+        """Equal prices are tie-broken by id so no row is skipped or repeated."""
+        low = self._walk(client, sortBy="price-low")
+        high = self._walk(client, sortBy="price-high")
+        cheapest_first = sorted(sample_livestock, key=lambda a: (a.price, a.id))
+        assert low == [a.id for a in cheapest_first]
+        assert high == list(reversed(low))
+
+    def test_limit_is_capped(self, client, sample_livestock):
+        response = client.get("/api/livestock", query_string={"limit": 10000})
+        assert response.json["limit"] == 100
+
+    def test_page_query_count_is_constant(self, client, db_session, count_queries):
+        """Farmers are batch-loaded: page + farmers, regardless of page size."""
+        from app.models import User, Livestock
+
+        for i in range(30):
+            farmer = User(
+                email=f"farmer{i}@test.com",
+                phone_number=f"2547100000{i:02d}",
+                first_name="F",
+                last_name=str(i),
+                role="farmer",
+                password_hash="x",
+            )
+            db_session.add(farmer)
+            db_session.flush()
+            db_session.add(Livestock(
+                farmer_id=farmer.id, animal_type="Goat", weight=40, price=5000 + i,
+                location="Nakuru",
+            ))
+        db_session.commit()
+        db_session.expire_all()
+        del count_queries[:]
+
+        response = client.get("/api/livestock", query_string={"limit": 30})
+        assert len(response.json["livestock"]) == 30
+        assert all(item["farmer"] for item in response.json["livestock"])
+        assert len(count_queries) == 2
+
+    def test_invalid_cursor(self, client, sample_livestock):
+        response = client.get("/api/livestock", query_string={"cursor": "not-a-cursor"})
+        assert response.status_code == 400
+
+
+class TestLivestockSearch:
+    """Tests for the buyer search endpoint."""
+
+    def test_text_search_is_ranked_and_paginated(self, client, sample_livestock):
+        response = client.get("/api/buyer/search", query_string={"q": "goat", "per_page": 2})
+        assert response.status_code == 200
+        data = response.json
+        assert data["total"] == 3
+        assert data["pages"] == 2
+        assert all(item["animal_type"] == "Goat" for item in data["livestock"])
+
+    def test_filters_combine_with_text(self, client, sample_livestock):
+        response = client.get(
+            "/api/buyer/search",
+            query_string={"q": "nakuru", "species": "cow", "sort": "price", "order": "asc"},
+        )
+        prices = [item["price"] for item in response.json["livestock"]]
+        assert prices == [5000.0, 5000.0]
+
+    def test_facets_follow_filters(self, client, sample_livestock):
+        unfiltered = client.get("/api/buyer/search", query_string={"facets": "true"}).json
+        assert {"value": "Eldoret", "count": 3} in unfiltered["facets"]["location"]
+
+        filtered = client.get(
+            "/api/buyer/search", query_string={"facets": "true", "species": "goat"}
+        ).json
+        assert filtered["facets"]["species"] == [{"value": "Goat", "count": 3}]
+        assert filtered["facets"]["breed"] == [{"value": "Boer", "count": 3}]
+
+    def test_columnar_path_matches_sql(self, app, client, sample_livestock):
+        params = {"min_price": 6000, "max_weight": 100, "sort": "price", "order": "asc"}
+        sql = client.get("/api/buyer/search", query_string=params).json
+        app.config["LISTING_COLUMNS_ENABLED"] = True
+        try:
+            columnar = client.get("/api/buyer/search", query_string=params).json
+        finally:
+            app.config["LISTING_COLUMNS_ENABLED"] = False
+        assert columnar == sql
+        assert [item["price"] for item in columnar["livestock"]] == [8000.0, 12000.0, 12000.0, 30000.0]
+
+    def test_feed_location_filter_uses_index(self, client, sample_livestock):
+        response = client.get("/api/livestock", query_string={"location": "eld"})
+        assert {item["location"] for item in response.json["livestock"]} == {"Eldoret"}
+
+
+class TestLivestockDetail:
+    """Tests for the buyer listing detail page."""
+
+    def test_detail_counts_views_without_writing(self, client, sample_livestock, count_queries):
+        animal_id = sample_livestock[0].id
+        client.get(f"/api/buyer/livestock/{animal_id}")
+        count_queries.clear()
+        response = client.get(f"/api/buyer/livestock/{animal_id}")
+        assert response.status_code == 200
+        assert response.json["livestock"]["view_count"] == 2
+        assert not [s for s in count_queries if s.lstrip().upper().startswith("UPDATE")]
+
+    def test_unavailable_listing_is_404(self, client, db_session, sample_livestock):
+        sample_livestock[0].is_available = False
+        db_session.commit()
+        response = client.get(f"/api/buyer/livestock/{sample_livestock[0].id}")
+        assert response.status_code == 404
+
+
+class TestAnalyticsBeacon:
+    """Tests for the analytics beacon endpoint."""
+
+    def test_accepts_text_plain_batch(self, app, client, db_session):
+        from app.models import AnalyticsEvent
+        from app.services.analytics import analytics_pipeline
+
+        response = client.post(
+            "/api/analytics/events",
+            data='{"events": [{"event_type": "page_view"}, {"event_type": "search"}]}',
+            content_type="text/plain",
+        )
+        assert response.status_code == 202
+        assert response.json == {"queued": 2, "overflowed": 0}
+        assert AnalyticsEvent.query.count() == 0
+
+        analytics_pipeline.flush()
+        assert AnalyticsEvent.query.count() == 2
+
+    def test_rejects_invalid_and_oversized_batches(self, app, client):
+        assert client.post("/api/analytics/events", json={"events": []}).status_code == 400
+        assert client.post(
+            "/api/analytics/events", json=[{"event_type": "nope"}]
+        ).status_code == 400
+        too_many = [{"event_type": "page_view"}] * (app.config["ANALYTICS_MAX_BEACON_EVENTS"] + 1)
+        assert client.post("/api/analytics/events", json=too_many).status_code == 413
+
+
+class TestAdminDashboard:
+    """Tests for the admin dashboard."""
+
+    def test_single_query_and_ranges(self, client, test_admin, sample_orders, auth_headers, count_queries):
+        headers = auth_headers(test_admin)
+        count_queries.clear()
+        response = client.get("/api/admin/dashboard?range=7d", headers=headers)
+        assert response.status_code == 200
+        assert response.headers["X-Cache"] == "MISS"
+        dashboard_queries = [s for s in count_queries if "orders" in s]
+        assert len(dashboard_queries) == 1
+
+        data = response.json
+        assert data["range"] == "7d"
+        assert data["users"]["total"] == 3
+        assert data["orders"] == {"total": 3, "pending": 3, "completed": 0, "in_range": 3}
+        assert data["listings"]["available"] == 7
+        assert data["listings"]["new_in_range"] == 0
+
+        cached = client.get("/api/admin/dashboard?range=7d", headers=headers)
+        assert cached.headers["X-Cache"] == "FRESH"
+        assert client.get("/api/admin/dashboard?range=1y", headers=headers).status_code == 400
+
+    def test_stale_while_revalidate(self, app, client, test_admin, auth_headers):
+        from app.utils.cache import response_cache
+
+        app.config["ADMIN_DASHBOARD_TTL"] = 0
+        headers = auth_headers(test_admin)
+        client.get("/api/admin/dashboard", headers=headers)
+        response = client.get("/api/admin/dashboard", headers=headers)
+        assert response.headers["X-Cache"] == "STALE"
+        assert response.json["users"]["total"] == 1
+        assert response_cache.backend.get("swr:admin-dashboard:today") is not None
+
+
+class TestAdminUsers:
+    """Tests for admin user pages reading the stats rollup."""
+
+    def test_detail_and_list_read_rollup(self, client, test_admin, test_farmer, sample_orders,
+                                         auth_headers, count_queries):
+        headers = auth_headers(test_admin)
+        count_queries.clear()
+        detail = client.get(f"/api/admin/users/{test_farmer.id}", headers=headers)
+        assert detail.json["stats"] == {"total_listings": 7, "total_sales": 0, "total_revenue": 0.0}
+        assert not [s for s in count_queries if "count(" in s.lower()]
+
+        users = client.get("/api/admin/users?role=buyer", headers=headers).json["users"]
+        assert users[0]["stats"]["total_orders"] == 3
+
+
+class TestAdminDisputes:
+    """Tests for the admin dispute queue."""
+
+    @pytest.fixture
+    def disputes(self, db_session, test_buyer, sample_orders):
+        from datetime import datetime
+        from app.models import Dispute, EscrowAccount, Payment
+
+        rows = []
+        for i, order in enumerate(sample_orders):
+            rows.append(Dispute(
+                order_id=order.id,
+                user_id=test_buyer.id,
+                dispute_type="quality" if i % 2 == 0 else "delivery",
+                description="Animal not as described",
+                created_at=datetime(2025, 3, 1 + i),
+            ))
+            db_session.add(EscrowAccount(
+                order_id=order.id, amount=order.total_amount, farmer_payout_amount=order.subtotal
+            ))
+            db_session.add(Payment(order_id=order.id, user_id=test_buyer.id, amount=order.total_amount))
+        db_session.add_all(rows)
+        db_session.commit()
+        return rows
+
+    def test_constant_queries_and_enrichment(self, client, test_admin, disputes, auth_headers, count_queries):
+        headers = auth_headers(test_admin)
+        count_queries.clear()
+        response = client.get("/api/admin/disputes", headers=headers)
+        assert response.status_code == 200
+        assert len([s for s in count_queries if "disputes" in s]) == 2
+
+        first = response.json["disputes"][0]
+        assert first["id"] == disputes[-1].id
+        assert first["escrow_status"] == "held"
+        assert first["order_number"] == "ORD-TEST-2"
+
+    def test_filters_and_order_value_sort(self, client, test_admin, disputes, auth_headers):
+        headers = auth_headers(test_admin)
+        quality = client.get("/api/admin/disputes?dispute_type=quality", headers=headers).json
+        assert quality["total"] == 2
+
+        dated = client.get("/api/admin/disputes?from=2025-03-02&to=2025-03-02", headers=headers).json
+        assert [d["id"] for d in dated["disputes"]] == [disputes[1].id]
+
+        by_value = client.get("/api/admin/disputes?sort=order_value&order=asc", headers=headers).json
+        totals = [d["order_total"] for d in by_value["disputes"]]
+        assert totals == sorted(totals)
+        assert client.get("/api/admin/disputes?from=March", headers=headers).status_code == 400
+
+
+class TestAdminAuditLogs:
+    """Tests for audited admin actions and the audit log query."""
+
+    def test_actions_are_audited_with_diffs(self, client, test_admin, test_buyer, auth_headers):
+        headers = auth_headers(test_admin)
+        client.post(f"/api/admin/users/{test_buyer.id}/deactivate", headers=headers)
+        client.post(f"/api/admin/users/{test_buyer.id}/activate", headers=headers)
+
+        response = client.get(
+            f"/api/admin/audit-logs?entity_type=user&entity_id={test_buyer.id}", headers=headers
+        )
+        assert response.status_code == 200
+        logs = response.json["logs"]
+        assert [log["action"] for log in logs] == ["user_activated", "user_deactivated"]
+        assert logs[1]["old_values"] == {"is_active": True}
+        assert logs[1]["new_values"] == {"is_active": False}
+        assert logs[0]["admin_id"] == test_admin.id
+
+    def test_cursor_pagination_and_filters(self, client, db_session, test_admin, auth_headers):
+        from datetime import datetime
+        from app.models import AuditLog
+
+        db_session.add_all([
+            AuditLog(admin_id=test_admin.id, action="listing_approved", entity_type="livestock",
+                     entity_id=i, created_at=datetime(2025, 4, 1 + i))
+            for i in range(5)
+        ])
+        db_session.commit()
+        headers = auth_headers(test_admin)
+
+        first = client.get("/api/admin/audit-logs?limit=3", headers=headers).json
+        assert [log["entity_id"] for log in first["logs"]] == [4, 3, 2]
+        second = client.get(
+            f"/api/admin/audit-logs?limit=3&cursor={first['next_cursor']}", headers=headers
+        ).json
+        assert [log["entity_id"] for log in second["logs"]] == [1, 0]
+        assert second["next_cursor"] is None
+
+        dated = client.get("/api/admin/audit-logs?from=2025-04-02&to=2025-04-03", headers=headers).json
+        assert [log["entity_id"] for log in dated["logs"]] == [2, 1]
+        assert client.get("/api/admin/audit-logs?cursor=bogus", headers=headers).status_code == 400
+
+
+class TestAccessControl:
+    """Tests for claim-based role checks and token revocation."""
+
+    def test_role_check_needs_no_user_query(self, client, test_admin, auth_headers, count_queries):
+        headers = auth_headers(test_admin)
+        client.get("/api/admin/cache/stats", headers=headers)  # warm the snapshot
+        count_queries.clear()
+        response = client.get("/api/admin/cache/stats", headers=headers)
+        assert response.status_code == 200
+        assert not [s for s in count_queries if "FROM users" in s]
+
+    def test_deactivation_revokes_tokens(self, client, db_session, test_admin, test_farmer,
+                                         auth_headers):
+        admin = auth_headers(test_admin)
+        old_token = auth_headers(test_farmer)
+        assert client.get("/api/v1/farmer/livestock", headers=old_token).status_code == 200
+        assert client.get("/api/admin/users", headers=auth_headers(test_farmer)).status_code == 403
+
+        client.post(f"/api/admin/users/{test_farmer.id}/deactivate", headers=admin)
+        assert client.get("/api/v1/farmer/livestock", headers=old_token).status_code == 401
+
+        db_session.refresh(test_farmer)
+        response = client.get("/api/v1/farmer/livestock", headers=auth_headers(test_farmer))
+        assert response.status_code == 403
+        assert response.json["error"] == "Account is deactivated"
+
+        client.post(f"/api/admin/users/{test_farmer.id}/activate", headers=admin)
+        db_session.refresh(test_farmer)
+        assert client.get("/api/v1/farmer/livestock", headers=auth_headers(test_farmer)).status_code == 200
+
+    def test_role_change_revokes_tokens(self, app, client, db_session, test_buyer, auth_headers):
+        from app.services.access_control import access_control
+
+        old_token = auth_headers(test_buyer)
+        assert client.get("/api/buyer/cart", headers=old_token).status_code == 200
+
+        test_buyer.role = "farmer"
+        db_session.commit()
+        access_control.invalidate()
+        assert test_buyer.token_version == 1
+        assert client.get("/api/buyer/cart", headers=old_token).status_code == 401
+
+    def test_snapshot_skips_expired_bumps(self, app, db_session, test_buyer, test_farmer):
+        from datetime import datetime, timedelta
+
+        from app.services.access_control import access_control
+
+        test_buyer.revoke_tokens()
+        test_farmer.revoke_tokens()
+        lifetime = app.config["JWT_REFRESH_TOKEN_EXPIRES"]
+        test_farmer.token_version_changed_at = datetime.utcnow() - lifetime - timedelta(minutes=1)
+        db_session.commit()
+        access_control.invalidate()
+
+        _, versions = access_control._snapshot()
+        assert versions == {test_buyer.id: 1}
+
+
+class TestRateLimits:
+    """Tests for route and per-role rate limits."""
+
+    def test_login_limit(self, client):
+        payload = {"email": "nobody@farmart.com", "password": "WrongPassword1"}
+        statuses = [client.post("/api/auth/login", json=payload).status_code for _ in range(6)]
+        assert statuses[:5] == [401] * 5
+        assert statuses[5] == 429
+
+    def test_per_role_limit(self, app, client, test_admin, test_buyer, auth_headers):
+        from app.utils.rate_limit import parse_limit
+
+        app.extensions["rate_limiter"]["role_limits"]["admin"] = parse_limit("2 per minute")
+        headers = auth_headers(test_admin)
+        statuses = [client.get("/api/admin/cache/stats", headers=headers).status_code for _ in range(3)]
+        assert statuses == [200, 200, 429]
+
+        # Counted per user: another role is unaffected
+        response = client.get("/api/livestock", headers=auth_headers(test_buyer))
+        assert response.status_code == 200
+
+
+class TestCart:
+    """Tests for the database-backed cart."""
+
+    def test_priced_in_one_query_with_unavailable_items(self, client, db_session, test_buyer,
+                                                        sample_livestock, auth_headers,
+                                                        count_queries):
+        headers = auth_headers(test_buyer)
+        for animal in sample_livestock[:3]:
+            response = client.post("/api/buyer/cart/add", json={"livestock_id": animal.id},
+                                   headers=headers)
+            assert response.status_code == 200
+        client.post("/api/buyer/cart/add", json={"livestock_id": sample_livestock[0].id,
+                                                 "quantity": 2}, headers=headers)
+        sample_livestock[1].is_available = False
+        db_session.commit()
+
+        count_queries.clear()
+        cart = client.get("/api/buyer/cart", headers=headers).json
+        assert len(count_queries) == 1
+        assert [item["livestock_id"] for item in cart["items"]] == [
+            sample_livestock[0].id, sample_livestock[2].id
+        ]
+        assert cart["items"][0]["quantity"] == 3
+        assert cart["total"] == 5000 * 3 + 5000
+        assert cart["unavailable"] == [{
+            "livestock_id": sample_livestock[1].id, "name": "Goat", "reason": "no longer available"
+        }]
+
+    def test_remove_clear_and_limits(self, app, client, test_buyer, sample_livestock, auth_headers):
+        headers = auth_headers(test_buyer)
+        app.config["CART_MAX_ITEMS"] = 2
+        for animal in sample_livestock[:2]:
+            client.post("/api/buyer/cart/add", json={"livestock_id": animal.id}, headers=headers)
+        full = client.post("/api/buyer/cart/add", json={"livestock_id": sample_livestock[2].id},
+                           headers=headers)
+        assert full.status_code == 400
+
+        removed = client.post("/api/buyer/cart/remove",
+                              json={"livestock_id": sample_livestock[0].id}, headers=headers)
+        assert removed.json["cart_count"] == 1
+        client.post("/api/buyer/cart/clear", headers=headers)
+        assert client.get("/api/buyer/cart", headers=headers).json["item_count"] == 0
+
+
+class TestCheckout:
+    """Tests for multi-item cart checkout."""
+
+    def test_batched_checkout_with_per_item_results(self, client, db_session, test_buyer,
+                                                    sample_livestock, buyer_address, auth_headers,
+                                                    count_queries):
+        from app.models import Livestock, Order
+
+        headers = auth_headers(test_buyer)
+        for animal in sample_livestock[:4]:
+            client.post("/api/buyer/cart/add", json={"livestock_id": animal.id}, headers=headers)
+        taken = sample_livestock[2]
+        taken.is_available = False
+        db_session.commit()
+
+        count_queries.clear()
+        response = client.post("/api/buyer/cart/checkout", json={"address_id": buyer_address.id},
+                               headers=headers)
+        queries = list(count_queries)
+        assert response.status_code == 201
+        statuses = {item["livestock_id"]: item["status"] for item in response.json["items"]}
+        assert statuses.pop(taken.id) == "unavailable"
+        assert set(statuses.values()) == {"ordered"}
+        assert response.json["payment_required"] == 5000 + 12000 + 8000
+        # One claim statement and no per-item listing loads
+        assert len([q for q in queries if q.startswith("UPDATE livestock")]) == 1
+        assert not [q for q in queries if q.endswith("WHERE livestock.id = ?")]
+
+        db_session.expire_all()
+        assert Order.query.filter_by(buyer_id=test_buyer.id).count() == 3
+        assert not db_session.get(Livestock, sample_livestock[0].id).is_available
+        # The unavailable listing stays in the cart
+        cart = client.get("/api/buyer/cart", headers=headers).json
+        assert [item["livestock_id"] for item in cart["unavailable"]] == [taken.id]
+
+    def test_nothing_available_is_409(self, client, db_session, test_buyer, sample_livestock,
+                                      buyer_address, auth_headers):
+        headers = auth_headers(test_buyer)
+        client.post("/api/buyer/cart/add", json={"livestock_id": sample_livestock[0].id},
+                    headers=headers)
+        sample_livestock[0].is_available = False
+        db_session.commit()
+
+        response = client.post("/api/buyer/cart/checkout", json={"address_id": buyer_address.id},
+                               headers=headers)
+        assert response.status_code == 409
+        assert client.post("/api/buyer/cart/checkout", json={}, headers=headers).status_code == 400
+
+    def test_rejects_malformed_livestock_ids(self, client, db_session, test_buyer, sample_livestock,
+                                             buyer_address, auth_headers):
+        headers = auth_headers(test_buyer)
+        client.post("/api/buyer/cart/add", json={"livestock_id": sample_livestock[0].id},
+                    headers=headers)
+        for ids in (sample_livestock[0].id, "1,2", [[1]], [True], [str(sample_livestock[0].id)]):
+            response = client.post(
+                "/api/buyer/cart/checkout",
+                json={"address_id": buyer_address.id, "livestock_ids": ids},
+                headers=headers,
+            )
+            assert response.status_code == 400
+            assert response.json["error"] == "livestock_ids must be a list of integers"
+
+
+class TestPlaceOrder:
+    """Tests for single-listing orders and the listing claim."""
+
+    def test_second_buyer_gets_409(self, client, db_session, test_buyer, sample_livestock,
+                                   buyer_address, auth_headers):
+        from app.models import Order
+
+        headers = auth_headers(test_buyer)
+        body = {"livestock_id": sample_livestock[0].id, "address_id": buyer_address.id}
+        first = client.post("/api/buyer/orders", json=body, headers=headers)
+        second = client.post("/api/buyer/orders", json=body, headers=headers)
+
+        assert first.status_code == 201
+        assert second.status_code == 409
+        assert Order.query.filter_by(livestock_id=sample_livestock[0].id).count() == 1
+
+        missing = client.post("/api/buyer/orders", json=dict(body, livestock_id=99999),
+                              headers=headers)
+        assert missing.status_code == 404
+
+    def test_cancel_relists(self, client, db_session, test_buyer, sample_livestock,
+                            buyer_address, auth_headers):
+        from app.models import Livestock
+
+        headers = auth_headers(test_buyer)
+        animal_id = sample_livestock[1].id
+        order = client.post(
+            "/api/buyer/orders",
+            json={"livestock_id": animal_id, "address_id": buyer_address.id},
+            headers=headers,
+        ).json["order"]
+        assert not db_session.get(Livestock, animal_id).is_available
+
+        response = client.post(f"/api/buyer/orders/{order['id']}/cancel", json={},
+                               headers=headers)
+        assert response.status_code == 200
+        db_session.expire_all()
+        assert db_session.get(Livestock, animal_id).is_available
+
+
+class TestCommissionRules:
+    """Tests for commission rules applied at order time."""
+
+    def test_new_rule_prices_next_order(self, client, test_admin, test_buyer, sample_livestock,
+                                        buyer_address, auth_headers):
+        admin = auth_headers(test_admin)
+        response = client.post("/api/admin/commission-rules", json={
+            "name": "Goats", "category": "goat", "commission_rate": 0.05,
+        }, headers=admin)
+        assert response.status_code == 201
+
+        goat, cow = sample_livestock[1], sample_livestock[0]
+        buyer = auth_headers(test_buyer)
+        orders = [
+            client.post("/api/buyer/orders", json={
+                "livestock_id": animal.id, "address_id": buyer_address.id,
+            }, headers=buyer).json["order"]
+            for animal in (goat, cow)
+        ]
+        assert [order["commission_amount"] for order in orders] == [12000 * 0.05, 5000 * 0.02]
+
+        rule_id = response.json["rule_id"]
+        client.put(f"/api/admin/commission-rules/{rule_id}", json={"commission_rate": 0.03},
+                   headers=admin)
+        report = client.get("/api/admin/commission-rules/reprice", headers=admin).json["report"]
+        assert report["by_rule"][str(rule_id)] == {"orders": 1, "commission": 360.0}
+        assert report["difference"] == 360.0 - 600.0
+
+
+class TestOrderLists:
+    """Tests for the projected, paginated order list endpoints."""
+
+    def test_buyer_list_is_projected(self, client, db_session, test_buyer, sample_orders,
+                                     auth_headers, count_queries):
+        headers = auth_headers(test_buyer)
+        totals = {order.id: float(order.total_amount) for order in sample_orders}
+        db_session.expire_all()
+        count_queries.clear()
+        response = client.get("/api/buyer/orders?per_page=2", headers=headers)
+
+        data = response.json
+        assert (data["total"], data["pages"], len(data["orders"])) == (3, 2, 2)
+        row = data["orders"][0]
+        assert set(row["livestock"]) == {
+            "id", "name", "species", "animal_type", "breed", "image_url", "location",
+        }
+        assert row["total_amount"] == totals[row["id"]]
+        # count + page, no per-row listing loads
+        assert not [q for q in count_queries if "FROM livestock" in q and "JOIN" not in q]
+
+    def test_api_list_cursor_walk(self, client, test_buyer, sample_orders, auth_headers):
+        headers = auth_headers(test_buyer)
+        seen, cursor = [], None
+        while True:
+            url = "/api/orders/my_orders?limit=2" + (f"&cursor={cursor}" if cursor else "")
+            data = client.get(url, headers=headers).json
+            seen.extend(order["id"] for order in data["orders"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+        assert sorted(seen) == sorted(order.id for order in sample_orders)
+        assert client.get("/api/orders/my_orders?cursor=bogus", headers=headers).status_code == 400
+
+    def test_admin_list_filters_and_caps(self, client, db_session, test_admin, sample_orders,
+                                         auth_headers):
+        sample_orders[0].status = "cancelled"
+        db_session.commit()
+        headers = auth_headers(test_admin)
+
+        cancelled = client.get("/api/admin/orders?status=cancelled", headers=headers).json
+        assert [order["id"] for order in cancelled["orders"]] == [sample_orders[0].id]
+        assert client.get("/api/admin/orders?per_page=5000", headers=headers).json["per_page"] == 100
+
+
+class TestResponseCache:
+    """Tests for the read-through cache on public listing endpoints."""
+
+    def test_hit_after_miss_with_normalized_params(self, client, sample_livestock):
+        first = client.get("/api/livestock?sortBy=price-low&limit=5")
+        second = client.get("/api/livestock?limit=5&sortBy=price-low&location=")
+        assert first.headers["X-Cache"] == "MISS"
+        assert second.headers["X-Cache"] == "HIT"
+        assert first.json == second.json
+
+    def test_create_invalidates_feed(self, client, sample_livestock, test_farmer, auth_headers):
+        before = client.get("/api/livestock").json["livestock"]
+        response = client.post(
+            "/api/livestock",
+            json={
+                "animal_type": "Sheep",
+                "weight": 35,
+                "price": 6000,
+                "location": "Narok",
+                "image_url": "https://example.com/sheep.jpg",
+            },
+            headers=auth_headers(test_farmer),
+        )
+        assert response.status_code == 201
+        after = client.get("/api/livestock")
+        assert after.headers["X-Cache"] == "MISS"
+        assert len(after.json["livestock"]) == len(before) + 1
+
+    def test_detail_invalidation_is_per_listing(self, app, client, sample_livestock):
+        from app.services.listing_events import listing_changed
+
+        first, second = sample_livestock[0].id, sample_livestock[1].id
+        client.get(f"/api/livestock/{first}")
+        client.get(f"/api/livestock/{second}")
+        listing_changed(first)
+        assert client.get(f"/api/livestock/{first}").headers["X-Cache"] == "MISS"
+        assert client.get(f"/api/livestock/{second}").headers["X-Cache"] == "HIT"
+
+    def test_species_counts(self, client, sample_livestock):
+        response = client.get("/api/buyer/species")
+        counts = {s["name"]: s["count"] for s in response.json["species"]}
+        assert counts == {"Cow": 4, "Goat": 3}
+
+
+class TestConditionalGet:
+    """Tests for ETag / Last-Modified revalidation."""
+
+    def test_detail_etag_roundtrip(self, client, sample_livestock):
+        url = f"/api/livestock/{sample_livestock[0].id}"
+        first = client.get(url)
+        assert first.status_code == 200
+        etag = first.headers["ETag"]
+        assert first.headers["Last-Modified"]
+
+        again = client.get(url, headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.data == b""
+
+    def test_detail_etag_changes_with_row(self, app, client, db_session, sample_livestock):
+        from app.services.listing_events import listing_changed
+
+        animal = sample_livestock[0]
+        etag = client.get(f"/api/livestock/{animal.id}").headers["ETag"]
+        animal.price = 9999
+        db_session.commit()
+        listing_changed(animal.id)
+        response = client.get(f"/api/livestock/{animal.id}", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+
+    def test_detail_repeat_requests_run_no_query(self, client, sample_livestock, count_queries):
+        url = f"/api/livestock/{sample_livestock[0].id}"
+        etag = client.get(url).headers["ETag"]
+
+        count_queries.clear()
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+        hit = client.get(url)
+        assert hit.headers["X-Cache"] == "HIT" and hit.headers["ETag"] == etag
+        assert count_queries == []
+
+    def test_order_lists_revalidate(self, client, db_session, test_buyer, sample_orders, auth_headers):
+        headers = auth_headers(test_buyer)
+        for url in ("/api/buyer/orders", "/api/orders/my_orders"):
+            etag = client.get(url, headers=headers).headers["ETag"]
+            not_modified = client.get(url, headers=dict(headers, **{"If-None-Match": etag}))
+            assert not_modified.status_code == 304
+
+        etag = client.get("/api/orders/my_orders", headers=headers).headers["ETag"]
+        sample_orders[0].status = "cancelled"
+        db_session.commit()
+        changed = client.get("/api/orders/my_orders", headers=dict(headers, **{"If-None-Match": etag}))
+        assert changed.status_code == 200
+
+    def test_if_modified_since(self, client, sample_livestock):
+        url = f"/api/livestock/{sample_livestock[0].id}"
+        last_modified = client.get(url).headers["Last-Modified"]
+        response = client.get(url, headers={"If-Modified-Since": last_modified})
+        assert response.status_code == 304
+
+
+class TestProximityFeed:
+    """Tests for the near-me mode of the marketplace feed."""
+
+    def _farmer_at(self, db_session, n, lat, lng):
+        from app.models import User, UserProfile
+
+        farmer = User(
+            email=f"geo{n}@test.com", phone_number=f"25472000000{n}", first_name="Geo",
+            last_name=str(n), role="farmer", password_hash="x",
+        )
+        db_session.add(farmer)
+        db_session.flush()
+        db_session.add(UserProfile(user_id=farmer.id, latitude=lat, longitude=lng))
+        db_session.flush()
+        return farmer
+
+    def test_nearest_first_within_radius(self, client, db_session):
+        from app.models import Livestock
+        from app.services.geo_search import locate_listings
+
+        places = [("nakuru", -0.3031, 36.0800), ("naivasha", -0.7167, 36.4333),
+                  ("nairobi", -1.2921, 36.8219), ("mombasa", -4.0435, 39.6682)]
+        ids = {}
+        for n, (name, lat, lng) in enumerate(places):
+            farmer = self._farmer_at(db_session, n, lat, lng)
+            animal = Livestock(
+                farmer_id=farmer.id, animal_type="Goat", weight=40, price=5000,
+                location=name,
+            )
+            locate_listings([animal], farmer.id)
+            db_session.add(animal)
+            db_session.flush()
+            ids[name] = animal.id
+        db_session.commit()
+
+        params = {"lat": -0.3031, "lng": 36.0800, "radiusKm": 200, "limit": 2}
+        first = client.get("/api/livestock", query_string=params).json
+        assert [item["id"] for item in first["livestock"]] == [ids["nakuru"], ids["naivasha"]]
+        assert first["livestock"][0]["distance_km"] == 0
+
+        second = client.get(
+            "/api/livestock", query_string=dict(params, cursor=first["next_cursor"])
+        ).json
+        assert [item["id"] for item in second["livestock"]] == [ids["nairobi"]]
+        assert second["next_cursor"] is None
+
+    def test_profile_move_resyncs_listings(self, client, db_session, test_farmer, auth_headers):
+        from app.models import Livestock, UserProfile
+
+        db_session.add(UserProfile(user_id=test_farmer.id, latitude=-0.3031, longitude=36.08))
+        animal = Livestock(
+            farmer_id=test_farmer.id, animal_type="Cow", weight=300, price=50000,
+            location="Nakuru",
+        )
+        db_session.add(animal)
+        db_session.commit()
+
+        response = client.patch(
+            "/api/auth/profile",
+            json={"latitude": -1.2921, "longitude": 36.8219, "profile_image_url": "x"},
+            headers=auth_headers(test_farmer),
+        )
+        assert response.status_code == 200
+        db_session.expire_all()
+        assert animal.geohash.startswith("kzf")
+        near_nairobi = client.get(
+            "/api/livestock", query_string={"lat": -1.29, "lng": 36.82, "radiusKm": 5}
+        ).json["livestock"]
+        assert [item["id"] for item in near_nairobi] == [animal.id]
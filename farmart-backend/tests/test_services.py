@@ -0,0 +1,851 @@
+"""
+Unit tests for services
+"""
+
+import json
+import os
+
+import pytest
+from app.models import AnalyticsEvent, Livestock
+from app.services.audit import audit_trail, diff, to_json
+from app.services.analytics import analytics_pipeline, build_event, InvalidEvent
+from app.services.cart_store import cart_store
+from app.services.facets import band_label, facet_counts, facet_snapshot, PRICE_BANDS
+from app.services.listing_columns import listing_columns
+from app.services.metrics_rollup import metrics_rollup
+from app.services.password_hasher import HasherBusy, method_of, password_hasher
+from app.services.reservations import claim_listing, claim_listings, release_listings
+from app.services.search_index import livestock_search, tokenize
+from app.services.user_stats import user_stats
+from app.services.view_counter import view_counter
+
+
+class TestSearchIndex:
+    """Tests for the in-process livestock search index."""
+
+    def test_tokenize(self):
+        assert tokenize("Boer-Goat, 2yrs!") == ["boer", "goat", "2yrs"]
+        assert tokenize(None) == []
+
+    def test_ranking_prefers_species_match(self, app, db_session, test_farmer):
+        """A species hit outranks the same word buried in a description."""
+        goat = Livestock(
+            farmer_id=test_farmer.id, animal_type="Goat", weight=40, price=8000,
+            location="Nakuru",
+        )
+        cow = Livestock(
+            farmer_id=test_farmer.id, animal_type="Cow", weight=300, price=60000,
+            location="Nakuru", description="Grazes happily next to the goat pen",
+        )
+        db_session.add_all([goat, cow])
+        db_session.commit()
+
+        ranked = [livestock_id for livestock_id, _ in livestock_search.search("goat")]
+        assert ranked == [goat.id, cow.id]
+
+    def test_prefix_and_and_semantics(self, app, db_session, sample_livestock):
+        """The last token matches by prefix; every token must match."""
+        assert len(livestock_search.search("boe")) == 3
+        assert livestock_search.search("boe", prefix=False) == []
+        ids = {i for i, _ in livestock_search.search("goat eldoret")}
+        expected = {
+            a.id for a in sample_livestock
+            if a.animal_type == "Goat" and a.location == "Eldoret"
+        }
+        assert ids == expected
+
+    def test_index_tracks_writes(self, app, db_session, sample_livestock):
+        """Indexed rows are refreshed or dropped when they change."""
+        assert livestock_search.search("eldoret")
+        animal = sample_livestock[4]
+        animal.is_available = False
+        db_session.commit()
+        livestock_search.refresh(animal.id)
+        assert animal.id not in {i for i, _ in livestock_search.search("eldoret")}
+
+
+class TestFacets:
+    """Tests for facet aggregation and the unfiltered snapshot."""
+
+    def test_band_label(self):
+        assert band_label(4999, PRICE_BANDS) == "0-5000"
+        assert band_label(5000, PRICE_BANDS) == "5000-10000"
+        assert band_label(250000, PRICE_BANDS) == "100000+"
+        assert band_label(None, PRICE_BANDS) is None
+
+    def test_snapshot_matches_aggregation(self, app, db_session, sample_livestock):
+        query = Livestock.query.filter_by(is_available=True)
+        assert facet_snapshot.counts() == facet_counts(query)
+
+        counts = facet_counts(query)
+        assert counts["price_band"] == [
+            {"value": "5000-10000", "count": 4},
+            {"value": "10000-25000", "count": 2},
+            {"value": "25000-50000", "count": 1},
+        ]
+        assert {"value": "Nakuru", "count": 4} in counts["location"]
+
+    def test_snapshot_updates_incrementally(self, app, db_session, sample_livestock):
+        assert facet_snapshot.counts()["species"] == [
+            {"value": "Cow", "count": 4},
+            {"value": "Goat", "count": 3},
+        ]
+        animal = sample_livestock[0]
+        animal.is_available = False
+        db_session.commit()
+        facet_snapshot.refresh(animal.id)
+        assert facet_snapshot.counts()["species"] == [
+            {"value": "Cow", "count": 3},
+            {"value": "Goat", "count": 3},
+        ]
+
+
+class TestListingColumns:
+    """Tests for the columnar listing snapshot."""
+
+    def test_select_matches_sql(self, app, db_session, sample_livestock):
+        ids, total = listing_columns.select(
+            ranges={"price": (5000, 12000), "weight": (60, None)},
+            sort="price",
+            descending=False,
+            limit=3,
+        )
+        expected = [
+            a.id
+            for a in Livestock.query.filter(
+                Livestock.price.between(5000, 12000), Livestock.weight >= 60
+            ).order_by(Livestock.price.asc(), Livestock.id.asc())
+        ]
+        assert total == len(expected)
+        assert ids == expected[:3]
+
+    def test_codes_and_incremental_updates(self, app, db_session, sample_livestock):
+        ids, total = listing_columns.select(species="GOAT", location="nakuru")
+        assert total == 2
+        assert listing_columns.select(species="camel") == ([], 0)
+
+        animal = db_session.get(Livestock, ids[0])
+        animal.is_available = False
+        db_session.commit()
+        listing_columns.refresh(animal.id)
+        assert listing_columns.select(species="goat", location="nakuru")[1] == 1
+
+        # A freed slot is reused by the next listing
+        animal.is_available = True
+        db_session.commit()
+        listing_columns.refresh(animal.id)
+        assert listing_columns.select(species="goat", location="nakuru")[1] == 2
+        assert listing_columns._state.size == len(sample_livestock)
+
+
+class TestViewCounter:
+    """Tests for write-behind listing view counts."""
+
+    def test_flush_batches_views(self, app, db_session, sample_livestock):
+        app.config["VIEW_COUNTER_EVENTS"] = True
+        first, second = sample_livestock[0], sample_livestock[1]
+        updated_at = first.updated_at
+        for _ in range(3):
+            view_counter.record(first.id, ip_address="127.0.0.1")
+        view_counter.record(second.id)
+        assert view_counter.pending(first.id) == 3
+
+        assert view_counter.flush() == 2
+        analytics_pipeline.flush()
+        assert view_counter.pending(first.id) == 0
+        db_session.expire_all()
+        assert db_session.get(Livestock, first.id).view_count == 3
+        assert db_session.get(Livestock, second.id).view_count == 1
+        # A view is not a listing change
+        assert db_session.get(Livestock, first.id).updated_at == updated_at
+        assert AnalyticsEvent.query.filter_by(event_type="listing_view").count() == 4
+
+    def test_flush_with_nothing_pending(self, app, db_session):
+        assert view_counter.flush() == 0
+
+
+class TestAnalyticsPipeline:
+    """Tests for queued, batched analytics ingestion."""
+
+    def test_flush_writes_in_batches(self, app, db_session):
+        app.config["ANALYTICS_BATCH_SIZE"] = 4
+        rows = [build_event({"event_type": "search", "metadata": {"q": "goat"}}) for _ in range(10)]
+        assert analytics_pipeline.enqueue(rows) == (10, 0)
+        assert analytics_pipeline.flush() == 10
+        assert AnalyticsEvent.query.count() == 10
+        assert AnalyticsEvent.query.first().event_metadata == '{"q":"goat"}'
+
+    def test_rejects_unknown_event_type(self):
+        with pytest.raises(InvalidEvent):
+            build_event({"event_type": "drop table"})
+
+    def test_overflow_drops(self, app, db_session):
+        app.config["ANALYTICS_QUEUE_SIZE"] = 2
+        analytics_pipeline.init_app(app)
+        rows = [build_event({"event_type": "page_view"}) for _ in range(5)]
+        assert analytics_pipeline.enqueue(rows) == (2, 3)
+        assert analytics_pipeline.stats()["dropped"] == 3
+
+    def test_overflow_spills_and_replays(self, app, db_session, tmp_path):
+        app.config.update(
+            ANALYTICS_QUEUE_SIZE=2,
+            ANALYTICS_OVERFLOW="spill",
+            ANALYTICS_SPILL_PATH=str(tmp_path / "spill.jsonl"),
+        )
+        analytics_pipeline.init_app(app)
+        rows = [build_event({"event_type": "page_view", "entity_id": i}) for i in range(5)]
+        analytics_pipeline.enqueue(rows)
+        assert analytics_pipeline.stats()["spilled"] == 3
+
+        assert analytics_pipeline.flush() == 5
+        assert not (tmp_path / "spill.jsonl").exists()
+        assert sorted(e.entity_id for e in AnalyticsEvent.query) == list(range(5))
+
+    def test_spill_claim_is_per_process(self, app, db_session, tmp_path):
+        spill = tmp_path / "spill.jsonl"
+        app.config.update(ANALYTICS_OVERFLOW="spill", ANALYTICS_SPILL_PATH=str(spill))
+        analytics_pipeline.init_app(app)
+        state = app.extensions["analytics"]
+        # Another worker claimed it first: nothing to replay, no error
+        assert analytics_pipeline._take_spill(state) == ([], [])
+
+        analytics_pipeline._spill(state, [build_event({"event_type": "search"})])
+        stale = tmp_path / "spill.jsonl.replay"
+        stale.write_text("left by another worker\n")
+        events, attempts = analytics_pipeline._take_spill(state)
+        assert [e["event_type"] for e in events] == ["search"] and attempts == [0]
+        assert stale.exists() and not spill.exists()
+
+    def test_failing_spilled_events_are_dead_lettered(self, app, db_session, tmp_path, monkeypatch):
+        spill, dead = tmp_path / "spill.jsonl", tmp_path / "dead.jsonl"
+        app.config.update(
+            ANALYTICS_OVERFLOW="spill",
+            ANALYTICS_SPILL_PATH=str(spill),
+            ANALYTICS_DEAD_LETTER_PATH=str(dead),
+            ANALYTICS_SPILL_MAX_ATTEMPTS=3,
+        )
+        analytics_pipeline.init_app(app)
+        state = app.extensions["analytics"]
+        analytics_pipeline._spill(state, [build_event({"event_type": "search"})])
+        with open(spill, "a") as handle:
+            handle.write("{not json\n")
+
+        def failing_insert(table):
+            raise RuntimeError("database down")
+
+        monkeypatch.setattr("app.services.analytics.insert", failing_insert)
+        for _ in range(3):
+            assert analytics_pipeline.flush() == 0
+        monkeypatch.undo()
+
+        assert not spill.exists()
+        lines = dead.read_text().splitlines()
+        assert lines[0] == "{not json"
+        assert json.loads(lines[1])["_attempts"] == 3
+        assert analytics_pipeline.stats()["dead_lettered"] == 2
+        assert analytics_pipeline.flush() == 0
+        assert AnalyticsEvent.query.count() == 0
+
+
+class TestMetricsRollup:
+    """Tests for the incremental DailyMetrics rollup."""
+
+    def test_run_is_incremental_and_idempotent(self, app, db_session, sample_orders):
+        from datetime import date, datetime
+        from app.models import DailyMetrics, OrderStatus
+
+        metrics_rollup.run()
+        today = DailyMetrics.query.filter_by(date=datetime.utcnow().date()).one()
+        assert today.total_orders == 3
+        assert DailyMetrics.query.filter_by(date=date(2025, 1, 3)).one().total_listings == 1
+
+        # A late status change lands on the day the order was placed
+        order = sample_orders[0]
+        order.status = OrderStatus.DELIVERED
+        db_session.commit()
+        metrics_rollup.run()
+        metrics_rollup.run()
+        today = DailyMetrics.query.filter_by(date=datetime.utcnow().date()).one()
+        assert float(today.total_revenue) == float(order.total_amount)
+        assert DailyMetrics.query.filter_by(date=today.date).count() == 1
+
+    def test_late_lower_event_id_is_counted(self, app, db_session):
+        from datetime import date, datetime
+
+        from app.models import DailyMetrics
+
+        def page_view(event_id, day):
+            created_at = datetime.combine(day, datetime.min.time())
+            db_session.add(AnalyticsEvent(id=event_id, event_type="page_view", created_at=created_at))
+            db_session.commit()
+
+        page_view(10, date(2025, 3, 1))
+        metrics_rollup.run()
+        # Another worker's batch commits after the run has passed id 10
+        page_view(5, date(2025, 3, 2))
+        metrics_rollup.run()
+        assert DailyMetrics.query.filter_by(date=date(2025, 3, 2)).one().page_views == 1
+
+    def test_backfill_and_periods(self, app, db_session, sample_livestock):
+        from datetime import date
+
+        assert metrics_rollup.backfill(date(2024, 12, 30), date(2025, 1, 12), chunk_days=3, workers=2) == 14
+
+        weeks = metrics_rollup.series("week", date(2024, 12, 30), date(2025, 1, 12))
+        assert [w["period_start"] for w in weeks] == ["2024-12-30", "2025-01-06"]
+        assert [w["total_listings"] for w in weeks] == [5, 2]
+        month = metrics_rollup.series("month", date(2025, 1, 1), date(2025, 1, 31))
+        assert month[0]["total_listings"] == 7
+        with pytest.raises(ValueError):
+            metrics_rollup.series("year", date(2025, 1, 1), date(2025, 1, 31))
+
+
+class TestUserStats:
+    """Tests for the maintained per-user statistics."""
+
+    def test_maintained_on_flush(self, app, db_session, test_farmer, test_buyer, sample_orders):
+        from app.models import OrderStatus
+
+        assert test_farmer.stats.listings_count == 7
+        assert test_buyer.stats.orders_count == 3
+        assert test_buyer.stats.purchases_count == 0
+
+        order = sample_orders[1]
+        order.status = OrderStatus.DELIVERED
+        db_session.commit()
+        db_session.refresh(test_farmer.stats)
+        db_session.refresh(test_buyer.stats)
+        assert test_farmer.stats.sales_count == 1
+        assert float(test_farmer.stats.revenue_total) == float(order.total_amount)
+        assert test_buyer.stats.purchases_count == 1
+
+        # Leaving DELIVERED reverses it; other transitions are no-ops
+        order.status = OrderStatus.DISPUTE
+        db_session.commit()
+        sample_orders[0].status = OrderStatus.CONFIRMED
+        db_session.commit()
+        db_session.refresh(test_buyer.stats)
+        assert test_buyer.stats.purchases_count == 0
+        assert float(test_buyer.stats.spent_total) == 0
+        assert test_buyer.stats.orders_count == 3
+
+    def test_csv_import_counts_listings(self, app, db_session, test_farmer):
+        from io import BytesIO
+        from app.services.file_handler import parse_livestock_csv
+
+        db_session.add(Livestock(farmer_id=test_farmer.id, animal_type="Cow", weight=300,
+                                 price=50000, location="Nakuru"))
+        db_session.commit()
+        upload = BytesIO(
+            b"animal_type,weight,price,location\n"
+            b"Goat,40,8000,Nakuru\n"
+            b"Sheep,35,7000,Eldoret\n"
+        )
+        assert parse_livestock_csv(upload, test_farmer.id) == 2
+
+        db_session.refresh(test_farmer)
+        assert user_stats.for_user(test_farmer).listings_count == 3
+
+    def test_concurrent_first_activity_adds_to_existing_row(self, app, db_session, test_farmer,
+                                                            monkeypatch):
+        from app.models import UserStats
+        from app.services import user_stats as module
+
+        # A read creates nothing
+        assert user_stats.for_user(test_farmer).listings_count == 0
+        assert UserStats.query.count() == 0
+
+        compute = module._compute
+
+        def racing_compute(connection, user_ids=None):
+            # Another transaction records its first listing for this farmer
+            # between our UPDATE (0 rows) and our INSERT
+            connection.execute(UserStats.__table__.insert(), {
+                "user_id": test_farmer.id, "listings_count": 1, "sales_count": 0,
+                "revenue_total": 0, "orders_count": 0, "purchases_count": 0, "spent_total": 0,
+            })
+            return compute(connection, user_ids)
+
+        monkeypatch.setattr(module, "_compute", racing_compute)
+        db_session.add(Livestock(farmer_id=test_farmer.id, animal_type="Cow", weight=300,
+                                 price=50000, location="Nakuru"))
+        db_session.commit()
+        monkeypatch.undo()
+
+        assert db_session.get(UserStats, test_farmer.id).listings_count == 2
+
+    def test_reconcile_matches_maintained(self, app, db_session, test_farmer, test_buyer, sample_orders):
+        from app.models import OrderStatus, UserStats
+
+        sample_orders[2].status = OrderStatus.DELIVERED
+        db_session.commit()
+        maintained = {row.user_id: row.to_dict() for row in UserStats.query}
+
+        assert user_stats.reconcile() == 2
+        db_session.expire_all()
+        assert {row.user_id: row.to_dict() for row in UserStats.query} == maintained
+
+
+class TestAuditTrail:
+    """Tests for buffered, per-commit audit writes."""
+
+    def test_one_insert_per_commit(self, app, db_session, test_admin, count_queries):
+        from app.models import AuditLog
+
+        for user_id in range(1, 6):
+            audit_trail.record(
+                "user_deactivated", "user", user_id,
+                old_values={"is_active": True}, new_values={"is_active": False},
+                admin_id=test_admin.id,
+            )
+        assert len(audit_trail.pending()) == 5
+
+        count_queries.clear()
+        db_session.commit()
+        assert len([s for s in count_queries if "INSERT INTO audit_logs" in s]) == 1
+        assert AuditLog.query.count() == 5
+        assert audit_trail.pending() == []
+
+    def test_rollback_discards_entries(self, app, db_session, test_admin):
+        from app.models import AuditLog
+
+        audit_trail.record("user_activated", "user", 1, admin_id=test_admin.id)
+        db_session.rollback()
+        db_session.commit()
+        assert AuditLog.query.count() == 0
+
+    def test_compact_diff(self):
+        old, new = diff(
+            {"is_active": True, "role": "buyer"}, {"is_active": False, "role": "buyer"}
+        )
+        assert (old, new) == ({"is_active": True}, {"is_active": False})
+        assert to_json({"b": 1, "a": [1, 2]}) == '{"a":[1,2],"b":1}'
+        assert to_json(None) is None
+
+
+class TestPasswordHasher:
+    """Tests for pooled password hashing."""
+
+    def test_outdated_hash_upgraded_on_check(self, app, db_session, test_buyer):
+        from werkzeug.security import generate_password_hash
+
+        test_buyer.password_hash = generate_password_hash("TestPassword123", method="pbkdf2:sha256:2000")
+        db_session.commit()
+
+        assert not test_buyer.check_password("wrong")
+        assert method_of(test_buyer.password_hash) == "pbkdf2:sha256:2000"
+        assert test_buyer.check_password("TestPassword123")
+        assert method_of(test_buyer.password_hash) == app.config["PASSWORD_HASH_METHOD"]
+        assert test_buyer.check_password("TestPassword123")
+        assert password_hasher.stats()["rehashed"] == 1
+
+    def test_short_method_name_does_not_rehash(self, app, db_session, test_buyer):
+        app.config["PASSWORD_HASH_METHOD"] = "scrypt"
+        password_hasher.init_app(app)
+        test_buyer.set_password("TestPassword123")
+        db_session.commit()
+        stored = test_buyer.password_hash
+
+        assert method_of(stored) == "scrypt:32768:8:1"
+        assert test_buyer.check_password("TestPassword123")
+        assert test_buyer.check_password("TestPassword123")
+        assert test_buyer.password_hash == stored
+        assert password_hasher.stats()["rehashed"] == 0
+
+    def test_timed_out_job_keeps_its_slot(self, app):
+        import time
+
+        def free_slots(state):
+            taken = 0
+            while state.slots.acquire(blocking=False):
+                taken += 1
+            for _ in range(taken):
+                state.slots.release()
+            return taken
+
+        state = app.extensions["password_hasher"]
+        state.workers = 1
+        capacity = free_slots(state)
+        try:
+            # Warm the pool so the slow job is running (not cancellable) at timeout
+            password_hasher._run(abs, -1)
+            app.config["PASSWORD_HASH_TIMEOUT_SECONDS"] = 0.2
+            with pytest.raises(HasherBusy):
+                password_hasher._run(time.sleep, 1)
+            # The worker is still hashing, so its slot is still taken
+            assert free_slots(state) == capacity - 1
+            deadline = time.monotonic() + 10
+            while free_slots(state) < capacity and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert free_slots(state) == capacity
+        finally:
+            state.workers = 0
+            state.pool.shutdown()
+
+    def test_full_queue_rejects_immediately(self, app):
+        state = app.extensions["password_hasher"]
+        held = []
+        while state.slots.acquire(blocking=False):
+            held.append(True)
+        try:
+            with pytest.raises(HasherBusy):
+                password_hasher.hash("secret")
+        finally:
+            for _ in held:
+                state.slots.release()
+        assert password_hasher.stats()["rejected"] == 1
+
+    def test_process_pool(self, app):
+        state = app.extensions["password_hasher"]
+        state.workers = 1
+        try:
+            pwhash = password_hasher.hash("secret")
+            assert password_hasher.verify(pwhash, "secret") == (True, None)
+        finally:
+            state.workers = 0
+            state.pool.shutdown()
+
+
+class TestRateLimitStorage:
+    """Tests for the rate limit algorithms and shared storage."""
+
+    @pytest.fixture(params=["memory", "sqlite"])
+    def storage(self, request, tmp_path):
+        from app.utils.rate_limit import MemoryStorage, SQLiteStorage
+
+        if request.param == "memory":
+            return MemoryStorage()
+        return SQLiteStorage(str(tmp_path / "ratelimit.db"))
+
+    def test_sliding_window_has_no_boundary_burst(self, storage):
+        from app.utils.rate_limit import Limit
+
+        limit = Limit(3, 60)
+        assert [storage.sliding_window("k", limit, t).allowed for t in (50, 55, 59)] == [True] * 3
+        # A fixed window would reset at t=60; the log still holds 3 hits
+        denied = storage.sliding_window("k", limit, 61)
+        assert not denied.allowed
+        assert denied.retry_after == pytest.approx(49)
+        assert storage.sliding_window("k", limit, 110.5).allowed
+
+    def test_token_bucket_refills_evenly(self, storage):
+        from app.utils.rate_limit import Limit
+
+        limit = Limit(2, 10)  # one token every 5 seconds
+        assert storage.token_bucket("k", limit, 0).allowed
+        assert storage.token_bucket("k", limit, 0).allowed
+        denied = storage.token_bucket("k", limit, 1)
+        assert not denied.allowed
+        assert denied.retry_after == pytest.approx(4)
+        assert storage.token_bucket("k", limit, 5.5).allowed
+        assert not storage.token_bucket("k", limit, 6).allowed
+
+    def test_sqlite_shared_across_processes(self, tmp_path):
+        import multiprocessing
+        from app.utils.rate_limit import Limit, SQLiteStorage
+
+        path = str(tmp_path / "ratelimit.db")
+        SQLiteStorage(path)
+        with multiprocessing.get_context("fork").Pool(4) as pool:
+            allowed = pool.starmap(_hit_shared, [(path, Limit(50, 60))] * 100)
+        assert sum(allowed) == 50
+
+
+def _hit_shared(path, limit):
+    import time
+    from app.utils.rate_limit import SQLiteStorage
+
+    return SQLiteStorage(path).sliding_window("shared", limit, time.time()).allowed
+
+
+class TestCartStore:
+    """Tests for cart caching and eviction."""
+
+    def test_cached_contents_priced_with_in_query(self, app, db_session, test_buyer,
+                                                   sample_livestock, count_queries):
+        app.config["CART_CACHE_SECONDS"] = 60
+        cart_store.add(test_buyer.id, sample_livestock[0].id)
+        cart_store.priced(test_buyer.id)  # fills the cache
+
+        count_queries.clear()
+        cart = cart_store.priced(test_buyer.id)
+        assert len(count_queries) == 1
+        assert "cart_items" not in count_queries[0]
+        assert cart["item_count"] == 1
+
+        # A write drops the cached copy
+        cart_store.add(test_buyer.id, sample_livestock[1].id)
+        assert cart_store.priced(test_buyer.id)["item_count"] == 2
+
+    def test_evicts_abandoned_carts(self, app, db_session, test_buyer, test_farmer,
+                                    sample_livestock):
+        from datetime import datetime, timedelta
+        from app.models import CartItem
+
+        cart_store.add(test_buyer.id, sample_livestock[0].id)
+        cart_store.add(test_farmer.id, sample_livestock[1].id)
+        CartItem.query.filter_by(user_id=test_farmer.id).update(
+            {"updated_at": datetime.utcnow() - timedelta(days=31)}
+        )
+        db_session.commit()
+
+        assert cart_store.evict_abandoned() == 1
+        assert cart_store.contents(test_buyer.id) == {sample_livestock[0].id: 1}
+        assert cart_store.contents(test_farmer.id) == {}
+
+    def test_concurrent_add_of_same_listing_sums(self, app, db_session, test_buyer,
+                                                 sample_livestock, monkeypatch):
+        from datetime import datetime
+        from sqlalchemy import insert
+        from app.models import CartItem
+
+        animal_id = sample_livestock[0].id
+        count = cart_store.count
+
+        def racing_count(user_id):
+            # Another request adds the same listing between our UPDATE and INSERT
+            monkeypatch.setattr(cart_store, "count", count)
+            db_session.execute(insert(CartItem).values(
+                user_id=user_id, livestock_id=animal_id, quantity=2, added_at=datetime.utcnow()
+            ))
+            return count(user_id) - 1
+
+        monkeypatch.setattr(cart_store, "count", racing_count)
+        assert cart_store.add(test_buyer.id, animal_id, quantity=3) == 1
+        assert cart_store.contents(test_buyer.id) == {animal_id: 5}
+
+
+class TestReservations:
+    """Tests for atomic listing claims."""
+
+    def test_claim_once_then_release(self, app, db_session, sample_livestock):
+        ids = [animal.id for animal in sample_livestock[:3]]
+        first = claim_listings(ids + [99999])
+        assert set(first) == set(ids)
+        assert first[ids[0]].price == sample_livestock[0].price
+        assert claim_listing(ids[0]) is None
+
+        assert release_listings(ids[0]) == 1
+        assert claim_listing(ids[0]) is not None
+
+    def test_claim_without_returning_checks_rowcount(self, app, db_session, sample_livestock,
+                                                     monkeypatch):
+        from sqlalchemy import update
+        from sqlalchemy.sql import Update
+        from app import db
+
+        ids = [animal.id for animal in sample_livestock[:2]]
+        execute = db.session.execute
+        rival = update(Livestock).where(Livestock.id == ids[0]).values(is_available=False)
+
+        def racing_execute(statement, *args, **kwargs):
+            # Another buyer claims the first listing after our read (no row lock)
+            if isinstance(statement, Update) and statement is not rival:
+                execute(rival)
+                monkeypatch.setattr(db.session, "execute", execute)
+            return execute(statement, *args, **kwargs)
+
+        monkeypatch.setattr(db.engine.dialect, "update_returning", False)
+        monkeypatch.setattr(db.session, "execute", racing_execute)
+        assert set(claim_listings(ids)) == {ids[1]}
+
+    def test_concurrent_claims_have_one_winner(self, app, db_session, sample_livestock):
+        import threading
+        from app import db
+
+        animal_id = sample_livestock[0].id
+        barrier = threading.Barrier(6)
+        winners, errors = [], []
+
+        def buyer():
+            with app.app_context():
+                barrier.wait()
+                try:
+                    if claim_listing(animal_id) is not None:
+                        winners.append(threading.get_ident())
+                    db.session.commit()
+                except Exception as exc:  # surfaced by the assertion below
+                    errors.append(exc)
+
+        threads = [threading.Thread(target=buyer) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert len(winners) == 1
+
+
+_child_app = None
+
+
+def _init_order_number_child(app):
+    # Pool initargs are inherited through fork, not pickled
+    global _child_app
+    _child_app = app
+
+
+def _order_numbers_in_child(count):
+    from app.utils.order_numbers import order_numbers
+
+    with _child_app.app_context():
+        return [order_numbers.next() for _ in range(count)]
+
+
+class TestOrderNumbers:
+    """Tests for in-process order number generation."""
+
+    def test_format_sorts_and_parses(self, app):
+        from app.utils.order_numbers import order_numbers, parse_order_number
+
+        numbers = [order_numbers.next() for _ in range(5000)]
+        assert numbers == sorted(numbers)
+        assert len(set(numbers)) == len(numbers)
+        assert all(len(number) <= 50 for number in numbers)
+
+        parts = parse_order_number(numbers[-1])
+        assert parts["pid"] == os.getpid()
+        assert parts["host_id"] == app.extensions["order_numbers"]
+        with pytest.raises(ValueError):
+            parse_order_number("ORD-20250101120000-7")
+
+    def test_clock_going_back_stays_monotonic(self):
+        from app.utils.order_numbers import OrderNumberGenerator
+
+        generator = OrderNumberGenerator()
+        first = generator._tick(1000)
+        assert generator._tick(900) > first
+        for _ in range(5000):  # overflows the per-millisecond sequence
+            last = generator._tick(1000)
+        assert last[0] > first[0]
+
+    def test_unique_across_processes(self, app):
+        import multiprocessing
+
+        context = multiprocessing.get_context("fork")
+        with context.Pool(4, initializer=_init_order_number_child, initargs=(app,)) as pool:
+            batches = pool.map(_order_numbers_in_child, [20000] * 8)
+
+        numbers = [number for batch in batches for number in batch]
+        assert len(set(numbers)) == len(numbers)
+        assert all(batch == sorted(batch) for batch in batches)
+
+
+def _rule(id, rate, category=None, low=None, high=None, start=None, end=None, active=True):
+    from types import SimpleNamespace
+
+    return SimpleNamespace(
+        id=id, commission_rate=rate, category=category, min_order_value=low,
+        max_order_value=high, effective_from=start, effective_to=end, is_active=active,
+    )
+
+
+class TestCommissionEngine:
+    """Tests for the compiled commission rule index."""
+
+    def test_precedence(self):
+        from datetime import date
+        from app.services.commission import compile_rules
+
+        rules = compile_rules([
+            _rule(1, 0.05, low=0, high=10000),
+            _rule(2, 0.03, low=10000),
+            _rule(3, 0.01, category="Cow", low=50000),
+            _rule(4, 0.04, category="all", low=0, high=10000,
+                  start=date(2026, 6, 1), end=date(2026, 6, 30)),
+            _rule(5, 0.09, active=False),
+        ], default_rate=0.02)
+
+        may, june = date(2026, 5, 15), date(2026, 6, 30)
+        assert rules.price(5000, "Goat", may) == (1, 0.05, 250.0)
+        assert rules.price(5000, "Goat", june).rule_id == 4  # later effective_from wins
+        assert rules.price(10000, "Goat", may).rule_id == 2  # max is exclusive
+        assert rules.price(60000, "cow", may).rule_id == 3  # category beats generic
+        assert rules.price(20000, "Cow", may).rule_id == 2  # ...only where it matches
+        assert rules.price(-1, None, may) == (None, 0.02, -0.02)
+
+    def test_matches_brute_force(self):
+        import random
+        from datetime import date, timedelta
+        from app.services.commission import compile_rules, _category_key
+
+        rng = random.Random(3)
+        base = date(2026, 1, 1)
+        rows = []
+        for i in range(1, 41):
+            low = rng.choice([None, rng.randrange(0, 50000, 1000)])
+            start = rng.choice([None, base + timedelta(days=rng.randrange(300))])
+            rows.append(_rule(
+                i, rng.choice([0.01, 0.02, 0.03, 0.05]),
+                category=rng.choice([None, "all", "Cow", "Goat"]),
+                low=low,
+                high=rng.choice([None, (low or 0) + rng.randrange(1000, 60000, 1000)]),
+                start=start,
+                end=rng.choice([None, (start or base) + timedelta(days=rng.randrange(90))]),
+            ))
+        rules = compile_rules(rows, default_rate=0.02)
+
+        def brute(value, category, day):
+            def matches(row):
+                return ((row.min_order_value is None or row.min_order_value <= value)
+                        and (row.max_order_value is None or value < row.max_order_value)
+                        and (row.effective_from is None or row.effective_from <= day)
+                        and (row.effective_to is None or day <= row.effective_to))
+
+            for specific in (True, False):
+                candidates = [
+                    row for row in rows if matches(row)
+                    and (_category_key(row.category) is not None) == specific
+                    and (not specific or _category_key(row.category) == _category_key(category))
+                ]
+                if candidates:
+                    return max(candidates, key=lambda r: (r.effective_from or date.min, r.id)).id
+            return None
+
+        for _ in range(2000):
+            value = rng.randrange(0, 120000, 500)
+            category = rng.choice(["Cow", "Goat", "Sheep"])
+            day = base + timedelta(days=rng.randrange(400))
+            assert rules.price(value, category, day).rule_id == brute(value, category, day)
+
+    def test_reprice_orders(self, app, db_session, sample_orders):
+        from app.models import CommissionRule
+        from app.services.commission import commission_engine
+
+        db_session.add(CommissionRule(name="Cattle", category="Cow", commission_rate=0.01))
+        db_session.commit()
+        commission_engine.invalidate()
+
+        report = commission_engine.reprice_orders()
+        assert report["orders"] == 3
+        # sample_orders: Cow 5000, Goat 12000, Cow 5000, all charged 2%
+        assert report["charged"] == 440.0
+        assert report["repriced"] == 100.0 + 240.0
+        assert report["by_rule"]["default"] == {"orders": 1, "commission": 240.0}
+
+
+class TestGeoSearch:
+    """Tests for geohash helpers and proximity ranking."""
+
+    def test_encode_geohash(self):
+        from app.utils.geo import encode_geohash
+
+        assert encode_geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+    def test_covering_cells_contain_box_corners(self):
+        from app.utils.geo import bounding_box, covering_cells, encode_geohash
+
+        box = bounding_box(-0.3031, 36.0800, 30)
+        cells = covering_cells(box)
+        assert len(cells) <= 16
+        for lat in (box[0], box[2]):
+            for lon in (box[1], box[3]):
+                assert any(encode_geohash(lat, lon).startswith(c) for c in cells)
+
+    def test_haversine(self):
+        from app.utils.geo import haversine_km
+
+        # Nairobi -> Nakuru is roughly 140 km
+        distance = haversine_km(-1.2921, 36.8219, [-0.3031], [36.0800])[0]
+        assert 135 < distance < 145